@@ -0,0 +1,257 @@
+const std = @import("std");
+const websocket_client = @import("../openclaw_transport.zig").websocket;
+const ziggy = @import("ziggy-core");
+const logger = ziggy.utils.logger;
+const gateway = ziggy.protocol.gateway;
+const requests = ziggy.protocol.requests;
+
+/// One input line: a raw gateway request. `id` is echoed back on the result
+/// line (any JSON value); without one, the 1-based line number is used.
+///
+///   {"id":"s1","method":"chat.send","params":{"sessionKey":"main","message":"hi","idempotencyKey":"k1"}}
+const Command = struct {
+    id: ?std.json.Value = null,
+    method: []const u8,
+    params: ?std.json.Value = null,
+};
+
+/// The result line, minus the leading `"id"` (spliced in from the tag).
+const Result = struct {
+    ok: bool,
+    payload: ?std.json.Value = null,
+    @"error": ?gateway.GatewayError = null,
+};
+
+const EmptyParams = struct {};
+
+pub const Options = struct {
+    /// Requests sent but not yet answered, at most.
+    window: usize = 32,
+    /// Requests read but not yet written out, at most. Results are written in
+    /// input order, so finished lines wait behind a slow earlier request; this
+    /// bounds how many pile up.
+    max_unflushed: usize = 1024,
+    /// Per-request deadline, counted from when it was sent.
+    timeout_ms: u64 = 60_000,
+};
+
+const Slot = struct {
+    /// JSON text of the caller's id (or the line number).
+    tag: []u8,
+    /// Gateway request id while in flight.
+    request_id: ?[]u8 = null,
+    deadline_ms: i64 = 0,
+    /// The finished result line, without the trailing newline.
+    line: ?[]u8 = null,
+};
+
+/// Runs JSONL requests from `input` over one connected client, keeping up to
+/// `options.window` of them in flight, and writes one JSONL result per input
+/// line to `out`, in input order. Reading pauses while `options.max_unflushed`
+/// lines are unwritten. Returns error.RequestFailed when any result
+/// is not ok (after every line has been answered).
+pub fn run(
+    allocator: std.mem.Allocator,
+    ws_client: *websocket_client.WebSocketClient,
+    input: std.fs.File,
+    out: anytype,
+    options: Options,
+) !void {
+    var slots: std.ArrayList(Slot) = .empty;
+    defer {
+        for (slots.items) |slot| freeSlot(allocator, slot);
+        slots.deinit(allocator);
+    }
+    // Slot numbers count every non-blank line; `slots.items[0]` is slot `base`.
+    var base: usize = 0;
+    var in_flight: std.StringHashMapUnmanaged(usize) = .empty;
+    defer in_flight.deinit(allocator);
+
+    const saved_timeout_ms = ws_client.read_timeout_ms;
+    defer ws_client.setReadTimeout(saved_timeout_ms);
+
+    var reader = input.deprecatedReader();
+    var line_no: usize = 0;
+    var eof = false;
+    var flushed: usize = 0;
+    var failed: usize = 0;
+
+    while (true) {
+        while (!eof and in_flight.count() < options.window and slots.items.len - flushed < options.max_unflushed) {
+            const raw = try reader.readUntilDelimiterOrEofAlloc(allocator, '\n', max_line_bytes) orelse {
+                eof = true;
+                break;
+            };
+            defer allocator.free(raw);
+            line_no += 1;
+            const line = std.mem.trim(u8, raw, " \t\r");
+            if (line.len == 0) continue;
+
+            const index = slots.items.len;
+            try slots.append(allocator, .{ .tag = undefined });
+            startCommand(allocator, ws_client, &slots.items[index], line, line_no, options.timeout_ms) catch |err| {
+                slots.items.len -= 1;
+                return err;
+            };
+            if (slots.items[index].request_id) |id| try in_flight.put(allocator, id, base + index);
+        }
+
+        while (flushed < slots.items.len) : (flushed += 1) {
+            const slot = &slots.items[flushed];
+            const line = slot.line orelse break;
+            if (!isOkLine(slot.tag, line)) failed += 1;
+            try out.writeAll(line);
+            try out.writeByte('\n');
+            freeSlot(allocator, slot.*);
+            slot.* = .{ .tag = &.{} };
+        }
+        // Drop written slots once they are most of the list, so it stays bounded too.
+        if (flushed > 0 and flushed * 2 >= slots.items.len) {
+            const kept = slots.items.len - flushed;
+            std.mem.copyForwards(Slot, slots.items[0..kept], slots.items[flushed..]);
+            slots.items.len = kept;
+            base += flushed;
+            flushed = 0;
+        }
+        if (eof and in_flight.count() == 0) break;
+
+        const now = std.time.milliTimestamp();
+        var next_deadline: i64 = std.math.maxInt(i64);
+        var it = in_flight.valueIterator();
+        while (it.next()) |index| next_deadline = @min(next_deadline, slots.items[index.* - base].deadline_ms);
+        if (next_deadline <= now) {
+            try expire(allocator, slots.items, base, &in_flight, now);
+            continue;
+        }
+        if (!ws_client.is_connected) return error.NotConnected;
+
+        ws_client.setReadTimeout(@intCast(@min(next_deadline - now, std.math.maxInt(u32))));
+        const frame = try ws_client.receiveBorrowed() orelse continue;
+        defer ws_client.release();
+        try settle(allocator, slots.items, base, &in_flight, frame);
+    }
+
+    if (failed > 0) {
+        logger.err("Batch finished: {d} of {d} requests failed.", .{ failed, base + slots.items.len });
+        return error.RequestFailed;
+    }
+}
+
+/// Longest accepted input line.
+const max_line_bytes = 4 * 1024 * 1024;
+
+fn startCommand(
+    allocator: std.mem.Allocator,
+    ws_client: *websocket_client.WebSocketClient,
+    slot: *Slot,
+    line: []const u8,
+    line_no: usize,
+    timeout_ms: u64,
+) !void {
+    const parsed = std.json.parseFromSlice(Command, allocator, line, .{ .ignore_unknown_fields = true }) catch |err| {
+        slot.* = .{ .tag = try std.fmt.allocPrint(allocator, "{d}", .{line_no}) };
+        slot.line = try formatError(allocator, slot.tag, "INVALID_COMMAND", @errorName(err));
+        return;
+    };
+    defer parsed.deinit();
+
+    const tag = if (parsed.value.id) |id|
+        try std.json.Stringify.valueAlloc(allocator, id, .{})
+    else
+        try std.fmt.allocPrint(allocator, "{d}", .{line_no});
+    slot.* = .{ .tag = tag };
+    errdefer allocator.free(tag);
+
+    const request = if (parsed.value.params) |params|
+        try requests.buildRequestPayload(allocator, parsed.value.method, params)
+    else
+        try requests.buildRequestPayload(allocator, parsed.value.method, EmptyParams{});
+    defer allocator.free(request.payload);
+    errdefer allocator.free(request.id);
+
+    try ws_client.send(request.payload);
+    slot.request_id = request.id;
+    slot.deadline_ms = std.time.milliTimestamp() + @as(i64, @intCast(timeout_ms));
+}
+
+/// Completes the slot `frame` answers, if any. Anything else is ignored.
+fn settle(
+    allocator: std.mem.Allocator,
+    slots: []Slot,
+    base: usize,
+    in_flight: *std.StringHashMapUnmanaged(usize),
+    frame: []const u8,
+) !void {
+    const parsed = std.json.parseFromSlice(gateway.GatewayResponseFrame, allocator, frame, .{ .ignore_unknown_fields = true }) catch return;
+    defer parsed.deinit();
+    if (!std.mem.eql(u8, parsed.value.type, "res")) return;
+    const entry = in_flight.fetchRemove(parsed.value.id) orelse return;
+
+    const slot = &slots[entry.value - base];
+    slot.line = try formatResult(allocator, slot.tag, .{
+        .ok = parsed.value.ok,
+        .payload = parsed.value.payload,
+        .@"error" = parsed.value.@"error",
+    });
+    allocator.free(slot.request_id.?);
+    slot.request_id = null;
+}
+
+fn expire(
+    allocator: std.mem.Allocator,
+    slots: []Slot,
+    base: usize,
+    in_flight: *std.StringHashMapUnmanaged(usize),
+    now: i64,
+) !void {
+    var it = in_flight.iterator();
+    while (it.next()) |entry| {
+        const slot = &slots[entry.value_ptr.* - base];
+        if (slot.deadline_ms > now) continue;
+        slot.line = try formatError(allocator, slot.tag, "TIMEOUT", "no response before the deadline");
+        in_flight.removeByPtr(entry.key_ptr);
+        allocator.free(slot.request_id.?);
+        slot.request_id = null;
+        // Removal invalidates the iterator; the caller loops until nothing is due.
+        return;
+    }
+}
+
+fn formatError(allocator: std.mem.Allocator, tag: []const u8, code: []const u8, message: []const u8) ![]u8 {
+    return formatResult(allocator, tag, .{ .ok = false, .@"error" = .{ .code = code, .message = message } });
+}
+
+fn formatResult(allocator: std.mem.Allocator, tag: []const u8, result: Result) ![]u8 {
+    const body = try std.json.Stringify.valueAlloc(allocator, result, .{ .emit_null_optional_fields = false });
+    defer allocator.free(body);
+    // body is `{"ok":...}`; splice the tag in as the first field.
+    return std.fmt.allocPrint(allocator, "{{\"id\":{s},{s}", .{ tag, body[1..] });
+}
+
+fn isOkLine(tag: []const u8, line: []const u8) bool {
+    const prefix_len = "{\"id\":".len + tag.len + 1;
+    return std.mem.startsWith(u8, line[prefix_len..], "\"ok\":true");
+}
+
+fn freeSlot(allocator: std.mem.Allocator, slot: Slot) void {
+    allocator.free(slot.tag);
+    if (slot.request_id) |id| allocator.free(id);
+    if (slot.line) |line| allocator.free(line);
+}
+
+test "batch result lines carry the caller's id first" {
+    const allocator = std.testing.allocator;
+
+    const ok_line = try formatResult(allocator, "\"s1\"", .{ .ok = true, .payload = .{ .integer = 3 } });
+    defer allocator.free(ok_line);
+    try std.testing.expectEqualStrings("{\"id\":\"s1\",\"ok\":true,\"payload\":3}", ok_line);
+    try std.testing.expect(isOkLine("\"s1\"", ok_line));
+
+    const err_line = try formatError(allocator, "7", "TIMEOUT", "no response before the deadline");
+    defer allocator.free(err_line);
+    try std.testing.expectEqualStrings(
+        "{\"id\":7,\"ok\":false,\"error\":{\"code\":\"TIMEOUT\",\"message\":\"no response before the deadline\"}}",
+        err_line,
+    );
+    try std.testing.expect(!isOkLine("7", err_line));
+}
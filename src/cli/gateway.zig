@@ -2,11 +2,14 @@ const std = @import("std");
 const websocket_client = @import("../openclaw_transport.zig").websocket;
 const ziggy = @import("ziggy-core");
 const logger = ziggy.utils.logger;
+const requests = ziggy.protocol.requests;
+const gateway = ziggy.protocol.gateway;
 
 pub const GatewayVerb = enum {
     ping,
     echo,
     probe,
+    bench,
     unknown,
 };
 
@@ -14,6 +17,7 @@ pub fn parseVerb(verb: []const u8) GatewayVerb {
     if (std.mem.eql(u8, verb, "ping")) return .ping;
     if (std.mem.eql(u8, verb, "echo")) return .echo;
     if (std.mem.eql(u8, verb, "probe")) return .probe;
+    if (std.mem.eql(u8, verb, "bench")) return .bench;
     return .unknown;
 }
 
@@ -22,10 +26,13 @@ pub fn printHelp(writer: anytype) !void {
         "  gateway ping <url>    Test WebSocket connectivity (handshake only)\n" ++
         "  gateway echo <url>    Full echo test: connect, send, verify response\n" ++
         "  gateway probe <url>   Probe for OpenClaw protocol compatibility\n" ++
+        "  gateway bench <url>   Load test: N connections driving a request mix at a target rate\n" ++
+        "                        (--bench-connections, --bench-rate, --bench-duration-s, --bench-mix)\n" ++
         "\n" ++
         "Examples:\n" ++
         "  gateway ping ws://127.0.0.1:18790\n" ++
-        "  gateway echo ws://127.0.0.1:18790/v1/agents/test/stream\n");
+        "  gateway echo ws://127.0.0.1:18790/v1/agents/test/stream\n" ++
+        "  gateway bench ws://127.0.0.1:18789 --bench-connections 16 --bench-rate 200 --bench-mix sessions.list=3,chat.send=1\n");
 }
 
 pub fn run(
@@ -36,14 +43,16 @@ pub fn run(
     agent_id: []const u8,
     timeout_ms: u32,
     insecure_tls: bool,
+    bench_options: BenchOptions,
     writer: anytype,
 ) !void {
     switch (verb) {
         .ping => try ping(allocator, url, auth_token, timeout_ms, insecure_tls, writer),
         .echo => try echo(allocator, url, auth_token, agent_id, timeout_ms, insecure_tls, writer),
         .probe => try probe(allocator, url, auth_token, agent_id, timeout_ms, insecure_tls, writer),
+        .bench => try bench(allocator, url, auth_token, timeout_ms, insecure_tls, bench_options, writer),
         .unknown => {
-            try writer.writeAll("Unknown gateway verb. Use: ping, echo, or probe\n");
+            try writer.writeAll("Unknown gateway verb. Use: ping, echo, probe, or bench\n");
             return error.InvalidArguments;
         },
     }
@@ -331,3 +340,367 @@ fn probe(
         return error.IncompatibleGateway;
     }
 }
+
+pub const BenchOptions = struct {
+    connections: usize = 4,
+    /// Target requests per second across all connections.
+    rate: u32 = 50,
+    duration_s: u32 = 10,
+    /// Weighted methods, e.g. "sessions.list=3,chat.send=1"; null uses `default_bench_mix`.
+    mix: ?[]const u8 = null,
+    /// Target of chat.send requests in the mix.
+    session_key: ?[]const u8 = null,
+};
+
+/// Read-only: chat.send posts real messages and starts agent runs, so it only
+/// runs when named in the mix.
+pub const default_bench_mix = "sessions.list=1,node.list=1";
+
+const BenchMethod = enum {
+    sessions_list,
+    node_list,
+    chat_send,
+
+    fn wireName(self: BenchMethod) []const u8 {
+        return switch (self) {
+            .sessions_list => "sessions.list",
+            .node_list => "node.list",
+            .chat_send => "chat.send",
+        };
+    }
+
+    fn parse(name: []const u8) ?BenchMethod {
+        inline for (std.meta.fields(BenchMethod)) |field| {
+            const method: BenchMethod = @enumFromInt(field.value);
+            if (std.mem.eql(u8, name, method.wireName())) return method;
+        }
+        return null;
+    }
+};
+
+const bench_method_count = std.meta.fields(BenchMethod).len;
+
+/// Expands "a=2,b=1" into the round-robin schedule a,a,b.
+fn parseBenchMix(allocator: std.mem.Allocator, spec: []const u8) ![]BenchMethod {
+    var schedule: std.ArrayList(BenchMethod) = .empty;
+    errdefer schedule.deinit(allocator);
+    var terms = std.mem.tokenizeScalar(u8, spec, ',');
+    while (terms.next()) |term| {
+        const eq = std.mem.indexOfScalar(u8, term, '=');
+        const name = std.mem.trim(u8, if (eq) |i| term[0..i] else term, " ");
+        const weight = if (eq) |i| try std.fmt.parseInt(u32, std.mem.trim(u8, term[i + 1 ..], " "), 10) else 1;
+        const method = BenchMethod.parse(name) orelse {
+            logger.err("Unknown bench method: {s} (use sessions.list, node.list, chat.send)", .{name});
+            return error.InvalidArguments;
+        };
+        try schedule.appendNTimes(allocator, method, weight);
+    }
+    if (schedule.items.len == 0) return error.InvalidArguments;
+    return schedule.toOwnedSlice(allocator);
+}
+
+/// Per-connection measurements, in nanoseconds.
+const BenchWorker = struct {
+    allocator: std.mem.Allocator,
+    url: []const u8,
+    auth_token: []const u8,
+    insecure_tls: bool,
+    timeout_ms: u32,
+    schedule: []const BenchMethod,
+    /// This connection's share of the target rate.
+    interval_ns: u64,
+    duration_ns: u64,
+    session_key: []const u8,
+    /// Where this connection starts in the schedule, so connections spread the mix.
+    schedule_offset: usize,
+
+    connect_ns: ?u64 = null,
+    handshake_ns: ?u64 = null,
+    latencies: [bench_method_count]std.ArrayList(u64) = [_]std.ArrayList(u64){.empty} ** bench_method_count,
+    sent: u64 = 0,
+    /// From the start of the load phase to the last send: longer than the
+    /// duration when the worker fell behind its schedule.
+    send_span_ns: u64 = 0,
+    /// Worst delay between a request's scheduled and actual send.
+    max_send_lag_ns: u64 = 0,
+    failed: u64 = 0,
+    /// Sent but never answered: past the drain deadline or lost with the connection.
+    unanswered: u64 = 0,
+    err: ?anyerror = null,
+
+    fn deinit(self: *BenchWorker) void {
+        for (&self.latencies) |*list| list.deinit(self.allocator);
+    }
+
+    fn thread(self: *BenchWorker) void {
+        self.drive() catch |err| {
+            self.err = err;
+        };
+    }
+
+    /// `scheduled_ns` is when the open-loop schedule wanted the request sent.
+    /// Latency counts from there, not from the actual send, so time the worker
+    /// spent behind schedule (coordinated omission) shows up in the percentiles.
+    const InFlight = struct { method: BenchMethod, scheduled_ns: i128 };
+
+    fn drive(self: *BenchWorker) !void {
+        var client = websocket_client.WebSocketClient.init(self.allocator, self.url, self.auth_token, self.insecure_tls, null);
+        defer client.deinit();
+        client.setConnectProfile(.{
+            .role = "operator",
+            .scopes = &.{ "operator.admin", "operator.approvals", "operator.pairing" },
+            .client_id = "cli",
+            .client_mode = "cli",
+        });
+        // Short reads keep the connect-challenge grace window and the send schedule on time.
+        client.setReadTimeout(bench_tick_ms);
+
+        const t0 = std.time.nanoTimestamp();
+        try client.connect();
+        defer client.disconnect();
+        self.connect_ns = @intCast(std.time.nanoTimestamp() - t0);
+
+        const handshake_deadline = t0 + @as(i128, self.timeout_ms) * std.time.ns_per_ms;
+        while (self.handshake_ns == null) {
+            if (std.time.nanoTimestamp() >= handshake_deadline) return error.HandshakeTimeout;
+            const frame = try client.receiveBorrowed() orelse continue;
+            defer client.release();
+            if (isHelloOk(self.allocator, frame)) self.handshake_ns = @intCast(std.time.nanoTimestamp() - t0);
+        }
+
+        var in_flight: std.StringHashMapUnmanaged(InFlight) = .empty;
+        defer {
+            var it = in_flight.keyIterator();
+            while (it.next()) |key| self.allocator.free(key.*);
+            in_flight.deinit(self.allocator);
+        }
+        errdefer self.unanswered += in_flight.count();
+
+        const start = std.time.nanoTimestamp();
+        const stop_sending = start + self.duration_ns;
+        const drain_deadline = stop_sending + @as(i128, self.timeout_ms) * std.time.ns_per_ms;
+        var next_send = start;
+        var slot = self.schedule_offset;
+        while (true) {
+            const now = std.time.nanoTimestamp();
+            // Open loop: send on schedule whether or not earlier requests have been answered.
+            while (next_send <= now and next_send < stop_sending) : (next_send += self.interval_ns) {
+                const method = self.schedule[slot % self.schedule.len];
+                slot += 1;
+                const id = try self.sendRequest(&client, method);
+                errdefer self.allocator.free(id);
+                try in_flight.put(self.allocator, id, .{ .method = method, .scheduled_ns = next_send });
+                self.sent += 1;
+                const sent_at = std.time.nanoTimestamp();
+                self.send_span_ns = @intCast(sent_at - start);
+                self.max_send_lag_ns = @max(self.max_send_lag_ns, @as(u64, @intCast(sent_at - next_send)));
+            }
+            if (now >= stop_sending and in_flight.count() == 0) break;
+            if (now >= drain_deadline) {
+                self.unanswered += in_flight.count();
+                break;
+            }
+
+            const frame = try client.receiveBorrowed() orelse continue;
+            defer client.release();
+            const parsed = std.json.parseFromSlice(gateway.GatewayResponseFrame, self.allocator, frame, .{ .ignore_unknown_fields = true }) catch continue;
+            defer parsed.deinit();
+            if (!std.mem.eql(u8, parsed.value.type, "res")) continue;
+            const entry = in_flight.fetchRemove(parsed.value.id) orelse continue;
+            defer self.allocator.free(entry.key);
+
+            if (!parsed.value.ok) self.failed += 1;
+            const latency: u64 = @intCast(std.time.nanoTimestamp() - entry.value.scheduled_ns);
+            try self.latencies[@intFromEnum(entry.value.method)].append(self.allocator, latency);
+        }
+    }
+
+    fn sendRequest(self: *BenchWorker, client: *websocket_client.WebSocketClient, method: BenchMethod) ![]u8 {
+        const request = switch (method) {
+            .sessions_list, .node_list => try requests.buildRequestPayload(self.allocator, method.wireName(), .{}),
+            .chat_send => blk: {
+                const idempotency_key = try requests.makeRequestId(self.allocator);
+                defer self.allocator.free(idempotency_key);
+                break :blk try requests.buildRequestPayload(self.allocator, "chat.send", .{
+                    .sessionKey = self.session_key,
+                    .message = "ziggystarclaw gateway bench",
+                    .idempotencyKey = idempotency_key,
+                });
+            },
+        };
+        defer self.allocator.free(request.payload);
+        errdefer self.allocator.free(request.id);
+        try client.send(request.payload);
+        return request.id;
+    }
+};
+
+const bench_tick_ms: u32 = 5;
+
+fn isHelloOk(allocator: std.mem.Allocator, frame: []const u8) bool {
+    if (std.mem.indexOf(u8, frame, "hello-ok") == null) return false;
+    const parsed = std.json.parseFromSlice(gateway.GatewayResponseFrame, allocator, frame, .{ .ignore_unknown_fields = true }) catch return false;
+    defer parsed.deinit();
+    const payload = parsed.value.payload orelse return false;
+    if (payload != .object) return false;
+    const kind = payload.object.get("type") orelse return false;
+    return parsed.value.ok and kind == .string and std.mem.eql(u8, kind.string, "hello-ok");
+}
+
+fn bench(
+    allocator: std.mem.Allocator,
+    url: []const u8,
+    auth_token: []const u8,
+    timeout_ms: u32,
+    insecure_tls: bool,
+    options: BenchOptions,
+    writer: anytype,
+) !void {
+    const mix = options.mix orelse default_bench_mix;
+    const schedule = try parseBenchMix(allocator, mix);
+    defer allocator.free(schedule);
+    const uses_chat = std.mem.indexOfScalar(BenchMethod, schedule, .chat_send) != null;
+    if (uses_chat and options.session_key == null) {
+        logger.err("The bench mix includes chat.send; pass --session <key> (or set a default session).", .{});
+        return error.InvalidArguments;
+    }
+    const connections = @max(options.connections, 1);
+    const rate = @max(options.rate, 1);
+
+    try writer.print("Benchmarking {s}: {d} connection(s), {d} req/s for {d}s, mix {s}\n", .{ url, connections, rate, options.duration_s, mix });
+
+    const workers = try allocator.alloc(BenchWorker, connections);
+    defer allocator.free(workers);
+    const threads = try allocator.alloc(std.Thread, connections);
+    defer allocator.free(threads);
+
+    for (workers, 0..) |*worker, i| {
+        worker.* = .{
+            .allocator = allocator,
+            .url = url,
+            .auth_token = auth_token,
+            .insecure_tls = insecure_tls,
+            .timeout_ms = timeout_ms,
+            .schedule = schedule,
+            .interval_ns = std.time.ns_per_s * connections / rate,
+            .duration_ns = @as(u64, options.duration_s) * std.time.ns_per_s,
+            .session_key = options.session_key orelse "",
+            .schedule_offset = i,
+        };
+    }
+    defer for (workers) |*worker| worker.deinit();
+
+    const wall_start = std.time.nanoTimestamp();
+    {
+        var spawned: usize = 0;
+        defer for (threads[0..spawned]) |t| t.join();
+        for (workers, threads) |*worker, *t| {
+            t.* = try std.Thread.spawn(.{}, BenchWorker.thread, .{worker});
+            spawned += 1;
+        }
+    }
+    const wall_ns: u64 = @intCast(std.time.nanoTimestamp() - wall_start);
+
+    try reportBench(allocator, workers, wall_ns, rate, options.duration_s, writer);
+}
+
+fn reportBench(allocator: std.mem.Allocator, workers: []BenchWorker, wall_ns: u64, target_rate: u32, duration_s: u32, writer: anytype) !void {
+    var connect: std.ArrayList(u64) = .empty;
+    defer connect.deinit(allocator);
+    var handshake: std.ArrayList(u64) = .empty;
+    defer handshake.deinit(allocator);
+    var per_method: [bench_method_count]std.ArrayList(u64) = [_]std.ArrayList(u64){.empty} ** bench_method_count;
+    defer for (&per_method) |*list| list.deinit(allocator);
+    var all: std.ArrayList(u64) = .empty;
+    defer all.deinit(allocator);
+
+    var sent: u64 = 0;
+    var failed: u64 = 0;
+    var unanswered: u64 = 0;
+    var send_span_ns: u64 = @as(u64, duration_s) * std.time.ns_per_s;
+    var max_send_lag_ns: u64 = 0;
+    var broken: usize = 0;
+    for (workers) |*worker| {
+        if (worker.connect_ns) |ns| try connect.append(allocator, ns);
+        if (worker.handshake_ns) |ns| try handshake.append(allocator, ns);
+        for (worker.latencies, 0..) |list, i| {
+            try per_method[i].appendSlice(allocator, list.items);
+            try all.appendSlice(allocator, list.items);
+        }
+        sent += worker.sent;
+        failed += worker.failed;
+        unanswered += worker.unanswered;
+        send_span_ns = @max(send_span_ns, worker.send_span_ns);
+        max_send_lag_ns = @max(max_send_lag_ns, worker.max_send_lag_ns);
+        if (worker.err) |err| {
+            broken += 1;
+            logger.warn("Bench connection failed: {s}", .{@errorName(err)});
+        }
+    }
+
+    try writer.print("\nConnections: {d} ok, {d} failed\n", .{ workers.len - broken, broken });
+    // Latencies count from each request's scheduled send time.
+    try writer.writeAll("                     count      p50 ms      p90 ms      p99 ms      max ms\n");
+    try writeLatencyRow(writer, "connect", connect.items);
+    try writeLatencyRow(writer, "handshake", handshake.items);
+    for (&per_method, 0..) |*list, i| {
+        if (list.items.len == 0) continue;
+        const method: BenchMethod = @enumFromInt(i);
+        try writeLatencyRow(writer, method.wireName(), list.items);
+    }
+    try writeLatencyRow(writer, "all requests", all.items);
+
+    const wall_s = @as(f64, @floatFromInt(wall_ns)) / std.time.ns_per_s;
+    const answered = all.items.len;
+    try writer.print("\nRequests: {d} sent, {d} answered, {d} failed, {d} unanswered\n", .{ sent, answered, failed, unanswered });
+    try writer.print("Throughput: {d:.1} answers/s over {d:.2}s\n", .{ @as(f64, @floatFromInt(answered)) / wall_s, wall_s });
+    // A send rate below target means the bench client itself was saturated.
+    const send_span_s = @max(@as(f64, @floatFromInt(send_span_ns)) / std.time.ns_per_s, 0.001);
+    try writer.print("Send rate: {d:.1} req/s achieved of {d} target (max send lag {d:.3} ms)\n", .{
+        @as(f64, @floatFromInt(sent)) / send_span_s,
+        target_rate,
+        nsToMs(max_send_lag_ns),
+    });
+    if (broken > 0 or unanswered > 0) return error.BenchIncomplete;
+}
+
+/// Sorts `samples` in place and prints count, p50/p90/p99 and max in ms.
+fn writeLatencyRow(writer: anytype, label: []const u8, samples: []u64) !void {
+    if (samples.len == 0) {
+        try writer.print("{s: <18} {d: >7}\n", .{ label, 0 });
+        return;
+    }
+    std.mem.sort(u64, samples, {}, std.sort.asc(u64));
+    try writer.print("{s: <18} {d: >7} {d: >11.3} {d: >11.3} {d: >11.3} {d: >11.3}\n", .{
+        label,
+        samples.len,
+        nsToMs(percentile(samples, 0.50)),
+        nsToMs(percentile(samples, 0.90)),
+        nsToMs(percentile(samples, 0.99)),
+        nsToMs(samples[samples.len - 1]),
+    });
+}
+
+/// Nearest-rank percentile of already-sorted samples.
+fn percentile(sorted: []const u64, q: f64) u64 {
+    const rank: usize = @intFromFloat(@ceil(q * @as(f64, @floatFromInt(sorted.len))));
+    return sorted[@min(@max(rank, 1), sorted.len) - 1];
+}
+
+fn nsToMs(ns: u64) f64 {
+    return @as(f64, @floatFromInt(ns)) / std.time.ns_per_ms;
+}
+
+test "bench mix expands weights and percentiles use nearest rank" {
+    const allocator = std.testing.allocator;
+    const schedule = try parseBenchMix(allocator, "sessions.list=2, chat.send");
+    defer allocator.free(schedule);
+    try std.testing.expectEqualSlices(BenchMethod, &.{ .sessions_list, .sessions_list, .chat_send }, schedule);
+    try std.testing.expectError(error.InvalidArguments, parseBenchMix(allocator, "bogus=1"));
+
+    var samples: [100]u64 = undefined;
+    for (&samples, 0..) |*s, i| s.* = i + 1;
+    try std.testing.expectEqual(@as(u64, 50), percentile(&samples, 0.50));
+    try std.testing.expectEqual(@as(u64, 99), percentile(&samples, 0.99));
+    try std.testing.expectEqual(@as(u64, 1), percentile(samples[0..1], 0.90));
+}
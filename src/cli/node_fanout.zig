@@ -0,0 +1,236 @@
+const std = @import("std");
+const websocket_client = @import("../openclaw_transport.zig").websocket;
+const ziggy = @import("ziggy-core");
+const logger = ziggy.utils.logger;
+const gateway = ziggy.protocol.gateway;
+const requests = ziggy.protocol.requests;
+const nodes_proto = @import("../protocol/nodes.zig");
+
+/// The node fields a selector looks at.
+pub const Target = struct {
+    id: []const u8,
+    display_name: ?[]const u8 = null,
+    platform: ?[]const u8 = null,
+    connected: ?bool = null,
+};
+
+/// Which nodes a fan-out reaches: a comma-separated union of terms.
+///
+///   all              every connected node
+///   platform:<name>  connected nodes on that platform (case-insensitive)
+///   name:<glob>      connected nodes whose display name matches (`*`, `?`)
+///   <id>             that node id
+pub const Selector = struct {
+    spec: []const u8,
+
+    pub fn matches(self: Selector, node: Target) bool {
+        var terms = std.mem.tokenizeScalar(u8, self.spec, ',');
+        while (terms.next()) |raw| {
+            const term = std.mem.trim(u8, raw, " ");
+            if (std.mem.eql(u8, term, node.id)) return true;
+            // Disconnected nodes are only reached by naming them.
+            if (node.connected == false) continue;
+            if (std.mem.eql(u8, term, "all")) return true;
+            if (std.mem.startsWith(u8, term, "platform:")) {
+                const platform = node.platform orelse continue;
+                if (std.ascii.eqlIgnoreCase(platform, term["platform:".len..])) return true;
+            } else if (std.mem.startsWith(u8, term, "name:")) {
+                const name = node.display_name orelse continue;
+                if (globMatch(term["name:".len..], name)) return true;
+            }
+        }
+        return false;
+    }
+};
+
+pub const Options = struct {
+    /// node.invoke requests in flight at once.
+    parallel: usize = 8,
+    /// Per-node deadline, counted from when its request was sent.
+    timeout_ms: u64 = 60_000,
+};
+
+/// One JSONL line per node, written as each answer lands.
+const Line = struct {
+    nodeId: []const u8,
+    displayName: ?[]const u8 = null,
+    ok: bool,
+    latencyMs: i64,
+    payload: ?std.json.Value = null,
+    @"error": ?gateway.GatewayError = null,
+};
+
+const Pending = struct {
+    target: Target,
+    started_ms: i64,
+};
+
+/// Invokes `command` on every target, at most `options.parallel` at a time,
+/// over the one connection. Results stream to `out` in completion order.
+/// Returns error.RequestFailed when any node failed or timed out.
+pub fn run(
+    allocator: std.mem.Allocator,
+    ws_client: *websocket_client.WebSocketClient,
+    targets: []const Target,
+    command: []const u8,
+    params: ?std.json.Value,
+    out: anytype,
+    options: Options,
+) !void {
+    var in_flight: std.StringHashMapUnmanaged(Pending) = .empty;
+    defer {
+        var it = in_flight.keyIterator();
+        while (it.next()) |key| allocator.free(key.*);
+        in_flight.deinit(allocator);
+    }
+
+    const saved_timeout_ms = ws_client.read_timeout_ms;
+    defer ws_client.setReadTimeout(saved_timeout_ms);
+
+    var next: usize = 0;
+    var failed: usize = 0;
+    while (next < targets.len or in_flight.count() > 0) {
+        while (next < targets.len and in_flight.count() < @max(options.parallel, 1)) : (next += 1) {
+            const request_id = try sendInvoke(allocator, ws_client, targets[next], command, params);
+            errdefer allocator.free(request_id);
+            try in_flight.put(allocator, request_id, .{ .target = targets[next], .started_ms = std.time.milliTimestamp() });
+        }
+
+        const now = std.time.milliTimestamp();
+        var oldest: i64 = now;
+        var it = in_flight.valueIterator();
+        while (it.next()) |pending| oldest = @min(oldest, pending.started_ms);
+        const deadline = oldest + @as(i64, @intCast(options.timeout_ms));
+        if (deadline <= now) {
+            failed += try expireOne(allocator, &in_flight, now, options.timeout_ms, out);
+            continue;
+        }
+        if (!ws_client.is_connected) return error.NotConnected;
+
+        ws_client.setReadTimeout(@intCast(@min(deadline - now, std.math.maxInt(u32))));
+        const frame = try ws_client.receiveBorrowed() orelse continue;
+        defer ws_client.release();
+
+        const parsed = std.json.parseFromSlice(gateway.GatewayResponseFrame, allocator, frame, .{ .ignore_unknown_fields = true }) catch continue;
+        defer parsed.deinit();
+        if (!std.mem.eql(u8, parsed.value.type, "res")) continue;
+        const entry = in_flight.fetchRemove(parsed.value.id) orelse continue;
+        defer allocator.free(entry.key);
+
+        if (!parsed.value.ok) failed += 1;
+        try writeLine(out, .{
+            .nodeId = entry.value.target.id,
+            .displayName = entry.value.target.display_name,
+            .ok = parsed.value.ok,
+            .latencyMs = std.time.milliTimestamp() - entry.value.started_ms,
+            .payload = parsed.value.payload,
+            .@"error" = parsed.value.@"error",
+        });
+    }
+
+    logger.info("Fan-out of {s} finished: {d} node(s), {d} failed.", .{ command, targets.len, failed });
+    if (failed > 0) return error.RequestFailed;
+}
+
+fn sendInvoke(
+    allocator: std.mem.Allocator,
+    ws_client: *websocket_client.WebSocketClient,
+    target: Target,
+    command: []const u8,
+    params: ?std.json.Value,
+) ![]u8 {
+    const idempotency_key = try requests.makeRequestId(allocator);
+    defer allocator.free(idempotency_key);
+
+    const request = try requests.buildRequestPayload(allocator, "node.invoke", nodes_proto.NodeInvokeParams{
+        .nodeId = target.id,
+        .command = command,
+        .params = params,
+        .idempotencyKey = idempotency_key,
+    });
+    defer allocator.free(request.payload);
+    errdefer allocator.free(request.id);
+
+    try ws_client.send(request.payload);
+    return request.id;
+}
+
+/// Reports one overdue node as timed out. Removing invalidates the iterator,
+/// so the caller loops until nothing is due.
+fn expireOne(
+    allocator: std.mem.Allocator,
+    in_flight: *std.StringHashMapUnmanaged(Pending),
+    now: i64,
+    timeout_ms: u64,
+    out: anytype,
+) !usize {
+    var it = in_flight.iterator();
+    while (it.next()) |entry| {
+        const pending = entry.value_ptr.*;
+        if (pending.started_ms + @as(i64, @intCast(timeout_ms)) > now) continue;
+        const key = entry.key_ptr.*;
+        in_flight.removeByPtr(entry.key_ptr);
+        allocator.free(key);
+        try writeLine(out, .{
+            .nodeId = pending.target.id,
+            .displayName = pending.target.display_name,
+            .ok = false,
+            .latencyMs = now - pending.started_ms,
+            .@"error" = .{ .code = "TIMEOUT", .message = "no response before the deadline" },
+        });
+        return 1;
+    }
+    return 0;
+}
+
+fn writeLine(out: anytype, line: Line) !void {
+    try out.print("{f}\n", .{std.json.fmt(line, .{ .emit_null_optional_fields = false })});
+}
+
+/// `*` matches any run of characters, `?` any one character.
+fn globMatch(pattern: []const u8, text: []const u8) bool {
+    var p: usize = 0;
+    var t: usize = 0;
+    var star: ?usize = null;
+    var star_t: usize = 0;
+    while (t < text.len) {
+        if (p < pattern.len and (pattern[p] == '?' or pattern[p] == text[t])) {
+            p += 1;
+            t += 1;
+        } else if (p < pattern.len and pattern[p] == '*') {
+            star = p;
+            star_t = t;
+            p += 1;
+        } else if (star) |s| {
+            // Let the last `*` absorb one more character and retry.
+            p = s + 1;
+            star_t += 1;
+            t = star_t;
+        } else {
+            return false;
+        }
+    }
+    while (p < pattern.len and pattern[p] == '*') p += 1;
+    return p == pattern.len;
+}
+
+test "fan-out selector matches ids, platforms and display-name globs" {
+    const mac = Target{ .id = "n1", .display_name = "build-mac-01", .platform = "macos", .connected = true };
+    const win = Target{ .id = "n2", .display_name = "build-win-01", .platform = "Windows", .connected = true };
+    const gone = Target{ .id = "n3", .display_name = "build-mac-02", .platform = "macos", .connected = false };
+
+    const all = Selector{ .spec = "all" };
+    try std.testing.expect(all.matches(mac) and all.matches(win) and !all.matches(gone));
+
+    const windows = Selector{ .spec = "platform:windows" };
+    try std.testing.expect(windows.matches(win) and !windows.matches(mac));
+
+    const macs = Selector{ .spec = "name:build-mac-*" };
+    try std.testing.expect(macs.matches(mac) and !macs.matches(win) and !macs.matches(gone));
+
+    const listed = Selector{ .spec = "n2, n3" };
+    try std.testing.expect(listed.matches(win) and listed.matches(gone) and !listed.matches(mac));
+
+    try std.testing.expect(globMatch("*-0?", "build-win-01"));
+    try std.testing.expect(!globMatch("build-*-02", "build-win-01"));
+}
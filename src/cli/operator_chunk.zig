@@ -15,6 +15,18 @@ const requests = ziggy.protocol.requests;
 const ws_auth_pairing = @import("../protocol/ws_auth_pairing.zig");
 const build_options = @import("build_options");
 const gateway_cmd = @import("gateway.zig");
+const Correlator = @import("request_correlator.zig").Correlator;
+const batch = @import("batch.zig");
+const node_fanout = @import("node_fanout.zig");
+const operator_daemon = @import("operator_daemon.zig");
+const pairing_watch = @import("pairing_watch.zig");
+
+/// How long to wait for the node list before validating a node id.
+const node_list_timeout_ms: u64 = 15_000;
+/// How long to wait for a node.invoke answer.
+const node_result_timeout_ms: u64 = 60_000;
+/// How long to wait for the gateway to acknowledge a send or an approval decision.
+const ack_timeout_ms: u64 = 10_000;
 
 pub const Options = struct {
     config_path: []const u8,
@@ -56,9 +68,20 @@ pub const Options = struct {
     check_update_only: bool,
     print_update_url: bool,
     interactive: bool,
+    /// JSONL request file for batch mode ("-" for stdin).
+    batch_input: ?[]const u8,
+    /// Node selector for fan-out of the node command (see node_fanout.Selector).
+    fanout_selector: ?[]const u8,
+    fanout_parallel: usize,
+    /// Run as the local connection-sharing daemon.
+    daemon: bool,
+    /// Never forward through the daemon; always connect directly.
+    no_daemon: bool,
     save_config: bool,
     gateway_verb: ?[]const u8,
     gateway_url: ?[]const u8,
+    /// Load shape for `--gateway-test bench`.
+    gateway_bench: gateway_cmd.BenchOptions,
     profile_name: ?[]const u8,
 };
 
@@ -130,6 +153,9 @@ pub fn run(allocator: std.mem.Allocator, options: Options) !void {
     const check_update_only = options.check_update_only;
     const print_update_url = options.print_update_url;
     const interactive = options.interactive;
+    const batch_input = options.batch_input;
+    const fanout_selector = options.fanout_selector;
+    const daemon = options.daemon;
     const save_config = options.save_config;
     const gateway_verb = options.gateway_verb;
     const gateway_url = options.gateway_url;
@@ -144,7 +170,7 @@ pub fn run(allocator: std.mem.Allocator, options: Options) !void {
 
         const verb = gateway_cmd.parseVerb(verb_str);
         if (verb == .unknown) {
-            logger.err("Unknown gateway verb: {s}. Use: ping, echo, or probe", .{verb_str});
+            logger.err("Unknown gateway verb: {s}. Use: ping, echo, probe, or bench", .{verb_str});
             const stdout = std.fs.File.stdout().deprecatedWriter();
             try gateway_cmd.printHelp(stdout);
             return error.InvalidArguments;
@@ -195,8 +221,11 @@ pub fn run(allocator: std.mem.Allocator, options: Options) !void {
             break :blk standalone_cfg.insecure_tls;
         };
 
+        var bench_options = options.gateway_bench;
+        bench_options.session_key = session_key orelse standalone_cfg.default_session;
+
         var stdout = std.fs.File.stdout().deprecatedWriter();
-        gateway_cmd.run(allocator, verb, url, standalone_token, agent_id, read_timeout_ms, standalone_insecure_tls, &stdout) catch |err| {
+        gateway_cmd.run(allocator, verb, url, standalone_token, agent_id, read_timeout_ms, standalone_insecure_tls, bench_options, &stdout) catch |err| {
             logger.err("Gateway test failed: {s}", .{@errorName(err)});
             return err;
         };
@@ -339,7 +368,8 @@ pub fn run(allocator: std.mem.Allocator, options: Options) !void {
         poll_process_id != null or stop_process_id != null or canvas_present or canvas_hide or
         canvas_navigate != null or canvas_eval != null or canvas_snapshot != null or exec_approvals_get or
         exec_allow_cmd != null or exec_allow_file != null or approve_id != null or deny_id != null or
-        device_pair_list or device_pair_approve_id != null or device_pair_reject_id != null or device_pair_watch or interactive;
+        device_pair_list or device_pair_approve_id != null or device_pair_reject_id != null or device_pair_watch or interactive or
+        batch_input != null or daemon;
     if (requires_connection and cfg.server_url.len == 0) {
         logger.err("Server URL is empty. Use --url or set it in {s}.", .{config_path});
         return error.InvalidArguments;
@@ -350,8 +380,13 @@ pub fn run(allocator: std.mem.Allocator, options: Options) !void {
         canvas_hide or canvas_navigate != null or canvas_eval != null or canvas_snapshot != null or
         exec_approvals_get or exec_allow_cmd != null or exec_allow_file != null;
 
+    if (fanout_selector != null and !needs_node) {
+        logger.err("--fanout needs a node command (e.g. `nodes run <command>`).", .{});
+        return error.InvalidArguments;
+    }
+
     // Allow node commands with default node; only error if neither is provided.
-    if (needs_node and node_id == null and cfg.default_node == null) {
+    if (needs_node and node_id == null and cfg.default_node == null and fanout_selector == null) {
         logger.err("No node specified. Use --node or set a default via `nodes use <id> --save-config`.", .{});
         return error.InvalidArguments;
     }
@@ -374,7 +409,7 @@ pub fn run(allocator: std.mem.Allocator, options: Options) !void {
     }
 
     // Handle --save-config without connecting
-    if (save_config and !check_update_only and !list_sessions and !list_nodes and !list_approvals and send_message == null and run_command == null and approve_id == null and deny_id == null and !device_pair_list and device_pair_approve_id == null and device_pair_reject_id == null and !device_pair_watch and !interactive) {
+    if (save_config and !check_update_only and !list_sessions and !list_nodes and !list_approvals and send_message == null and run_command == null and approve_id == null and deny_id == null and !device_pair_list and device_pair_approve_id == null and device_pair_reject_id == null and !device_pair_watch and !interactive and batch_input == null and !daemon) {
         try config.save(allocator, config_path, cfg);
         logger.info("Config saved to {s}", .{config_path});
         return;
@@ -407,6 +442,10 @@ pub fn run(allocator: std.mem.Allocator, options: Options) !void {
         return;
     }
 
+    if (operator_daemon.supported and !daemon and !options.no_daemon and isForwardable(options)) {
+        if (try forwardThroughDaemon(allocator, options, cfg, config_path)) return;
+    }
+
     var ws_client = websocket_client.WebSocketClient.init(
         allocator,
         cfg.server_url,
@@ -439,13 +478,13 @@ pub fn run(allocator: std.mem.Allocator, options: Options) !void {
             return error.NotConnected;
         }
 
-        const payload = ws_client.receive() catch |err| {
+        const payload = ws_client.receiveBorrowed() catch |err| {
             logger.err("WebSocket receive failed: {s}", .{@errorName(err)});
             ws_client.disconnect();
             return err;
         };
         if (payload) |text| {
-            defer allocator.free(text);
+            defer ws_client.release();
             const update = event_handler.handleRawMessage(&ctx, text) catch |err| blk: {
                 logger.warn("Error handling message: {s}", .{@errorName(err)});
                 break :blk null;
@@ -497,6 +536,8 @@ pub fn run(allocator: std.mem.Allocator, options: Options) !void {
                 if (device_pair_reject_id != null) break;
                 if (device_pair_watch) break;
                 if (interactive) break;
+                if (batch_input != null) break;
+                if (daemon) break;
                 if (!list_sessions and !list_nodes and !list_approvals and send_message == null and run_command == null and which_name == null and notify_title == null and !ps_list and spawn_command == null and poll_process_id == null and stop_process_id == null and !canvas_present and !canvas_hide and canvas_navigate == null and canvas_eval == null and canvas_snapshot == null and approve_id == null and deny_id == null and !device_pair_list and device_pair_approve_id == null and device_pair_reject_id == null and !device_pair_watch and !interactive) break;
             }
         } else {
@@ -509,33 +550,28 @@ pub fn run(allocator: std.mem.Allocator, options: Options) !void {
         return error.ConnectionTimeout;
     }
 
-    if (device_pair_watch) {
+    if (daemon) {
+        const socket_path = try operator_daemon.socketPath(allocator, config_path);
+        defer allocator.free(socket_path);
+        try operator_daemon.serve(allocator, &ws_client, &ctx, socket_path);
+        return;
+    }
+
+    if (batch_input) |path| {
+        const use_stdin = std.mem.eql(u8, path, "-");
+        const input = if (use_stdin) std.fs.File.stdin() else std.fs.cwd().openFile(path, .{}) catch |err| {
+            logger.err("Failed to open batch file {s}: {s}", .{ path, @errorName(err) });
+            return err;
+        };
+        defer if (!use_stdin) input.close();
+
         var stdout = std.fs.File.stdout().deprecatedWriter();
-        while (ws_client.is_connected) {
-            const msg = ws_client.receive() catch |err| {
-                logger.warn("pairing watch recv failed: {s}", .{@errorName(err)});
-                break;
-            };
-            if (msg) |payload| {
-                defer allocator.free(payload);
+        try batch.run(allocator, &ws_client, input, &stdout, .{});
+        return;
+    }
 
-                var parsed = std.json.parseFromSlice(std.json.Value, allocator, payload, .{}) catch {
-                    continue;
-                };
-                defer parsed.deinit();
-                if (parsed.value != .object) continue;
-                const t = parsed.value.object.get("type") orelse continue;
-                if (t != .string or !std.mem.eql(u8, t.string, "event")) continue;
-                const ev = parsed.value.object.get("event") orelse continue;
-                if (ev != .string) continue;
-                if (std.mem.startsWith(u8, ev.string, "device.pair.")) {
-                    try stdout.writeAll(payload);
-                    try stdout.writeByte('\n');
-                }
-            } else {
-                std.Thread.sleep(100 * std.time.ns_per_ms);
-            }
-        }
+    if (device_pair_watch) {
+        try watchDevicePairings(allocator, &ws_client, &ctx);
         return;
     }
 
@@ -650,8 +686,7 @@ pub fn run(allocator: std.mem.Allocator, options: Options) !void {
             break :blk ctx.sessions.items[0].key;
         };
 
-        try sendChatMessage(allocator, &ws_client, target_session, message);
-        std.Thread.sleep(500 * std.time.ns_per_ms);
+        try sendChatMessage(allocator, &ws_client, &ctx, target_session, message);
         logger.info("Message sent successfully.", .{});
 
         if (save_config) {
@@ -670,21 +705,24 @@ pub fn run(allocator: std.mem.Allocator, options: Options) !void {
                 logger.warn("node.list request failed: {s}", .{@errorName(err)});
             };
         }
-        var wait_attempts: u32 = 0;
-        while (wait_attempts < 150 and ctx.nodes.items.len == 0) : (wait_attempts += 1) {
-            const payload = ws_client.receive() catch |err| {
-                logger.err("WebSocket receive failed: {s}", .{@errorName(err)});
-                break;
-            };
-            if (payload) |text| {
-                defer allocator.free(text);
-                _ = event_handler.handleRawMessage(&ctx, text) catch {};
-            } else {
-                std.Thread.sleep(50 * std.time.ns_per_ms);
+        if (ctx.pending_nodes_request_id) |pending| {
+            // Handling the answer clears the pending id, so wait on a copy.
+            const request_id = try allocator.dupe(u8, pending);
+            defer allocator.free(request_id);
+            var correlator = Correlator{ .allocator = allocator, .ws_client = &ws_client, .ctx = &ctx };
+            if (correlator.waitFor(request_id, node_list_timeout_ms)) |frame| {
+                allocator.free(frame);
+            } else |err| {
+                logger.warn("node.list wait failed: {s}", .{@errorName(err)});
             }
         }
     }
 
+    if (fanout_selector) |spec| {
+        try runFanout(allocator, &ws_client, &ctx, options, spec);
+        return;
+    }
+
     if (target_node != null) {
         // Verify node exists for any node action.
         var node_exists = false;
@@ -848,8 +886,7 @@ pub fn run(allocator: std.mem.Allocator, options: Options) !void {
 
     // Handle --approve
     if (approve_id) |id| {
-        try resolveApproval(allocator, &ws_client, id, "approve");
-        std.Thread.sleep(500 * std.time.ns_per_ms);
+        try resolveApproval(allocator, &ws_client, &ctx, id, "approve");
         logger.info("Approval {s} approved.", .{id});
 
         if (save_config) {
@@ -861,8 +898,7 @@ pub fn run(allocator: std.mem.Allocator, options: Options) !void {
 
     // Handle --deny
     if (deny_id) |id| {
-        try resolveApproval(allocator, &ws_client, id, "deny");
-        std.Thread.sleep(500 * std.time.ns_per_ms);
+        try resolveApproval(allocator, &ws_client, &ctx, id, "deny");
         logger.info("Approval {s} denied.", .{id});
 
         if (save_config) {
@@ -891,13 +927,13 @@ pub fn run(allocator: std.mem.Allocator, options: Options) !void {
             break;
         }
 
-        const payload = ws_client.receive() catch |err| {
+        const payload = ws_client.receiveBorrowed() catch |err| {
             logger.err("WebSocket receive failed: {s}", .{@errorName(err)});
             ws_client.disconnect();
             break;
         };
         if (payload) |text| {
-            defer allocator.free(text);
+            defer ws_client.release();
             logger.info("recv: {s}", .{text});
             const update = event_handler.handleRawMessage(&ctx, text) catch |err| blk: {
                 logger.warn("Error handling message: {s}", .{@errorName(err)});
@@ -995,7 +1031,10 @@ fn runRepl(
                     }
                     break :blk ctx.sessions.items[0].key;
                 };
-                try sendChatMessage(allocator, ws_client, target_session, message);
+                sendChatMessage(allocator, ws_client, ctx, target_session, message) catch |err| {
+                    try stdout.print("Send failed: {s}\n", .{@errorName(err)});
+                    continue;
+                };
                 try stdout.writeAll("Message sent.\n");
             },
             .session => {
@@ -1221,7 +1260,10 @@ fn runRepl(
                     try stdout.writeAll("Usage: approve <id>\n");
                     continue;
                 }
-                try resolveApproval(allocator, ws_client, id, "approve");
+                resolveApproval(allocator, ws_client, ctx, id, "approve") catch |err| {
+                    try stdout.print("Approve failed: {s}\n", .{@errorName(err)});
+                    continue;
+                };
                 try stdout.writeAll("Approval sent.\n");
             },
             .deny => {
@@ -1230,7 +1272,10 @@ fn runRepl(
                     try stdout.writeAll("Usage: deny <id>\n");
                     continue;
                 }
-                try resolveApproval(allocator, ws_client, id, "deny");
+                resolveApproval(allocator, ws_client, ctx, id, "deny") catch |err| {
+                    try stdout.print("Deny failed: {s}\n", .{@errorName(err)});
+                    continue;
+                };
                 try stdout.writeAll("Denial sent.\n");
             },
             .device, .devices => {
@@ -1404,7 +1449,8 @@ fn runRepl(
                     }
                 }
 
-                gateway_cmd.run(allocator, verb, url, cfg.token, agent_id, read_timeout_ms, cfg.insecure_tls, stdout) catch |err| {
+                const bench_options: gateway_cmd.BenchOptions = .{ .session_key = current_session orelse cfg.default_session };
+                gateway_cmd.run(allocator, verb, url, cfg.token, agent_id, read_timeout_ms, cfg.insecure_tls, bench_options, stdout) catch |err| {
                     try stdout.print("Gateway test failed: {s}\n", .{@errorName(err)});
                     continue;
                 };
@@ -1444,12 +1490,12 @@ fn runRepl(
 
         var processed = false;
         while (!processed) {
-            const payload = ws_client.receive() catch |err| {
+            const payload = ws_client.receiveBorrowed() catch |err| {
                 logger.err("WebSocket receive failed: {s}", .{@errorName(err)});
                 break;
             };
             if (payload) |text| {
-                defer allocator.free(text);
+                defer ws_client.release();
                 _ = event_handler.handleRawMessage(ctx, text) catch |err| blk: {
                     logger.warn("Error handling message: {s}", .{@errorName(err)});
                     break :blk null;
@@ -1504,37 +1550,19 @@ fn requestAndAwaitJsonPayloadText(
 
     try ws_client.send(request.payload);
 
-    const deadline = std.time.milliTimestamp() + @as(i64, @intCast(timeout_ms));
-    while (ws_client.is_connected and std.time.milliTimestamp() < deadline) {
-        const msg = ws_client.receive() catch |err| {
-            logger.err("WebSocket receive failed while waiting for {s}: {s}", .{ method, @errorName(err) });
-            return err;
-        };
-        if (msg) |payload| {
-            defer allocator.free(payload);
-
-            var parsed = std.json.parseFromSlice(std.json.Value, allocator, payload, .{}) catch {
-                continue;
-            };
-            defer parsed.deinit();
-
-            const frame = parsed.value;
-            if (frame != .object) continue;
-            const t = frame.object.get("type") orelse continue;
-            if (t != .string or !std.mem.eql(u8, t.string, "res")) continue;
-
-            const idv = frame.object.get("id") orelse continue;
-            if (idv != .string or !std.mem.eql(u8, idv.string, request.id)) continue;
+    var correlator = Correlator{ .allocator = allocator, .ws_client = ws_client };
+    const raw = correlator.waitFor(request.id, timeout_ms) catch |err| {
+        logger.err("No answer to {s}: {s}", .{ method, @errorName(err) });
+        return err;
+    };
+    defer allocator.free(raw);
 
-            if (frame.object.get("payload")) |pv| {
-                return std.json.Stringify.valueAlloc(allocator, pv, .{ .whitespace = .indent_2 });
-            }
-            return std.json.Stringify.valueAlloc(allocator, frame, .{ .whitespace = .indent_2 });
-        }
-        std.Thread.sleep(20 * std.time.ns_per_ms);
+    var parsed = try std.json.parseFromSlice(std.json.Value, allocator, raw, .{});
+    defer parsed.deinit();
+    if (parsed.value.object.get("payload")) |pv| {
+        return std.json.Stringify.valueAlloc(allocator, pv, .{ .whitespace = .indent_2 });
     }
-
-    return error.Timeout;
+    return std.json.Stringify.valueAlloc(allocator, parsed.value, .{ .whitespace = .indent_2 });
 }
 
 fn requestSessionsList(
@@ -1571,9 +1599,11 @@ fn requestNodesList(
     ctx.setPendingNodesRequest(request.id);
 }
 
+/// Sends and waits for the gateway to accept the message (not for the reply).
 fn sendChatMessage(
     allocator: std.mem.Allocator,
     ws_client: *websocket_client.WebSocketClient,
+    ctx: *client_state.ClientContext,
     target_session: []const u8,
     message: []const u8,
 ) !void {
@@ -1594,6 +1624,8 @@ fn sendChatMessage(
 
     logger.info("Sending message to session {s}: {s}", .{ target_session, message });
     try ws_client.send(request.payload);
+    var correlator = Correlator{ .allocator = allocator, .ws_client = ws_client, .ctx = ctx };
+    try correlator.expectOk(request.id, ack_timeout_ms);
 }
 
 fn parseCommandLineArgs(allocator: std.mem.Allocator, cmdline: []const u8) !std.ArrayList([]u8) {
@@ -1714,26 +1746,234 @@ fn invokeNode(
     try ws_client.send(request.payload);
 }
 
+/// True when the requested action is one `forwardThroughDaemon` can handle:
+/// batch mode, message send, approve/deny, or a node command for one node.
+/// Anything that reads or saves local state, or overrides the connection
+/// (--url, --token, --insecure-tls, --zsc-profile), always connects directly:
+/// the daemon would run it under its own gateway and credentials.
+fn isForwardable(options: Options) bool {
+    if (options.override_url != null or options.profile_name != null or options.save_config) return false;
+    if (options.override_token != null or options.override_token_set or options.override_insecure != null) return false;
+    if (options.list_sessions or options.list_nodes or options.list_approvals or options.interactive) return false;
+    if (options.device_pair_list or options.device_pair_approve_id != null or
+        options.device_pair_reject_id != null or options.device_pair_watch) return false;
+    if (options.exec_approvals_get or options.exec_allow_cmd != null or options.exec_allow_file != null) return false;
+    if (options.canvas_snapshot != null or options.fanout_selector != null) return false;
+    return true;
+}
+
+/// The daemon's request line: the `--batch` input format.
+fn DaemonRequest(comptime Params: type) type {
+    return struct {
+        id: u32 = 1,
+        method: []const u8,
+        params: Params,
+    };
+}
+
+/// What the daemon answers with: the `--batch` result format.
+const DaemonResult = struct {
+    ok: bool,
+    payload: ?std.json.Value = null,
+    @"error": ?ziggy.protocol.gateway.GatewayError = null,
+};
+
+/// Runs the action through a local daemon. Returns false, having done
+/// nothing, when no daemon is running or the action needs local state (e.g.
+/// no session given and no default to fall back on).
+fn forwardThroughDaemon(allocator: std.mem.Allocator, options: Options, cfg: config.Config, config_path: []const u8) !bool {
+    var arena_state = std.heap.ArenaAllocator.init(allocator);
+    defer arena_state.deinit();
+    const arena = arena_state.allocator();
+    const json_options: std.json.Stringify.Options = .{ .emit_null_optional_fields = false };
+
+    const socket_path = try operator_daemon.socketPath(arena, config_path);
+
+    if (options.batch_input) |path| {
+        const use_stdin = std.mem.eql(u8, path, "-");
+        const input = if (use_stdin) std.fs.File.stdin() else try std.fs.cwd().openFile(path, .{});
+        defer if (!use_stdin) input.close();
+        const lines = try input.readToEndAlloc(arena, 64 * 1024 * 1024);
+
+        const results = try operator_daemon.forward(arena, socket_path, lines) orelse {
+            if (use_stdin) {
+                // stdin is consumed; a direct connection would see no requests.
+                logger.err("Operator daemon is not running and batch input from stdin cannot be replayed.", .{});
+                return error.NotConnected;
+            }
+            return false;
+        };
+        try std.fs.File.stdout().writeAll(results);
+
+        var failed: usize = 0;
+        var it = std.mem.tokenizeScalar(u8, results, '\n');
+        while (it.next()) |line| {
+            const parsed = std.json.parseFromSliceLeaky(DaemonResult, arena, line, .{ .ignore_unknown_fields = true }) catch {
+                failed += 1;
+                continue;
+            };
+            if (!parsed.ok) failed += 1;
+        }
+        if (failed > 0) return error.RequestFailed;
+        return true;
+    }
+
+    var line: []const u8 = undefined;
+    if (options.send_message) |message| {
+        const target_session = options.session_key orelse cfg.default_session orelse return false;
+        line = try std.json.Stringify.valueAlloc(arena, DaemonRequest(chat.ChatSendParams){
+            .method = "chat.send",
+            .params = .{
+                .sessionKey = target_session,
+                .message = message,
+                .idempotencyKey = try requests.makeRequestId(arena),
+            },
+        }, json_options);
+    } else if (try fanoutAction(arena, options)) |action| {
+        const target_node = options.node_id orelse cfg.default_node orelse return false;
+        line = try std.json.Stringify.valueAlloc(arena, DaemonRequest(nodes_proto.NodeInvokeParams){
+            .method = "node.invoke",
+            .params = .{
+                .nodeId = target_node,
+                .command = action.command,
+                .params = action.params,
+                .idempotencyKey = try requests.makeRequestId(arena),
+            },
+        }, json_options);
+    } else if (options.approve_id orelse options.deny_id) |approval_id| {
+        line = try std.json.Stringify.valueAlloc(arena, DaemonRequest(approvals_proto.ExecApprovalResolveParams){
+            .method = "exec.approval.resolve",
+            .params = .{
+                .id = approval_id,
+                .decision = if (options.approve_id != null) "approve" else "deny",
+            },
+        }, json_options);
+    } else {
+        return false;
+    }
+
+    const results = try operator_daemon.forward(arena, socket_path, try std.mem.concat(arena, u8, &.{ line, "\n" })) orelse return false;
+    logger.debug("Forwarded through the operator daemon at {s}", .{socket_path});
+
+    const result = std.json.parseFromSliceLeaky(DaemonResult, arena, std.mem.trim(u8, results, " \r\n"), .{ .ignore_unknown_fields = true }) catch {
+        logger.err("Unreadable answer from the operator daemon: {s}", .{results});
+        return error.InvalidResponse;
+    };
+    if (!result.ok) {
+        if (result.@"error") |err| {
+            logger.err("Gateway request failed ({s}): {s}", .{ err.code, err.message });
+        }
+        return error.RequestFailed;
+    }
+
+    if (options.send_message != null) {
+        logger.info("Message sent successfully.", .{});
+    } else if (options.approve_id) |id| {
+        logger.info("Approval {s} approved.", .{id});
+    } else if (options.deny_id) |id| {
+        logger.info("Approval {s} denied.", .{id});
+    } else {
+        const payload = result.payload orelse std.json.Value.null;
+        try printNodeResult(allocator, try std.json.Stringify.valueAlloc(arena, payload, .{}));
+    }
+    return true;
+}
+
+const NodeAction = struct {
+    command: []const u8,
+    params: ?std.json.Value = null,
+};
+
+/// The node.invoke a fan-out sends, built in `arena`. Null for node actions
+/// that only make sense against one node (canvas snapshot, allowlist edits).
+fn fanoutAction(arena: std.mem.Allocator, options: Options) !?NodeAction {
+    if (options.run_command) |command| {
+        var params = std.json.ObjectMap.init(arena);
+        try params.put("command", .{ .array = try buildJsonCommandArray(arena, command) });
+        return .{ .command = "system.run", .params = .{ .object = params } };
+    }
+    if (options.spawn_command) |command| {
+        var params = std.json.ObjectMap.init(arena);
+        try params.put("command", .{ .array = try buildJsonCommandArray(arena, command) });
+        return .{ .command = "process.spawn", .params = .{ .object = params } };
+    }
+    const StringParam = struct { value: ?[]const u8, command: []const u8, key: []const u8 };
+    const string_params = [_]StringParam{
+        .{ .value = options.which_name, .command = "system.which", .key = "name" },
+        .{ .value = options.notify_title, .command = "system.notify", .key = "title" },
+        .{ .value = options.poll_process_id, .command = "process.poll", .key = "processId" },
+        .{ .value = options.stop_process_id, .command = "process.stop", .key = "processId" },
+        .{ .value = options.canvas_navigate, .command = "canvas.navigate", .key = "url" },
+        .{ .value = options.canvas_eval, .command = "canvas.eval", .key = "js" },
+    };
+    for (string_params) |sp| {
+        const value = sp.value orelse continue;
+        var params = std.json.ObjectMap.init(arena);
+        try params.put(sp.key, .{ .string = value });
+        return .{ .command = sp.command, .params = .{ .object = params } };
+    }
+    if (options.ps_list) return .{ .command = "process.list" };
+    if (options.canvas_present) return .{ .command = "canvas.present" };
+    if (options.canvas_hide) return .{ .command = "canvas.hide" };
+    return null;
+}
+
+fn runFanout(
+    allocator: std.mem.Allocator,
+    ws_client: *websocket_client.WebSocketClient,
+    ctx: *client_state.ClientContext,
+    options: Options,
+    spec: []const u8,
+) !void {
+    var arena_state = std.heap.ArenaAllocator.init(allocator);
+    defer arena_state.deinit();
+    const arena = arena_state.allocator();
+
+    const action = try fanoutAction(arena, options) orelse {
+        logger.err("This node command cannot be fanned out; target one node with --node.", .{});
+        return error.InvalidArguments;
+    };
+
+    const selector = node_fanout.Selector{ .spec = spec };
+    var targets: std.ArrayList(node_fanout.Target) = .empty;
+    for (ctx.nodes.items) |node| {
+        const target = node_fanout.Target{
+            .id = node.id,
+            .display_name = node.display_name,
+            .platform = node.platform,
+            .connected = node.connected,
+        };
+        if (selector.matches(target)) try targets.append(arena, target);
+    }
+    if (targets.items.len == 0) {
+        logger.err("No nodes match '{s}'. Use `nodes list` to see available nodes.", .{spec});
+        return error.NodeNotFound;
+    }
+
+    logger.info("Invoking {s} on {d} node(s).", .{ action.command, targets.items.len });
+    var stdout = std.fs.File.stdout().deprecatedWriter();
+    try node_fanout.run(allocator, ws_client, targets.items, action.command, action.params, &stdout, .{
+        .parallel = options.fanout_parallel,
+        .timeout_ms = node_result_timeout_ms,
+    });
+}
+
 fn awaitNodeResultOwned(
     allocator: std.mem.Allocator,
     ws_client: *websocket_client.WebSocketClient,
     ctx: *client_state.ClientContext,
 ) !?[]u8 {
-    // Wait for result
-    var wait_attempts: u32 = 0;
-    while (wait_attempts < 150 and ctx.node_result == null) : (wait_attempts += 1) {
-        const payload = ws_client.receive() catch |err| {
-            logger.err("WebSocket receive failed: {s}", .{@errorName(err)});
-            break;
-        };
-        if (payload) |text| {
-            defer allocator.free(text);
-            _ = event_handler.handleRawMessage(ctx, text) catch |err| blk: {
-                logger.warn("Error handling message: {s}", .{@errorName(err)});
-                break :blk null;
-            };
-        } else {
-            std.Thread.sleep(100 * std.time.ns_per_ms);
+    // The answer is routed through event_handler, which stores it in ctx.node_result.
+    if (ctx.node_result == null) {
+        if (ctx.pending_node_invoke_request_id) |pending| {
+            const request_id = try allocator.dupe(u8, pending);
+            defer allocator.free(request_id);
+            var correlator = Correlator{ .allocator = allocator, .ws_client = ws_client, .ctx = ctx };
+            if (correlator.waitFor(request_id, node_result_timeout_ms)) |frame| {
+                allocator.free(frame);
+            } else |err| {
+                if (err != error.Timeout) logger.err("WebSocket receive failed: {s}", .{@errorName(err)});
+            }
         }
     }
 
@@ -1965,6 +2205,7 @@ fn runNodeCommand(
 fn resolveApproval(
     allocator: std.mem.Allocator,
     ws_client: *websocket_client.WebSocketClient,
+    ctx: *client_state.ClientContext,
     approval_id: []const u8,
     decision: []const u8,
 ) !void {
@@ -1981,6 +2222,8 @@ fn resolveApproval(
 
     logger.info("Resolving approval {s} with decision: {s}", .{ approval_id, decision });
     try ws_client.send(request.payload);
+    var correlator = Correlator{ .allocator = allocator, .ws_client = ws_client, .ctx = ctx };
+    try correlator.expectOk(request.id, ack_timeout_ms);
 }
 
 fn parseBool(value: []const u8) bool {
@@ -2020,10 +2263,7 @@ fn watchDevicePairings(
     ws_client: *websocket_client.WebSocketClient,
     ctx: *client_state.ClientContext,
 ) !void {
-    _ = allocator;
-    _ = ws_client;
-    _ = ctx;
+    logger.info("Watching for device pairings (NDJSON on stdout, Ctrl+C to stop)", .{});
     var stdout = std.fs.File.stdout().deprecatedWriter();
-    try stdout.writeAll("Watching for device pairings... (press Ctrl+C to stop)\n");
-    // TODO: Implement actual watch functionality
+    try pairing_watch.run(allocator, ws_client, ctx, &stdout);
 }
@@ -0,0 +1,211 @@
+const std = @import("std");
+const builtin = @import("builtin");
+const zui = @import("ziggy-ui");
+const client_state = zui.client.state;
+const websocket_client = @import("../openclaw_transport.zig").websocket;
+const ziggy = @import("ziggy-core");
+const logger = ziggy.utils.logger;
+const batch = @import("batch.zig");
+const Correlator = @import("request_correlator.zig").Correlator;
+
+/// Local agent that keeps one authenticated operator connection warm so short
+/// CLI runs skip the gateway handshake.
+///
+/// It listens on a Unix socket next to the config file and speaks the
+/// `--batch` JSONL protocol: a client writes request lines, shuts down its
+/// write side, and reads one result line per request. Clients are served one
+/// at a time over the shared connection; a client that stalls for
+/// `client_io_timeout_ms` is dropped.
+///
+/// Any client gets a full operator session, so the socket is owner-only
+/// (0600) and, on Linux, connections from other users are refused.
+pub const supported = std.net.has_unix_sockets and builtin.os.tag != .windows;
+
+/// `<dir of config_path>/ziggystarclaw-operator-<config basename>.sock`.
+/// The basename keeps configs that share a directory (prod.json, staging.json)
+/// from sharing a daemon, and with it a gateway and credentials.
+pub fn socketPath(allocator: std.mem.Allocator, config_path: []const u8) ![]u8 {
+    const dir = std.fs.path.dirname(config_path) orelse ".";
+    const name = try std.fmt.allocPrint(allocator, "ziggystarclaw-operator-{s}.sock", .{std.fs.path.basename(config_path)});
+    defer allocator.free(name);
+    return std.fs.path.join(allocator, &.{ dir, name });
+}
+
+/// Serves clients until the process is stopped. Reconnects to the gateway
+/// when the connection drops.
+pub fn serve(
+    allocator: std.mem.Allocator,
+    ws_client: *websocket_client.WebSocketClient,
+    ctx: *client_state.ClientContext,
+    socket_path: []const u8,
+) !void {
+    if (comptime !supported) return error.Unsupported;
+
+    try removeStaleSocket(socket_path);
+    const address = try std.net.Address.initUnix(socket_path);
+    var server = try address.listen(.{});
+    defer {
+        server.deinit();
+        std.fs.cwd().deleteFile(socket_path) catch {};
+    }
+    try std.posix.fchmodat(std.fs.cwd().fd, socket_path, 0o600, 0);
+    logger.info("Operator daemon listening on {s}", .{socket_path});
+
+    var correlator = Correlator{ .allocator = allocator, .ws_client = ws_client, .ctx = ctx };
+    while (true) {
+        if (!ws_client.is_connected) {
+            correlator.reconnect(handshake_timeout_ms) catch |err| {
+                logger.warn("Gateway reconnect failed: {s}", .{@errorName(err)});
+                std.Thread.sleep(2 * std.time.ns_per_s);
+                continue;
+            };
+            logger.info("Operator daemon reconnected to the gateway.", .{});
+        }
+
+        const gateway_fd = ws_client.socketHandle() orelse {
+            ws_client.disconnect();
+            continue;
+        };
+        // Wait on clients and the gateway together: an operator connection
+        // carries ticks, presence and every node's health frames, and they
+        // must be read as fast as they arrive or pings queue behind them.
+        var fds = [_]std.posix.pollfd{
+            .{ .fd = server.stream.handle, .events = std.posix.POLL.IN, .revents = 0 },
+            .{ .fd = gateway_fd, .events = std.posix.POLL.IN, .revents = 0 },
+        };
+        _ = try std.posix.poll(&fds, idle_poll_ms);
+        // Also drain on a quiet tick: TLS can hold decrypted frames the socket
+        // no longer reports as readable.
+        if (fds[1].revents != 0 or fds[0].revents == 0) drainGateway(ws_client, ctx, &correlator);
+        if (fds[0].revents == 0) continue;
+        if (!ws_client.is_connected) continue;
+
+        const conn = server.accept() catch |err| {
+            logger.warn("Operator daemon accept failed: {s}", .{@errorName(err)});
+            continue;
+        };
+        defer conn.stream.close();
+        if (!peerIsOwner(conn.stream.handle)) {
+            logger.warn("Operator daemon refused a client owned by another user.", .{});
+            continue;
+        }
+        // A client that stalls must not hold the shared connection: its reads
+        // and writes fail after the timeout and it is dropped.
+        setClientTimeouts(conn.stream.handle) catch |err| {
+            logger.warn("Operator daemon could not set client timeouts: {s}", .{@errorName(err)});
+            continue;
+        };
+
+        const io = std.fs.File{ .handle = conn.stream.handle };
+        var out = io.deprecatedWriter();
+        batch.run(allocator, ws_client, io, &out, .{}) catch |err| switch (err) {
+            error.RequestFailed => {},
+            else => logger.warn("Operator daemon client failed: {s}", .{@errorName(err)}),
+        };
+    }
+}
+
+/// A leftover socket from a daemon that did not exit cleanly blocks bind, so
+/// it is removed; but only when nothing answers on it, and only if it is a
+/// socket. A live daemon's socket is left alone.
+fn removeStaleSocket(socket_path: []const u8) !void {
+    const stat = std.fs.cwd().statFile(socket_path) catch |err| switch (err) {
+        error.FileNotFound => return,
+        else => return err,
+    };
+    if (stat.kind != .unix_domain_socket) {
+        logger.err("{s} exists and is not a socket; not replacing it.", .{socket_path});
+        return error.PathAlreadyExists;
+    }
+    if (std.net.connectUnixSocket(socket_path)) |probe| {
+        probe.close();
+        logger.err("An operator daemon is already running on {s}.", .{socket_path});
+        return error.DaemonAlreadyRunning;
+    } else |err| switch (err) {
+        error.ConnectionRefused => {},
+        else => return err,
+    }
+    try std.fs.cwd().deleteFile(socket_path);
+}
+
+const idle_poll_ms = 250;
+/// Gateway frames read per wake, at most, so a flood cannot starve clients.
+const max_frames_per_drain = 512;
+const client_io_timeout_ms = 5_000;
+
+fn setClientTimeouts(handle: std.posix.socket_t) !void {
+    const timeout = std.mem.toBytes(std.posix.timeval{
+        .sec = @intCast(@divTrunc(client_io_timeout_ms, 1000)),
+        .usec = @intCast(@mod(client_io_timeout_ms, 1000) * 1000),
+    });
+    try std.posix.setsockopt(handle, std.posix.SOL.SOCKET, std.posix.SO.RCVTIMEO, &timeout);
+    try std.posix.setsockopt(handle, std.posix.SOL.SOCKET, std.posix.SO.SNDTIMEO, &timeout);
+}
+
+/// True when the peer runs as this process's user. Only Linux can ask
+/// (SO_PEERCRED); elsewhere the socket's 0600 mode is the guard.
+fn peerIsOwner(handle: std.posix.socket_t) bool {
+    if (comptime builtin.os.tag != .linux) return true;
+    var cred: std.os.linux.ucred = undefined;
+    std.posix.getsockopt(handle, std.posix.SOL.SOCKET, std.posix.SO.PEERCRED, std.mem.asBytes(&cred)) catch return false;
+    return cred.uid == std.os.linux.getuid();
+}
+
+/// Reads gateway frames until none is pending (or the per-wake cap), so
+/// events never back up between clients and pings are answered promptly.
+fn drainGateway(
+    ws_client: *websocket_client.WebSocketClient,
+    ctx: *client_state.ClientContext,
+    correlator: *Correlator,
+) void {
+    const saved_timeout_ms = ws_client.read_timeout_ms;
+    defer ws_client.setReadTimeout(saved_timeout_ms);
+    ws_client.setReadTimeout(1);
+
+    var frames: usize = 0;
+    while (frames < max_frames_per_drain and ws_client.is_connected) : (frames += 1) {
+        const frame = (ws_client.receiveBorrowed() catch |err| {
+            logger.warn("Gateway receive failed: {s}", .{@errorName(err)});
+            ws_client.disconnect();
+            return;
+        }) orelse return;
+        defer ws_client.release();
+        correlator.dispatch(ctx, frame);
+    }
+}
+
+const handshake_timeout_ms = 10_000;
+
+/// Sends `lines` (JSONL requests) to a running daemon and returns its result
+/// lines, or null when no daemon is listening (the caller then connects
+/// directly).
+pub fn forward(allocator: std.mem.Allocator, socket_path: []const u8, lines: []const u8) !?[]u8 {
+    if (comptime !supported) return null;
+
+    // Whatever stops the connect (no socket, a stale one, a path too long for
+    // sun_path, no permission), there is no daemon to use.
+    const stream = std.net.connectUnixSocket(socket_path) catch |err| {
+        logger.debug("No operator daemon at {s}: {s}", .{ socket_path, @errorName(err) });
+        return null;
+    };
+    defer stream.close();
+
+    try stream.writeAll(lines);
+    try std.posix.shutdown(stream.handle, .send);
+
+    const io = std.fs.File{ .handle = stream.handle };
+    return try io.readToEndAlloc(allocator, max_response_bytes);
+}
+
+const max_response_bytes = 64 * 1024 * 1024;
+
+test "daemon socket lives next to the config file" {
+    const allocator = std.testing.allocator;
+    const nested = try socketPath(allocator, "/home/me/.config/ziggystarclaw/config.json");
+    defer allocator.free(nested);
+    try std.testing.expectEqualStrings("/home/me/.config/ziggystarclaw/ziggystarclaw-operator-config.json.sock", nested);
+
+    const bare = try socketPath(allocator, "ziggystarclaw_config.json");
+    defer allocator.free(bare);
+    try std.testing.expectEqualStrings("./ziggystarclaw-operator-ziggystarclaw_config.json.sock", bare);
+}
@@ -0,0 +1,241 @@
+const std = @import("std");
+const zui = @import("ziggy-ui");
+const client_state = zui.client.state;
+const websocket_client = @import("../openclaw_transport.zig").websocket;
+const ziggy = @import("ziggy-core");
+const logger = ziggy.utils.logger;
+const gateway = ziggy.protocol.gateway;
+const requests = ziggy.protocol.requests;
+const request_correlator = @import("request_correlator.zig");
+const Correlator = request_correlator.Correlator;
+
+/// One NDJSON line per pairing event.
+///
+///   {"event":"device.pair.requested","ts":1700000000000,"payload":{"requestId":"...",...}}
+///
+/// `resync` marks lines recovered from `device.pair.list` after a reconnect:
+/// requests made, or resolved, while the watch was disconnected.
+const Line = struct {
+    event: []const u8,
+    ts: i64,
+    resync: ?bool = null,
+    payload: ?std.json.Value = null,
+};
+
+const backoff_initial_ms: u64 = 500;
+const backoff_max_ms: u64 = 30_000;
+const handshake_timeout_ms: u64 = 10_000;
+const idle_read_timeout_ms: u32 = 30_000;
+
+/// Streams `device.pair.*` events to `out` until the process is stopped.
+///
+/// On a dropped connection it reconnects with exponential backoff, then
+/// re-reads the pending list so nothing requested or resolved in the gap is
+/// missed; requests already reported are not repeated.
+pub fn run(
+    allocator: std.mem.Allocator,
+    ws_client: *websocket_client.WebSocketClient,
+    ctx: *client_state.ClientContext,
+    out: anytype,
+) !void {
+    var watch = Watch{ .allocator = allocator };
+    defer watch.deinit();
+
+    var correlator = Correlator{ .allocator = allocator, .ws_client = ws_client, .ctx = ctx };
+    var backoff_ms = backoff_initial_ms;
+    var synced = false;
+    const saved_timeout_ms = ws_client.read_timeout_ms;
+    defer ws_client.setReadTimeout(saved_timeout_ms);
+    while (true) {
+        if (!ws_client.is_connected) {
+            logger.info("Pairing watch reconnecting in {d}ms", .{backoff_ms});
+            std.Thread.sleep(backoff_ms * std.time.ns_per_ms);
+            correlator.reconnect(handshake_timeout_ms) catch |err| {
+                logger.warn("Pairing watch reconnect failed: {s}", .{@errorName(err)});
+                backoff_ms = @min(backoff_ms * 2, backoff_max_ms);
+                continue;
+            };
+            backoff_ms = backoff_initial_ms;
+            synced = false;
+        }
+        if (!synced) {
+            // Also covers the first pass: requests already pending when the watch starts.
+            watch.requestList(ws_client) catch |err| {
+                logger.warn("device.pair.list failed: {s}", .{@errorName(err)});
+                ws_client.disconnect();
+                continue;
+            };
+            synced = true;
+        }
+
+        // Idle connections are normal here; a read timeout just loops.
+        ws_client.setReadTimeout(idle_read_timeout_ms);
+        const frame = ws_client.receiveBorrowed() catch |err| {
+            logger.warn("Pairing watch receive failed: {s}", .{@errorName(err)});
+            ws_client.disconnect();
+            continue;
+        } orelse continue;
+        defer ws_client.release();
+        try watch.handleFrame(frame, out);
+    }
+}
+
+const Watch = struct {
+    allocator: std.mem.Allocator,
+    /// Request ids reported as requested and not yet resolved.
+    pending: std.StringHashMapUnmanaged(void) = .empty,
+    /// The outstanding `device.pair.list`; its answer arrives among the events.
+    list_request_id: ?[]u8 = null,
+
+    fn deinit(self: *Watch) void {
+        var it = self.pending.keyIterator();
+        while (it.next()) |key| self.allocator.free(key.*);
+        self.pending.deinit(self.allocator);
+        if (self.list_request_id) |id| self.allocator.free(id);
+    }
+
+    fn handleFrame(self: *Watch, frame: []const u8, out: anytype) !void {
+        if (self.list_request_id) |list_id| {
+            if (request_correlator.isResponseTo(self.allocator, frame, list_id)) {
+                self.allocator.free(list_id);
+                self.list_request_id = null;
+                return self.applyList(frame, out);
+            }
+        }
+        if (std.mem.indexOf(u8, frame, "device.pair.") == null) return;
+        const parsed = std.json.parseFromSlice(gateway.GatewayEventFrame, self.allocator, frame, .{ .ignore_unknown_fields = true }) catch return;
+        defer parsed.deinit();
+        if (!std.mem.eql(u8, parsed.value.type, "event")) return;
+        if (!std.mem.startsWith(u8, parsed.value.event, "device.pair.")) return;
+
+        const request_id = requestIdOf(parsed.value.payload);
+        if (std.mem.eql(u8, parsed.value.event, "device.pair.requested")) {
+            if (request_id) |id| {
+                // Already reported by a resync that raced the live event.
+                if (self.pending.contains(id)) return;
+                try self.remember(id);
+            }
+        } else if (std.mem.eql(u8, parsed.value.event, "device.pair.resolved")) {
+            if (request_id) |id| self.forget(id);
+        }
+        try writeLine(out, .{ .event = parsed.value.event, .ts = std.time.milliTimestamp(), .payload = parsed.value.payload });
+    }
+
+    fn requestList(self: *Watch, ws_client: *websocket_client.WebSocketClient) !void {
+        const request = try requests.buildRequestPayload(self.allocator, "device.pair.list", .{});
+        defer self.allocator.free(request.payload);
+        errdefer self.allocator.free(request.id);
+        try ws_client.send(request.payload);
+        if (self.list_request_id) |old| self.allocator.free(old);
+        self.list_request_id = request.id;
+    }
+
+    /// Reconciles the pending list with what has been reported so far.
+    fn applyList(self: *Watch, frame: []const u8, out: anytype) !void {
+        const parsed = std.json.parseFromSlice(gateway.GatewayResponseFrame, self.allocator, frame, .{ .ignore_unknown_fields = true }) catch return;
+        defer parsed.deinit();
+        if (!parsed.value.ok) {
+            logger.warn("device.pair.list was refused; watching live events only.", .{});
+            return;
+        }
+
+        const now = std.time.milliTimestamp();
+        var listed: std.StringHashMapUnmanaged(void) = .empty;
+        defer listed.deinit(self.allocator);
+        if (pendingList(parsed.value.payload)) |items| {
+            for (items) |item| {
+                const id = requestIdOf(item) orelse continue;
+                try listed.put(self.allocator, id, {});
+                if (self.pending.contains(id)) continue;
+                try self.remember(id);
+                try writeLine(out, .{ .event = "device.pair.requested", .ts = now, .resync = true, .payload = item });
+            }
+        }
+
+        // Reported earlier but gone from the list: resolved while we were away.
+        var gone: std.ArrayList([]const u8) = .empty;
+        defer gone.deinit(self.allocator);
+        var it = self.pending.keyIterator();
+        while (it.next()) |key| {
+            if (!listed.contains(key.*)) try gone.append(self.allocator, key.*);
+        }
+        for (gone.items) |id| {
+            var payload = std.json.ObjectMap.init(self.allocator);
+            defer payload.deinit();
+            try payload.put("requestId", .{ .string = id });
+            try writeLine(out, .{ .event = "device.pair.resolved", .ts = now, .resync = true, .payload = .{ .object = payload } });
+            self.forget(id);
+        }
+    }
+
+    fn remember(self: *Watch, id: []const u8) !void {
+        const copy = try self.allocator.dupe(u8, id);
+        errdefer self.allocator.free(copy);
+        try self.pending.put(self.allocator, copy, {});
+    }
+
+    fn forget(self: *Watch, id: []const u8) void {
+        const entry = self.pending.fetchRemove(id) orelse return;
+        self.allocator.free(entry.key);
+    }
+};
+
+fn requestIdOf(value: ?std.json.Value) ?[]const u8 {
+    const v = value orelse return null;
+    if (v != .object) return null;
+    const id = v.object.get("requestId") orelse return null;
+    return if (id == .string) id.string else null;
+}
+
+/// `device.pair.list` answers `{ "pending": [...], "paired": [...] }`.
+fn pendingList(payload: ?std.json.Value) ?[]std.json.Value {
+    const v = payload orelse return null;
+    if (v != .object) return null;
+    const pending = v.object.get("pending") orelse return null;
+    return if (pending == .array) pending.array.items else null;
+}
+
+fn writeLine(out: anytype, line: Line) !void {
+    try out.print("{f}\n", .{std.json.fmt(line, .{ .emit_null_optional_fields = false })});
+}
+
+test "pairing watch streams each request once and clears it when resolved" {
+    const allocator = std.testing.allocator;
+    var watch = Watch{ .allocator = allocator };
+    defer watch.deinit();
+
+    var buf: std.ArrayList(u8) = .empty;
+    defer buf.deinit(allocator);
+    const out = buf.writer(allocator);
+
+    const requested = "{\"type\":\"event\",\"event\":\"device.pair.requested\",\"payload\":{\"requestId\":\"r1\",\"deviceId\":\"d1\"}}";
+    try watch.handleFrame(requested, out);
+    try watch.handleFrame(requested, out);
+    try watch.handleFrame("{\"type\":\"event\",\"event\":\"tick\",\"payload\":{}}", out);
+    try std.testing.expectEqual(@as(usize, 1), std.mem.count(u8, buf.items, "\n"));
+    try std.testing.expect(watch.pending.contains("r1"));
+
+    try watch.handleFrame("{\"type\":\"event\",\"event\":\"device.pair.resolved\",\"payload\":{\"requestId\":\"r1\",\"decision\":\"approved\"}}", out);
+    try std.testing.expectEqual(@as(usize, 2), std.mem.count(u8, buf.items, "\n"));
+    try std.testing.expect(!watch.pending.contains("r1"));
+    try std.testing.expect(std.mem.indexOf(u8, buf.items, "\"event\":\"device.pair.resolved\"") != null);
+}
+
+test "pairing watch resync reports requests and resolutions missed while away" {
+    const allocator = std.testing.allocator;
+    var watch = Watch{ .allocator = allocator };
+    defer watch.deinit();
+
+    var buf: std.ArrayList(u8) = .empty;
+    defer buf.deinit(allocator);
+    const out = buf.writer(allocator);
+
+    try watch.remember("old");
+    try watch.remember("still");
+    watch.list_request_id = try allocator.dupe(u8, "list-1");
+    try watch.handleFrame("{\"type\":\"res\",\"id\":\"list-1\",\"ok\":true,\"payload\":{\"pending\":[{\"requestId\":\"still\"},{\"requestId\":\"new\"}]}}", out);
+
+    try std.testing.expect(watch.list_request_id == null);
+    try std.testing.expect(watch.pending.contains("new") and watch.pending.contains("still") and !watch.pending.contains("old"));
+    try std.testing.expectEqual(@as(usize, 2), std.mem.count(u8, buf.items, "\"resync\":true"));
+}
@@ -0,0 +1,134 @@
+const std = @import("std");
+const zui = @import("ziggy-ui");
+const client_state = zui.client.state;
+const event_handler = @import("../client/event_handler.zig");
+const websocket_client = @import("../openclaw_transport.zig").websocket;
+const ziggy = @import("ziggy-core");
+const logger = ziggy.utils.logger;
+const gateway = ziggy.protocol.gateway;
+
+/// The envelope fields needed to match a response. Parsing into this skips the
+/// rest of the frame instead of building a `std.json.Value` tree.
+const Envelope = struct {
+    type: []const u8 = "",
+    id: ?[]const u8 = null,
+};
+
+/// Waits for the `res` frame answering one request. The wait blocks in the
+/// socket read (bounded by the time left), so it returns as soon as the answer
+/// lands instead of on the next poll tick.
+///
+/// When `ctx` is set, every frame read on the way, the answer included, is
+/// handed to `event_handler` so client state (sessions, nodes, node results)
+/// stays current.
+pub const Correlator = struct {
+    allocator: std.mem.Allocator,
+    ws_client: *websocket_client.WebSocketClient,
+    ctx: ?*client_state.ClientContext = null,
+
+    /// Returns an owned copy of the matching frame, or error.Timeout.
+    pub fn waitFor(self: *Correlator, request_id: []const u8, timeout_ms: u64) ![]u8 {
+        const deadline = std.time.milliTimestamp() + @as(i64, @intCast(timeout_ms));
+        const saved_timeout_ms = self.ws_client.read_timeout_ms;
+        defer self.ws_client.setReadTimeout(saved_timeout_ms);
+
+        while (true) {
+            if (!self.ws_client.is_connected) return error.NotConnected;
+            const remaining = deadline - std.time.milliTimestamp();
+            if (remaining <= 0) return error.Timeout;
+            self.ws_client.setReadTimeout(@intCast(@min(remaining, std.math.maxInt(u32))));
+
+            const frame = try self.ws_client.receiveBorrowed() orelse continue;
+            defer self.ws_client.release();
+
+            const matched = isResponseTo(self.allocator, frame, request_id);
+            if (self.ctx) |ctx| self.dispatch(ctx, frame);
+            if (matched) return self.allocator.dupe(u8, frame);
+        }
+    }
+
+    /// Waits for the answer and fails with error.RequestFailed unless it is `ok`.
+    /// For requests whose payload the caller does not need (sends, approvals).
+    pub fn expectOk(self: *Correlator, request_id: []const u8, timeout_ms: u64) !void {
+        const frame = try self.waitFor(request_id, timeout_ms);
+        defer self.allocator.free(frame);
+        try checkOk(self.allocator, frame);
+    }
+
+    /// Connects again and waits for the gateway's hello (needs `ctx`, whose
+    /// state tracks the handshake).
+    pub fn reconnect(self: *Correlator, timeout_ms: u64) !void {
+        const ctx = self.ctx orelse return error.InvalidArguments;
+        ctx.state = .connecting;
+        try self.ws_client.connect();
+
+        const deadline = std.time.milliTimestamp() + @as(i64, @intCast(timeout_ms));
+        while (ctx.state != .connected) {
+            if (!self.ws_client.is_connected) return error.NotConnected;
+            if (std.time.milliTimestamp() >= deadline) {
+                self.ws_client.disconnect();
+                return error.ConnectionTimeout;
+            }
+            const frame = try self.ws_client.receiveBorrowed() orelse continue;
+            defer self.ws_client.release();
+            self.dispatch(ctx, frame);
+        }
+    }
+
+    /// Hands one frame to `event_handler`, storing any device token it carries.
+    pub fn dispatch(self: *Correlator, ctx: *client_state.ClientContext, frame: []const u8) void {
+        const update = event_handler.handleRawMessage(ctx, frame) catch |err| blk: {
+            logger.warn("Error handling message: {s}", .{@errorName(err)});
+            break :blk null;
+        };
+        if (update) |auth_update| {
+            defer auth_update.deinit(self.allocator);
+            self.ws_client.storeDeviceToken(
+                auth_update.device_token,
+                auth_update.role,
+                auth_update.scopes,
+                auth_update.issued_at_ms,
+            ) catch |err| {
+                logger.warn("Failed to store device token: {s}", .{@errorName(err)});
+            };
+        }
+    }
+};
+
+/// True when `frame` is the `res` for `request_id`. Request ids are random, so
+/// a substring check rejects almost every other frame before any parsing.
+pub fn isResponseTo(allocator: std.mem.Allocator, frame: []const u8, request_id: []const u8) bool {
+    if (std.mem.indexOf(u8, frame, request_id) == null) return false;
+    const parsed = std.json.parseFromSlice(Envelope, allocator, frame, .{ .ignore_unknown_fields = true }) catch return false;
+    defer parsed.deinit();
+    const id = parsed.value.id orelse return false;
+    return std.mem.eql(u8, parsed.value.type, "res") and std.mem.eql(u8, id, request_id);
+}
+
+/// error.RequestFailed (with the gateway's reason logged) unless `frame` is an ok response.
+pub fn checkOk(allocator: std.mem.Allocator, frame: []const u8) !void {
+    const parsed = try std.json.parseFromSlice(gateway.GatewayResponseFrame, allocator, frame, .{ .ignore_unknown_fields = true });
+    defer parsed.deinit();
+    if (parsed.value.ok) return;
+    if (parsed.value.@"error") |err| {
+        logger.err("Gateway request failed ({s}): {s}", .{ err.code, err.message });
+    } else {
+        logger.err("Gateway request failed", .{});
+    }
+    return error.RequestFailed;
+}
+
+test "isResponseTo matches only the res frame for the request id" {
+    const allocator = std.testing.allocator;
+    try std.testing.expect(isResponseTo(allocator, "{\"type\":\"res\",\"id\":\"req-1\",\"ok\":true,\"payload\":{\"nodes\":[]}}", "req-1"));
+    try std.testing.expect(!isResponseTo(allocator, "{\"type\":\"res\",\"id\":\"req-2\",\"ok\":true}", "req-1"));
+    // Mentioning the id elsewhere is not an answer.
+    try std.testing.expect(!isResponseTo(allocator, "{\"type\":\"event\",\"event\":\"chat\",\"payload\":{\"ref\":\"req-1\"}}", "req-1"));
+    try std.testing.expect(!isResponseTo(allocator, "not json req-1", "req-1"));
+}
+
+test "checkOk accepts ok responses and rejects failures" {
+    const allocator = std.testing.allocator;
+    try checkOk(allocator, "{\"type\":\"res\",\"id\":\"req-1\",\"ok\":true,\"payload\":{\"runId\":\"r\"}}");
+    try std.testing.expectError(error.RequestFailed, checkOk(allocator, "{\"type\":\"res\",\"id\":\"req-1\",\"ok\":false,\"error\":{\"code\":\"NOT_FOUND\",\"message\":\"no such approval\"}}"));
+}
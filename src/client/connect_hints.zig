@@ -0,0 +1,162 @@
+const std = @import("std");
+const ziggy = @import("ziggy-core");
+const logger = ziggy.utils.logger;
+
+/// Per-gateway memory of whether the gateway sends `connect.challenge`.
+///
+/// A client using a device identity waits a short window for the challenge
+/// before sending `connect`. Gateways that never send one would cost that whole
+/// window on every connect, so the outcome is remembered per gateway URL, in
+/// process and in a small JSON file next to the device identity:
+///
+///   {"ws://127.0.0.1:18789/ws":true,"wss://gw.example/ws":false}
+///
+/// `true` sticks: once a gateway has sent a challenge, later connects wait for it.
+pub const Hint = enum { unknown, sends_challenge, no_challenge };
+
+const file_name = "ziggystarclaw_gateway_hints.json";
+
+/// Process-lifetime cache, shared by every client (the node swarm runs thousands).
+/// Keyed by store path: clients with different identity directories keep
+/// separate files.
+var mutex: std.Thread.Mutex = .{};
+var stores: std.StringHashMapUnmanaged(*Store) = .empty;
+const cache_allocator = std.heap.page_allocator;
+
+/// The hints of one file, by gateway URL.
+const Store = struct {
+    hints: std.StringHashMapUnmanaged(bool) = .empty,
+};
+
+/// `<dir of device_identity_path>/ziggystarclaw_gateway_hints.json`.
+pub fn storePath(allocator: std.mem.Allocator, device_identity_path: []const u8) ![]u8 {
+    const dir = std.fs.path.dirname(device_identity_path) orelse ".";
+    return std.fs.path.join(allocator, &.{ dir, file_name });
+}
+
+pub fn lookup(store_path: []const u8, url: []const u8) Hint {
+    mutex.lock();
+    defer mutex.unlock();
+    const store = loadStore(store_path) orelse return .unknown;
+    const sends = store.hints.get(url) orelse return .unknown;
+    return if (sends) .sends_challenge else .no_challenge;
+}
+
+/// Records what a connect observed, writing the file only when the hint changes.
+pub fn remember(store_path: []const u8, url: []const u8, sends_challenge: bool) void {
+    mutex.lock();
+    defer mutex.unlock();
+    const store = loadStore(store_path) orelse return;
+    if (store.hints.get(url)) |known| {
+        if (known == sends_challenge or known) return;
+    }
+    put(store, url, sends_challenge) catch return;
+    save(store, store_path) catch |err| {
+        logger.debug("Failed to save gateway hints to {s}: {s}", .{ store_path, @errorName(err) });
+    };
+}
+
+fn put(store: *Store, url: []const u8, sends_challenge: bool) !void {
+    const gop = try store.hints.getOrPut(cache_allocator, url);
+    if (!gop.found_existing) {
+        gop.key_ptr.* = cache_allocator.dupe(u8, url) catch |err| {
+            store.hints.removeByPtr(gop.key_ptr);
+            return err;
+        };
+    }
+    gop.value_ptr.* = sends_challenge;
+}
+
+/// The cached store for `store_path`, reading the file the first time the
+/// path is seen. A missing or unreadable file just means no hints. Null only
+/// when out of memory.
+fn loadStore(store_path: []const u8) ?*Store {
+    if (stores.get(store_path)) |store| return store;
+
+    const store = cache_allocator.create(Store) catch return null;
+    store.* = .{};
+    const path_copy = cache_allocator.dupe(u8, store_path) catch {
+        cache_allocator.destroy(store);
+        return null;
+    };
+    stores.put(cache_allocator, path_copy, store) catch {
+        cache_allocator.free(path_copy);
+        cache_allocator.destroy(store);
+        return null;
+    };
+
+    const bytes = std.fs.cwd().readFileAlloc(cache_allocator, store_path, max_file_bytes) catch return store;
+    defer cache_allocator.free(bytes);
+    const parsed = std.json.parseFromSlice(std.json.Value, cache_allocator, bytes, .{}) catch return store;
+    defer parsed.deinit();
+    if (parsed.value != .object) return store;
+    var it = parsed.value.object.iterator();
+    while (it.next()) |entry| {
+        if (entry.value_ptr.* != .bool) continue;
+        put(store, entry.key_ptr.*, entry.value_ptr.bool) catch break;
+    }
+    return store;
+}
+
+const max_file_bytes = 256 * 1024;
+
+fn save(store: *Store, store_path: []const u8) !void {
+    var out: std.Io.Writer.Allocating = .init(cache_allocator);
+    defer out.deinit();
+    var jw: std.json.Stringify = .{ .writer = &out.writer };
+    try jw.beginObject();
+    var it = store.hints.iterator();
+    while (it.next()) |entry| {
+        try jw.objectField(entry.key_ptr.*);
+        try jw.write(entry.value_ptr.*);
+    }
+    try jw.endObject();
+    try std.fs.cwd().writeFile(.{ .sub_path = store_path, .data = out.written() });
+}
+
+/// Test helper: drops the in-process cache so the next lookup reloads the files.
+fn forgetCache() void {
+    var it = stores.iterator();
+    while (it.next()) |entry| {
+        const store = entry.value_ptr.*;
+        var keys = store.hints.keyIterator();
+        while (keys.next()) |key| cache_allocator.free(key.*);
+        store.hints.deinit(cache_allocator);
+        cache_allocator.destroy(store);
+        cache_allocator.free(entry.key_ptr.*);
+    }
+    stores.clearAndFree(cache_allocator);
+}
+
+test "gateway hints persist, and a seen challenge is never forgotten" {
+    const allocator = std.testing.allocator;
+    var tmp = std.testing.tmpDir(.{});
+    defer tmp.cleanup();
+    const dir = try tmp.dir.realpathAlloc(allocator, ".");
+    defer allocator.free(dir);
+    const identity_path = try std.fs.path.join(allocator, &.{ dir, "ziggystarclaw_device.json" });
+    defer allocator.free(identity_path);
+    const path = try storePath(allocator, identity_path);
+    defer allocator.free(path);
+
+    forgetCache();
+    defer forgetCache();
+    try std.testing.expectEqual(Hint.unknown, lookup(path, "ws://a/ws"));
+    remember(path, "ws://a/ws", false);
+    remember(path, "ws://b/ws", true);
+    remember(path, "ws://b/ws", false);
+
+    forgetCache();
+    try std.testing.expectEqual(Hint.no_challenge, lookup(path, "ws://a/ws"));
+    try std.testing.expectEqual(Hint.sends_challenge, lookup(path, "ws://b/ws"));
+
+    remember(path, "ws://a/ws", true);
+    try std.testing.expectEqual(Hint.sends_challenge, lookup(path, "ws://a/ws"));
+
+    // Another identity directory has its own hints.
+    const other_identity = try std.fs.path.join(allocator, &.{ dir, "other", "ziggystarclaw_device.json" });
+    defer allocator.free(other_identity);
+    const other = try storePath(allocator, other_identity);
+    defer allocator.free(other);
+    try std.testing.expectEqual(Hint.unknown, lookup(other, "ws://b/ws"));
+}
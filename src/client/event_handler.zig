@@ -995,10 +995,65 @@ fn handleNodeHealthFrame(ctx: *state.ClientContext, payload: ?std.json.Value) !v
     if (node_id_val != .string) return;
 
     const node_id = node_id_val.string;
+
+    // v2 nodes send keyframes plus deltas holding only changed `data` fields;
+    // fold deltas into the last stored frame so readers always see a full view.
+    const is_delta = if (obj.get("keyframe")) |kf| kf == .bool and !kf.bool else false;
+    if (is_delta) {
+        if (ctx.findNodeHealth(node_id)) |existing| {
+            const merged = try mergeNodeHealthDeltaAlloc(ctx.allocator, existing.payload_json, value);
+            try ctx.upsertNodeHealthOwned(node_id, merged);
+            return;
+        }
+    }
+
     const rendered = try stringifyJsonValue(ctx.allocator, value);
     try ctx.upsertNodeHealthOwned(node_id, rendered);
 }
 
+fn mergeNodeHealthDeltaAlloc(allocator: std.mem.Allocator, previous_json: []const u8, delta: std.json.Value) ![]u8 {
+    var arena = std.heap.ArenaAllocator.init(allocator);
+    defer arena.deinit();
+    const a = arena.allocator();
+
+    const previous = std.json.parseFromSliceLeaky(std.json.Value, a, previous_json, .{}) catch
+        return stringifyJsonValue(allocator, delta);
+
+    var data = std.json.ObjectMap.init(a);
+    if (previous == .object) {
+        if (previous.object.get("data")) |prev_data| {
+            if (prev_data == .object) {
+                var it = prev_data.object.iterator();
+                while (it.next()) |entry| try data.put(entry.key_ptr.*, entry.value_ptr.*);
+            }
+        }
+    }
+    if (delta.object.get("data")) |delta_data| {
+        if (delta_data == .object) {
+            var it = delta_data.object.iterator();
+            while (it.next()) |entry| {
+                // An explicit null means the node no longer reports that metric.
+                if (entry.value_ptr.* == .null) {
+                    _ = data.orderedRemove(entry.key_ptr.*);
+                } else {
+                    try data.put(entry.key_ptr.*, entry.value_ptr.*);
+                }
+            }
+        }
+    }
+
+    // Top-level sections a delta omits (e.g. `commands`) carry over unchanged.
+    var merged = std.json.ObjectMap.init(a);
+    if (previous == .object) {
+        var prev_it = previous.object.iterator();
+        while (prev_it.next()) |entry| try merged.put(entry.key_ptr.*, entry.value_ptr.*);
+    }
+    var it = delta.object.iterator();
+    while (it.next()) |entry| try merged.put(entry.key_ptr.*, entry.value_ptr.*);
+    try merged.put("data", .{ .object = data });
+    return stringifyJsonValue(allocator, .{ .object = merged });
+}
+
 fn stringifyJsonValue(allocator: std.mem.Allocator, value: std.json.Value) ![]u8 {
     var out: std.io.Writer.Allocating = .init(allocator);
     errdefer out.deinit();
@@ -0,0 +1,146 @@
+const std = @import("std");
+const ziggy = @import("ziggy-core");
+const logger = ziggy.utils.logger;
+
+/// Process-wide state that makes reconnects cheap.
+///
+/// When a gateway restarts, every node in the process reconnects at once. Each
+/// of those connects would otherwise resolve the host again and, for `wss://`,
+/// rescan and parse the system trust store before the TLS handshake. Instead:
+///
+/// - the address a connect actually reached is remembered per host and port for
+///   a TTL, so later connects dial it directly. If dialling it fails, the entry
+///   is dropped and the connect resolves the host again;
+/// - the CA bundle is loaded once and shared by every TLS connection.
+///
+/// std's TLS client has no session tickets, so the handshake itself is still a
+/// full one; these caches remove the rest of the per-connect setup.
+var mutex: std.Thread.Mutex = .{};
+var addresses: std.StringHashMapUnmanaged(Entry) = .empty;
+var ca_bundle: ?std.crypto.Certificate.Bundle = null;
+const cache_allocator = std.heap.page_allocator;
+
+const Entry = struct {
+    /// IP literal, e.g. `10.0.0.5` or `fe80::1`.
+    ip: []u8,
+    expires_ms: i64,
+};
+
+/// Cached IP literal to dial instead of `host`, copied into `allocator`, or null
+/// on a miss (the caller then resolves as usual).
+pub fn lookupAddress(allocator: std.mem.Allocator, host: []const u8, port: u16) ?[]u8 {
+    var key_buf: [320]u8 = undefined;
+    const key = cacheKey(&key_buf, host, port) orelse return null;
+
+    mutex.lock();
+    defer mutex.unlock();
+    const entry = addresses.get(key) orelse return null;
+    if (std.time.milliTimestamp() >= entry.expires_ms) return null;
+    return allocator.dupe(u8, entry.ip) catch null;
+}
+
+/// Remembers the peer `socket` is connected to as the address for `host:port`.
+pub fn rememberPeer(host: []const u8, port: u16, socket: std.posix.socket_t, ttl_ms: u32) void {
+    if (ttl_ms == 0) return;
+    // Literal addresses need no resolving.
+    if (std.net.Address.parseIp(host, port)) |_| return else |_| {}
+    var key_buf: [320]u8 = undefined;
+    const key = cacheKey(&key_buf, host, port) orelse return;
+
+    var storage: std.posix.sockaddr.storage = undefined;
+    var len: std.posix.socklen_t = @sizeOf(std.posix.sockaddr.storage);
+    std.posix.getpeername(socket, @ptrCast(&storage), &len) catch return;
+    const peer = std.net.Address.initPosix(@ptrCast(@alignCast(&storage)));
+    var ip_buf: [64]u8 = undefined;
+    const ip = ipLiteral(&ip_buf, peer) orelse return;
+
+    mutex.lock();
+    defer mutex.unlock();
+    put(key, ip, std.time.milliTimestamp() + ttl_ms) catch |err| {
+        logger.debug("Failed to cache address for {s}: {s}", .{ key, @errorName(err) });
+    };
+}
+
+/// Drops the cached address for `host:port`, e.g. after dialling it failed.
+pub fn forgetAddress(host: []const u8, port: u16) void {
+    var key_buf: [320]u8 = undefined;
+    const key = cacheKey(&key_buf, host, port) orelse return;
+
+    mutex.lock();
+    defer mutex.unlock();
+    const entry = addresses.fetchRemove(key) orelse return;
+    cache_allocator.free(entry.key);
+    cache_allocator.free(entry.value.ip);
+}
+
+fn put(key: []const u8, ip: []const u8, expires_ms: i64) !void {
+    const ip_copy = try cache_allocator.dupe(u8, ip);
+    errdefer cache_allocator.free(ip_copy);
+    const gop = try addresses.getOrPut(cache_allocator, key);
+    if (gop.found_existing) {
+        cache_allocator.free(gop.value_ptr.ip);
+    } else {
+        gop.key_ptr.* = cache_allocator.dupe(u8, key) catch |err| {
+            addresses.removeByPtr(gop.key_ptr);
+            return err;
+        };
+    }
+    gop.value_ptr.* = .{ .ip = ip_copy, .expires_ms = expires_ms };
+}
+
+fn cacheKey(buf: []u8, host: []const u8, port: u16) ?[]const u8 {
+    return std.fmt.bufPrint(buf, "{s}|{d}", .{ host, port }) catch null;
+}
+
+/// The host part of `addr` as the ws client's `connect_host` accepts it.
+fn ipLiteral(buf: []u8, addr: std.net.Address) ?[]const u8 {
+    const text = std.fmt.bufPrint(buf, "{f}", .{addr}) catch return null;
+    // IPv4 formats as `a.b.c.d:port`, IPv6 as `[addr]:port`.
+    if (text.len > 0 and text[0] == '[') {
+        const end = std.mem.indexOfScalar(u8, text, ']') orelse return null;
+        return text[1..end];
+    }
+    const colon = std.mem.lastIndexOfScalar(u8, text, ':') orelse return null;
+    return text[0..colon];
+}
+
+/// The system CA bundle, scanned on first use and kept for the process
+/// lifetime. Null when the scan fails; the ws client then scans for itself.
+pub fn caBundle() ?std.crypto.Certificate.Bundle {
+    mutex.lock();
+    defer mutex.unlock();
+    if (ca_bundle == null) {
+        var bundle: std.crypto.Certificate.Bundle = .{};
+        bundle.rescan(cache_allocator) catch |err| {
+            logger.warn("Failed to load system CA bundle: {s}", .{@errorName(err)});
+            bundle.deinit(cache_allocator);
+            return null;
+        };
+        ca_bundle = bundle;
+    }
+    return ca_bundle;
+}
+
+test "address cache returns IP literals until they expire" {
+    var buf: [64]u8 = undefined;
+    try std.testing.expectEqualStrings("10.0.0.5", ipLiteral(&buf, try std.net.Address.parseIp("10.0.0.5", 18789)).?);
+    try std.testing.expectEqualStrings("::1", ipLiteral(&buf, try std.net.Address.parseIp("::1", 443)).?);
+
+    const allocator = std.testing.allocator;
+    var key_buf: [320]u8 = undefined;
+    {
+        mutex.lock();
+        defer mutex.unlock();
+        try put(cacheKey(&key_buf, "gw.test", 443).?, "10.0.0.5", std.time.milliTimestamp() + 60_000);
+        try put(cacheKey(&key_buf, "stale.test", 443).?, "10.0.0.6", std.time.milliTimestamp() - 1);
+    }
+
+    const ip = lookupAddress(allocator, "gw.test", 443).?;
+    defer allocator.free(ip);
+    try std.testing.expectEqualStrings("10.0.0.5", ip);
+    try std.testing.expect(lookupAddress(allocator, "gw.test", 80) == null);
+    try std.testing.expect(lookupAddress(allocator, "stale.test", 443) == null);
+
+    forgetAddress("gw.test", 443);
+    try std.testing.expect(lookupAddress(allocator, "gw.test", 443) == null);
+}
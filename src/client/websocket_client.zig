@@ -6,9 +6,31 @@ const messages = ziggy.protocol.messages;
 const gateway = ziggy.protocol.gateway;
 const requests = ziggy.protocol.requests;
 const ws_auth_pairing = @import("../protocol/ws_auth_pairing.zig");
+const connect_hints = @import("connect_hints.zig");
+const transport_cache = @import("transport_cache.zig");
 const logger = ziggy.utils.logger;
 const builtin = @import("builtin");
 
+/// Traffic counters for one logical link. Owned by whoever outlives the client
+/// (e.g. the connection manager) so totals survive reconnects; atomics so a
+/// metrics scraper can read them from another thread.
+pub const LinkStats = struct {
+    bytes_in: std.atomic.Value(u64) = .init(0),
+    bytes_out: std.atomic.Value(u64) = .init(0),
+    frames_in: std.atomic.Value(u64) = .init(0),
+    frames_out: std.atomic.Value(u64) = .init(0),
+
+    fn countIn(self: *LinkStats, len: usize) void {
+        _ = self.frames_in.fetchAdd(1, .monotonic);
+        _ = self.bytes_in.fetchAdd(len, .monotonic);
+    }
+
+    fn countOut(self: *LinkStats, len: usize) void {
+        _ = self.frames_out.fetchAdd(1, .monotonic);
+        _ = self.bytes_out.fetchAdd(len, .monotonic);
+    }
+};
+
 pub const WebSocketClient = struct {
     allocator: std.mem.Allocator,
     url: []const u8,
@@ -27,17 +49,39 @@ pub const WebSocketClient = struct {
     insecure_tls: bool = false,
     connect_host_override: ?[]const u8 = null,
     connect_timeout_ms: u32 = 10_000,
+    // How long the address a connect reached is reused before resolving again (0 = always resolve).
+    address_cache_ttl_ms: u32 = 60_000,
     is_connected: bool = false,
     client: ?ws.Client = null,
     read_timeout_ms: u32 = 1,
+    // Static read buffer per connection; larger frames borrow from the pool up to max_size.
+    // Many-connection hosts (the node swarm) shrink this to keep per-connection memory small.
+    read_buffer_size: usize = 64 * 1024,
+    // Optional traffic counters (payload bytes and data frames).
+    stats: ?*LinkStats = null,
+    // Frame handed out by `receiveBorrowed`, still owned by the read buffer until `release`.
+    borrowed: ?ws.Message = null,
+    // `borrowed` was read during the connect handshake and not handed out yet.
+    borrowed_pending: bool = false,
+    // Bounded buffer `send` masks through; allocated on first send, kept for the client's lifetime.
+    send_scratch: ?[]u8 = null,
+    // Serializes frame writes, so a writer thread can send while another thread
+    // receives (the receive path writes pongs and the connect request).
+    write_mutex: std.Thread.Mutex = .{},
     device_identity: ?identity.DeviceIdentity = null,
     device_identity_path: []const u8 = identity.default_path,
     connect_nonce: ?[]u8 = null,
     connect_sent: bool = false,
     // When using device identity, we want to allow a short window for the gateway
     // to send connect.challenge before we send connect (matches OpenClaw behavior).
+    // `connect` waits for it on the socket; this is only the fallback for `poll`.
     connect_send_after_ms: ?i64 = null,
     use_device_identity: bool = true,
+    // With a device identity, `connect` blocks on the socket until connect.challenge
+    // arrives (or the window passes). Hosts that multiplex many clients on one
+    // thread turn this off: `connect` then returns after the WebSocket handshake,
+    // and the challenge (via receive) or `poll` after the window sends connect.
+    wait_for_challenge: bool = true,
 
     // Connect profile (defaults match CLI/operator)
     connect_role: []const u8 = "operator",
@@ -73,8 +117,10 @@ pub const WebSocketClient = struct {
         self.device_identity_path = path;
     }
 
+    /// Takes effect immediately on a live connection, and on every later connect.
     pub fn setReadTimeout(self: *WebSocketClient, ms: u32) void {
         self.read_timeout_ms = ms;
+        if (self.client) |*client| client.readTimeout(ms) catch {};
     }
 
     pub fn setConnectProfile(self: *WebSocketClient, params: struct {
@@ -147,21 +193,41 @@ pub const WebSocketClient = struct {
                 connect_port = parsed_override.port;
             }
         }
-        var client = try ws.Client.init(self.allocator, .{
+        const dial_host = connect_host orelse parsed.host;
+        var cached_ip = if (self.address_cache_ttl_ms > 0)
+            transport_cache.lookupAddress(aa, dial_host, connect_port)
+        else
+            null;
+        const verify_cert = !self.insecure_tls;
+        var config: ws.Client.Config = .{
             .port = connect_port,
             .host = parsed.host,
-            .connect_host = connect_host,
+            .connect_host = cached_ip orelse connect_host,
             .connect_timeout_ms = self.connect_timeout_ms,
             .tls = parsed.tls,
             .verify_host = !self.insecure_tls,
-            .verify_cert = !self.insecure_tls,
+            .verify_cert = verify_cert,
+            .ca_bundle = if (parsed.tls and verify_cert) transport_cache.caBundle() else null,
             // Gateway responses like chat.history can be several MB for long sessions.
             // Keep a firm cap to avoid unbounded memory use, but allow enough headroom
             // that the UI can still load history without tripping error.TooLarge.
             .max_size = 8 * 1024 * 1024,
-            .buffer_size = 64 * 1024,
-        });
+            .buffer_size = self.read_buffer_size,
+        };
+        var client = ws.Client.init(self.allocator, config) catch |err| retry: {
+            // The gateway may have come back on another address: forget the
+            // cached one and resolve again.
+            const stale_ip = cached_ip orelse return err;
+            logger.info("Connect to cached address {s} for {s} failed ({s}); resolving again", .{ stale_ip, dial_host, @errorName(err) });
+            transport_cache.forgetAddress(dial_host, connect_port);
+            cached_ip = null;
+            config.connect_host = connect_host;
+            break :retry try ws.Client.init(self.allocator, config);
+        };
         errdefer client.deinit();
+        if (cached_ip == null) {
+            transport_cache.rememberPeer(dial_host, connect_port, client.stream.stream.handle, self.address_cache_ttl_ms);
+        }
 
         const headers = try buildHeaders(aa, parsed.host_header, parsed.origin, self.token);
         try client.handshake(parsed.path, .{
@@ -172,6 +238,12 @@ pub const WebSocketClient = struct {
 
         self.client = client;
         self.is_connected = true;
+        // `client` (deinit'ed by its errdefer above) owns the connection until this returns.
+        errdefer {
+            self.release();
+            self.client = null;
+            self.is_connected = false;
+        }
         self.connect_sent = false;
         self.connect_send_after_ms = null;
         clearConnectNonce(self);
@@ -182,7 +254,13 @@ pub const WebSocketClient = struct {
                 self.device_identity = try identity.loadOrCreate(self.allocator, self.device_identity_path);
             }
             // Match OpenClaw GatewayClient: wait ~750ms for connect.challenge, then send connect.
-            self.connect_send_after_ms = std.time.milliTimestamp() + 750;
+            self.connect_send_after_ms = std.time.milliTimestamp() + challenge_window_ms;
+            const hints_path = try connect_hints.storePath(aa, self.device_identity_path);
+            if (self.wait_for_challenge) {
+                try sendConnectAfterChallenge(self, hints_path);
+            } else if (connect_hints.lookup(hints_path, self.url) == .no_challenge) {
+                try sendConnectRequest(self, null);
+            }
         } else {
             // No device identity: send connect immediately.
             try sendConnectRequest(self, null);
@@ -192,18 +270,75 @@ pub const WebSocketClient = struct {
     pub fn send(self: *WebSocketClient, message: []const u8) !void {
         if (!self.is_connected) return error.NotConnected;
         if (self.client) |*client| {
-            const payload = try self.allocator.dupe(u8, message);
-            defer self.allocator.free(payload);
-            try client.write(payload);
+            self.write_mutex.lock();
+            defer self.write_mutex.unlock();
+            try self.writeMaskedCopy(client, .text, message);
+            if (self.stats) |st| st.countOut(message.len);
             return;
         }
         return error.NotConnected;
     }
 
+    /// Frame `data` without touching it: the header and mask go into the scratch
+    /// buffer, then the payload is masked while being copied through it one
+    /// scratch-full at a time. Caller holds `write_mutex`, which also guards the scratch.
+    fn writeMaskedCopy(self: *WebSocketClient, client: *ws.Client, op_code: ws.OpCode, data: []const u8) !void {
+        const scratch = self.send_scratch orelse blk: {
+            const buf = try self.allocator.alloc(u8, send_scratch_size);
+            self.send_scratch = buf;
+            break :blk buf;
+        };
+
+        const header = ws.proto.writeFrameHeader(scratch, op_code, data.len, false);
+        scratch[1] |= 128; // masked, as required for client frames
+        const mask = client._mask_fn();
+        @memcpy(scratch[header.len..][0..4], &mask);
+
+        var used = header.len + 4;
+        var offset: usize = 0;
+        while (true) {
+            const n = @min(data.len - offset, scratch.len - used);
+            const out = scratch[used..][0..n];
+            @memcpy(out, data[offset..][0..n]);
+            // Rotate the mask so byte i of the payload is still XORed with mask[i % 4].
+            const rotated = [4]u8{ mask[offset & 3], mask[(offset + 1) & 3], mask[(offset + 2) & 3], mask[(offset + 3) & 3] };
+            ws.proto.mask(&rotated, out);
+            try client.stream.writeAll(scratch[0 .. used + n]);
+            offset += n;
+            used = 0;
+            if (offset == data.len) break;
+        }
+    }
+
+    /// Send a binary frame. The payload is masked in place, so `frame` must be a
+    /// scratch buffer the caller is done with (no copy at all, unlike `send`).
+    pub fn sendBinary(self: *WebSocketClient, frame: []u8) !void {
+        if (!self.is_connected) return error.NotConnected;
+        if (self.client) |*client| {
+            const len = frame.len;
+            self.write_mutex.lock();
+            defer self.write_mutex.unlock();
+            try client.writeBin(frame);
+            if (self.stats) |st| st.countOut(len);
+            return;
+        }
+        return error.NotConnected;
+    }
+
+    /// Socket of the live connection, for callers that multiplex many clients
+    /// with `poll`. Readiness only means bytes arrived: drain with `receiveBorrowed`
+    /// until it returns null, since frames can sit in the read buffer (or TLS).
+    pub fn socketHandle(self: *const WebSocketClient) ?std.posix.socket_t {
+        const client = self.client orelse return null;
+        return client.stream.stream.handle;
+    }
+
     pub fn sendPing(self: *WebSocketClient) !void {
         if (!self.is_connected) return error.NotConnected;
         if (self.client) |*client| {
             var ping_buf: [1]u8 = .{0};
+            self.write_mutex.lock();
+            defer self.write_mutex.unlock();
             try client.writePing(ping_buf[0..0]);
             return;
         }
@@ -234,52 +369,87 @@ pub const WebSocketClient = struct {
         }
     }
 
+    /// Receive the next text/binary frame as an owned copy (free with `allocator`).
     pub fn receive(self: *WebSocketClient) !?[]u8 {
+        const data = try self.receiveBorrowed() orelse return null;
+        defer self.release();
+        return try self.allocator.dupe(u8, data);
+    }
+
+    /// Receive the next text/binary frame without copying it: the slice points
+    /// into the WebSocket read buffer and stays valid until `release`, the next
+    /// receive, or disconnect. Dupe it to keep it past that (e.g. when queueing
+    /// frames for another thread). Sends are fine while a frame is borrowed.
+    pub fn receiveBorrowed(self: *WebSocketClient) !?[]const u8 {
         if (!self.is_connected) return error.NotConnected;
+        if (self.borrowed_pending) {
+            self.borrowed_pending = false;
+            return self.borrowed.?.data;
+        }
+        self.release();
         // Ensure connect is sent promptly even if no traffic is flowing.
         self.poll() catch {};
         if (self.client) |*client| {
             const message = try client.read() orelse return null;
-            defer client.done(message);
 
-            const payload = switch (message.type) {
-                .text, .binary => try self.allocator.dupe(u8, message.data),
-                .ping => blk: {
+            switch (message.type) {
+                .text, .binary => {
+                    self.borrowed = message;
+                    const data = message.data;
+                    if (self.stats) |st| st.countIn(data.len);
+                    if (message.type == .text) {
+                        logger.debug("WebSocket text frame len={d}", .{data.len});
+                    } else {
+                        logger.debug("WebSocket binary frame len={d}", .{data.len});
+                    }
+                    handleConnectChallenge(self, data) catch {};
+                    return data;
+                },
+                .ping => {
+                    defer client.done(message);
+                    self.write_mutex.lock();
+                    defer self.write_mutex.unlock();
                     try client.writePong(message.data);
-                    break :blk null;
                 },
-                .pong => null,
-                .close => blk: {
-                    self.clearLastClose();
-                    if (message.data.len >= 2) {
-                        const code = (@as(u16, message.data[0]) << 8) | message.data[1];
-                        const reason = message.data[2..];
-                        self.last_close_code = code;
-                        self.last_close_reason = self.allocator.dupe(u8, reason) catch null;
-                        logger.warn("WebSocket closed by server code={} reason={s}", .{ code, reason });
-                    } else {
-                        logger.warn("WebSocket closed by server (no close payload)", .{});
+                .pong => client.done(message),
+                .close => {
+                    defer client.done(message);
+                    self.recordClose(message.data);
+                    {
+                        self.write_mutex.lock();
+                        defer self.write_mutex.unlock();
+                        try client.close(.{});
                     }
-                    try client.close(.{});
                     self.is_connected = false;
-                    break :blk null;
                 },
-            };
-
-            if (payload) |text| {
-                if (message.type == .text) {
-                    logger.debug("WebSocket text frame len={d}", .{text.len});
-                } else if (message.type == .binary) {
-                    logger.debug("WebSocket binary frame len={d}", .{text.len});
-                }
-                handleConnectChallenge(self, text) catch {};
-                return text;
             }
             return null;
         }
         return error.NotConnected;
     }
 
+    /// Hand a frame from `receiveBorrowed` back to the read buffer. Safe to call
+    /// when nothing is borrowed.
+    pub fn release(self: *WebSocketClient) void {
+        const message = self.borrowed orelse return;
+        self.borrowed = null;
+        self.borrowed_pending = false;
+        if (self.client) |*client| client.done(message);
+    }
+
+    fn recordClose(self: *WebSocketClient, data: []const u8) void {
+        self.clearLastClose();
+        if (data.len >= 2) {
+            const code = (@as(u16, data[0]) << 8) | data[1];
+            const reason = data[2..];
+            self.last_close_code = code;
+            self.last_close_reason = self.allocator.dupe(u8, reason) catch null;
+            logger.warn("WebSocket closed by server code={} reason={s}", .{ code, reason });
+        } else {
+            logger.warn("WebSocket closed by server (no close payload)", .{});
+        }
+    }
+
     pub fn clearLastClose(self: *WebSocketClient) void {
         self.last_close_code = null;
         if (self.last_close_reason) |r| {
@@ -289,6 +459,7 @@ pub const WebSocketClient = struct {
     }
 
     pub fn disconnect(self: *WebSocketClient) void {
+        self.release();
         if (self.client) |*client| {
             client.close(.{}) catch {};
             client.deinit();
@@ -308,6 +479,7 @@ pub const WebSocketClient = struct {
     }
 
     pub fn deinit(self: *WebSocketClient) void {
+        self.release();
         if (self.client) |*client| {
             client.deinit();
             self.client = null;
@@ -316,11 +488,71 @@ pub const WebSocketClient = struct {
             ident.deinit(self.allocator);
             self.device_identity = null;
         }
+        if (self.send_scratch) |buf| {
+            self.allocator.free(buf);
+            self.send_scratch = null;
+        }
         clearConnectNonce(self);
         self.clearLastClose();
     }
 };
 
+const send_scratch_size: usize = 16 * 1024;
+
+/// How long `connect` waits for `connect.challenge` before connecting without a nonce.
+const challenge_window_ms: u32 = 750;
+
+/// Blocks on the socket until `connect.challenge` arrives or the window closes,
+/// then sends `connect` (with the nonce, if any). Gateways remembered as never
+/// sending a challenge are not waited for. Any other frame read here is kept for
+/// the first `receiveBorrowed`.
+fn sendConnectAfterChallenge(self: *WebSocketClient, hints_path: []const u8) !void {
+    const hint = connect_hints.lookup(hints_path, self.url);
+    if (hint == .no_challenge) return sendConnectRequest(self, null);
+
+    const client = &self.client.?;
+    defer client.readTimeout(self.read_timeout_ms) catch {};
+    const deadline = std.time.milliTimestamp() + challenge_window_ms;
+    while (true) {
+        const remaining = deadline - std.time.milliTimestamp();
+        if (remaining <= 0) break;
+        try client.readTimeout(@intCast(remaining));
+        const message = try client.read() orelse continue;
+        switch (message.type) {
+            .text, .binary => {
+                if (self.stats) |st| st.countIn(message.data.len);
+                const nonce = parseConnectNonce(self.allocator, message.data) catch null;
+                if (nonce) |value| {
+                    client.done(message);
+                    clearConnectNonce(self);
+                    self.connect_nonce = value;
+                    logger.info("Connect challenge nonce received: {s}", .{value});
+                    if (hint == .unknown) connect_hints.remember(hints_path, self.url, true);
+                    return sendConnectRequest(self, value);
+                }
+                self.borrowed = message;
+                self.borrowed_pending = true;
+                break;
+            },
+            .ping => {
+                defer client.done(message);
+                self.write_mutex.lock();
+                defer self.write_mutex.unlock();
+                try client.writePong(message.data);
+            },
+            .pong => client.done(message),
+            .close => {
+                defer client.done(message);
+                self.recordClose(message.data);
+                return error.ConnectionClosed;
+            },
+        }
+    }
+
+    if (hint == .unknown) connect_hints.remember(hints_path, self.url, false);
+    try sendConnectRequest(self, null);
+}
+
 fn sendConnectRequest(self: *WebSocketClient, nonce: ?[]const u8) !void {
     if (self.client == null) return;
     if (self.connect_sent) return;
@@ -444,6 +676,8 @@ fn sendConnectRequest(self: *WebSocketClient, nonce: ?[]const u8) !void {
     }
 
     if (self.client) |*client| {
+        self.write_mutex.lock();
+        defer self.write_mutex.unlock();
         try client.write(payload);
     }
     self.connect_sent = true;
@@ -474,7 +708,18 @@ fn clearConnectNonce(self: *WebSocketClient) void {
 }
 
 fn handleConnectChallenge(self: *WebSocketClient, raw: []const u8) !void {
-    if (!self.use_device_identity or self.connect_sent) return;
+    if (!self.use_device_identity) return;
+    if (self.connect_sent) {
+        // A challenge after `connect` went out means a remembered "no challenge"
+        // hint is stale; make the next connect wait for it.
+        if (std.mem.indexOf(u8, raw, "connect.challenge") == null) return;
+        const nonce = try parseConnectNonce(self.allocator, raw) orelse return;
+        self.allocator.free(nonce);
+        const hints_path = try connect_hints.storePath(self.allocator, self.device_identity_path);
+        defer self.allocator.free(hints_path);
+        connect_hints.remember(hints_path, self.url, true);
+        return;
+    }
     const nonce = try parseConnectNonce(self.allocator, raw) orelse return;
     clearConnectNonce(self);
     self.connect_nonce = nonce;
@@ -32,6 +32,7 @@ else
     };
 // Node mode support is cross-platform (Windows included).
 const main_node = @import("main_node.zig");
+const node_swarm = @import("node/node_swarm.zig");
 const win_service = @import("windows/service.zig");
 const win_scm = if (builtin.os.tag == .windows) @import("windows/scm_service.zig") else struct {};
 const win_scm_host = if (builtin.os.tag == .windows) @import("windows/scm_host.zig") else struct {};
@@ -730,12 +731,21 @@ pub fn main() !void {
     var check_update_only = false;
     var print_update_url = false;
     var interactive = false;
+    var batch_input: ?[]const u8 = null;
+    var fanout_selector: ?[]const u8 = null;
+    var fanout_parallel: usize = 8;
+    var operator_daemon = false;
+    var no_daemon = false;
     var node_register_mode = false;
     var node_register_wait = false;
     var extract_wsz: ?[]const u8 = null;
     var extract_dest: ?[]const u8 = null;
     var gateway_test_verb: ?[]const u8 = null;
     var gateway_test_url: ?[]const u8 = null;
+    var bench_connections: usize = 4;
+    var bench_rate: u32 = 50;
+    var bench_duration_s: u32 = 10;
+    var bench_mix: ?[]const u8 = null;
 
     // Node service helpers
     var node_service_install = false;
@@ -774,8 +784,10 @@ pub fn main() !void {
     var windows_service_run = false;
     // Pre-scan for mode flags so we can delegate argument parsing cleanly.
     var node_mode = false;
+    var node_swarm_mode = false;
     for (args[1..]) |a| {
         if (std.mem.eql(u8, a, "--node-mode")) node_mode = true;
+        if (std.mem.eql(u8, a, "--node-swarm")) node_swarm_mode = true;
         if (std.mem.eql(u8, a, "--node-register")) node_register_mode = true;
         if (std.mem.eql(u8, a, "--wait-for-approval")) node_register_wait = true;
         if (std.mem.eql(u8, a, "--windows-service")) windows_service_run = true;
@@ -1337,6 +1349,22 @@ pub fn main() !void {
             check_update_only = true;
         } else if (std.mem.eql(u8, arg, "--interactive")) {
             interactive = true;
+        } else if (std.mem.eql(u8, arg, "--batch")) {
+            i += 1;
+            if (i >= args.len) return error.InvalidArguments;
+            batch_input = args[i];
+        } else if (std.mem.eql(u8, arg, "--daemon")) {
+            operator_daemon = true;
+        } else if (std.mem.eql(u8, arg, "--no-daemon")) {
+            no_daemon = true;
+        } else if (std.mem.eql(u8, arg, "--fanout")) {
+            i += 1;
+            if (i >= args.len) return error.InvalidArguments;
+            fanout_selector = args[i];
+        } else if (std.mem.eql(u8, arg, "--parallel")) {
+            i += 1;
+            if (i >= args.len) return error.InvalidArguments;
+            fanout_parallel = try std.fmt.parseInt(usize, args[i], 10);
         } else if (std.mem.eql(u8, arg, "--node-service-install")) {
             logger.err("Flag --node-service-install was removed. Use `node service install`.", .{});
             return error.InvalidArguments;
@@ -1388,6 +1416,22 @@ pub fn main() !void {
             i += 1;
             if (i >= args.len) return error.InvalidArguments;
             gateway_test_url = args[i];
+        } else if (std.mem.eql(u8, arg, "--bench-connections")) {
+            i += 1;
+            if (i >= args.len) return error.InvalidArguments;
+            bench_connections = try std.fmt.parseInt(usize, args[i], 10);
+        } else if (std.mem.eql(u8, arg, "--bench-rate")) {
+            i += 1;
+            if (i >= args.len) return error.InvalidArguments;
+            bench_rate = try std.fmt.parseInt(u32, args[i], 10);
+        } else if (std.mem.eql(u8, arg, "--bench-duration-s")) {
+            i += 1;
+            if (i >= args.len) return error.InvalidArguments;
+            bench_duration_s = try std.fmt.parseInt(u32, args[i], 10);
+        } else if (std.mem.eql(u8, arg, "--bench-mix")) {
+            i += 1;
+            if (i >= args.len) return error.InvalidArguments;
+            bench_mix = args[i];
         } else if (std.mem.eql(u8, arg, "--mode")) {
             i += 1;
             if (i >= args.len) return error.InvalidArguments;
@@ -1419,6 +1463,8 @@ pub fn main() !void {
             // handled by pre-scan; keep parsing so we accept --config/--log-level/etc.
         } else if (std.mem.eql(u8, arg, "--node-mode")) {
             // handled by pre-scan
+        } else if (std.mem.eql(u8, arg, "--node-swarm")) {
+            // handled by pre-scan
         } else if (std.mem.eql(u8, arg, "--operator-mode")) {
             if (comptime !cli_features.supports_operator_client) {
                 logger.err("This CLI build is node-only and cannot act as operator. Rebuild with -Dcli_operator=true.", .{});
@@ -1430,12 +1476,15 @@ pub fn main() !void {
         } else if (std.mem.eql(u8, arg, "--node-mode-help")) {
             try writeHelpText(allocator, main_node.usage);
             return;
+        } else if (std.mem.eql(u8, arg, "--node-swarm-help")) {
+            try writeHelpText(allocator, node_swarm.usage);
+            return;
         } else if (std.mem.eql(u8, arg, "--operator-mode-help")) {
             try writeHelpText(allocator, main_operator.usage);
             return;
         } else {
             // When running a specialized mode, allow that mode to parse its own flags.
-            if (!(node_mode or node_register_mode or windows_service_run)) {
+            if (!(node_mode or node_swarm_mode or node_register_mode or windows_service_run)) {
                 logger.warn("Unknown argument: {s}", .{arg});
             }
         }
@@ -1447,7 +1496,7 @@ pub fn main() !void {
         canvas_navigate != null or canvas_eval != null or canvas_snapshot != null or exec_approvals_get or
         exec_allow_cmd != null or exec_allow_file != null or approve_id != null or deny_id != null or
         device_pair_list or device_pair_approve_id != null or device_pair_reject_id != null or device_pair_watch or use_session != null or use_node != null or
-        extract_wsz != null or check_update_only or print_update_url or interactive or node_mode or windows_service_run or node_register_mode or save_config or
+        extract_wsz != null or check_update_only or print_update_url or interactive or batch_input != null or operator_daemon or node_mode or node_swarm_mode or windows_service_run or node_register_mode or save_config or
         gateway_test_verb != null or
         node_service_install or node_service_uninstall or node_service_start or node_service_stop or node_service_status or
         node_session_install or node_session_uninstall or node_session_start or node_session_stop or node_session_status or
@@ -1460,12 +1509,14 @@ pub fn main() !void {
 
     const operator_action_requested = list_sessions or list_nodes or list_approvals or
         send_message != null or session_key != null or use_session != null or node_id != null or use_node != null or
+        fanout_selector != null or
         run_command != null or which_name != null or notify_title != null or ps_list or spawn_command != null or
         poll_process_id != null or stop_process_id != null or canvas_present or canvas_hide or
         canvas_navigate != null or canvas_eval != null or canvas_snapshot != null or exec_approvals_get or
         exec_allow_cmd != null or exec_allow_file != null or approve_id != null or deny_id != null or
         gateway_test_verb != null or
-        device_pair_list or device_pair_approve_id != null or device_pair_reject_id != null or device_pair_watch or interactive;
+        device_pair_list or device_pair_approve_id != null or device_pair_reject_id != null or device_pair_watch or interactive or
+        batch_input != null or operator_daemon;
 
     if (!cli_features.supports_operator_client and operator_action_requested) {
         logger.err("{s}", .{cli_features.operator_disabled_hint});
@@ -2223,6 +2274,13 @@ pub fn main() !void {
         return;
     }
 
+    // Handle node swarm (simulated nodes for scale testing)
+    if (node_swarm_mode) {
+        const swarm_opts = try node_swarm.parseOptions(args[1..]);
+        try node_swarm.run(allocator, swarm_opts);
+        return;
+    }
+
     // Handle node mode
     if (node_mode) {
         const node_opts = try main_node.parseNodeOptions(allocator, args[1..]);
@@ -2274,9 +2332,20 @@ pub fn main() !void {
             .check_update_only = check_update_only,
             .print_update_url = print_update_url,
             .interactive = interactive,
+            .batch_input = batch_input,
+            .fanout_selector = fanout_selector,
+            .fanout_parallel = fanout_parallel,
+            .daemon = operator_daemon,
+            .no_daemon = no_daemon,
             .save_config = save_config,
             .gateway_verb = gateway_test_verb,
             .gateway_url = gateway_test_url,
+            .gateway_bench = .{
+                .connections = bench_connections,
+                .rate = bench_rate,
+                .duration_s = bench_duration_s,
+                .mix = bench_mix,
+            },
             .profile_name = profile_name,
         });
     } else {
@@ -16,6 +16,8 @@ const messages = ziggy.protocol.messages;
 const gateway = ziggy.protocol.gateway;
 const health_reporter = @import("node/health_reporter.zig");
 const HealthReporter = health_reporter.HealthReporter;
+const MetricsExporter = @import("node/metrics_exporter.zig").MetricsExporter;
+const send_queue = @import("node/send_queue.zig");
 const logger = ziggy.utils.logger;
 const markdown_help = @import("cli/markdown_help.zig");
 
@@ -83,6 +85,9 @@ pub const NodeCliOptions = struct {
     auto_approve_pairing: bool = false,
     pairing_timeout_seconds: u32 = 120,
 
+    // Overrides node.metricsPort.
+    metrics_port: ?u16 = null,
+
     insecure_tls: bool = false,
     log_level: logger.Level = .info,
 };
@@ -135,6 +140,10 @@ pub fn parseNodeOptions(allocator: std.mem.Allocator, args: []const []const u8)
             i += 1;
             if (i >= args.len) return error.InvalidArguments;
             opts.pairing_timeout_seconds = std.fmt.parseInt(u32, args[i], 10) catch return error.InvalidArguments;
+        } else if (std.mem.eql(u8, arg, "--metrics-port")) {
+            i += 1;
+            if (i >= args.len) return error.InvalidArguments;
+            opts.metrics_port = std.fmt.parseInt(u16, args[i], 10) catch return error.InvalidArguments;
         } else if (std.mem.eql(u8, arg, "--tls")) {
             opts.tls = true;
         } else if (std.mem.eql(u8, arg, "--insecure-tls")) {
@@ -310,6 +319,7 @@ pub fn runNodeMode(allocator: std.mem.Allocator, opts: NodeCliOptions) !void {
         if (cfg.node.displayName) |old| allocator.free(old);
         cfg.node.displayName = try allocator.dupe(u8, n);
     }
+    if (opts.metrics_port) |p| cfg.node.metricsPort = p;
     if (opts.as_node) |v| cfg.node.enabled = v;
     if (opts.as_operator) |v| cfg.operator.enabled = v;
 
@@ -424,13 +434,22 @@ pub fn runNodeMode(allocator: std.mem.Allocator, opts: NodeCliOptions) !void {
     );
     defer conn.deinit();
 
+    // Everything the node sends goes through one queue, drained by one writer
+    // thread in priority order (see send_queue.zig).
+    var outbound = send_queue.SendQueue.init(allocator);
+    defer outbound.deinit();
+    outbound.stats = &conn.stats.queue;
+    outbound.close(); // opened once connected
+    const outbox = send_queue.Outbox{ .queue = &outbound, .priority = .result };
+
     const Ctx = struct {
         cfg: *UnifiedConfig,
         node_ctx: *NodeContext,
         caps: []const []const u8,
         commands: []const []const u8,
+        outbound: *send_queue.SendQueue,
     };
-    var cb_ctx = Ctx{ .cfg = &cfg, .node_ctx = &node_ctx, .caps = caps, .commands = commands };
+    var cb_ctx = Ctx{ .cfg = &cfg, .node_ctx = &node_ctx, .caps = caps, .commands = commands, .outbound = &outbound };
     conn.user_ctx = @ptrCast(&cb_ctx);
 
     conn.onConfigureClient = struct {
@@ -457,6 +476,7 @@ pub fn runNodeMode(allocator: std.mem.Allocator, opts: NodeCliOptions) !void {
         fn cb(cm: *SingleThreadConnectionManager) void {
             const ctx: *Ctx = @ptrCast(@alignCast(cm.user_ctx.?));
             ctx.node_ctx.state = .connecting;
+            ctx.outbound.reopen();
             logger.info("Connected.", .{});
         }
     }.cb;
@@ -465,23 +485,41 @@ pub fn runNodeMode(allocator: std.mem.Allocator, opts: NodeCliOptions) !void {
         fn cb(cm: *SingleThreadConnectionManager) void {
             const ctx: *Ctx = @ptrCast(@alignCast(cm.user_ctx.?));
             ctx.node_ctx.state = .disconnected;
+            // Leftovers must not reach the next connection ahead of `connect`.
+            ctx.outbound.close();
             logger.err("Disconnected from gateway.", .{});
         }
     }.cb;
 
-    // Start health reporter (threaded, but uses per-heartbeat arena + page allocator).
-    // Guard ws_client access with a mutex: reporter thread may send while we reconnect.
+    // The writer thread holds this while sending; connect/disconnect (main thread
+    // only) take it, so the client is never torn down mid-write.
     var ws_mutex: std.Thread.Mutex = .{};
     conn.ws_mutex = &ws_mutex;
 
+    var writer = send_queue.OutboundWriter.init(&outbound, &conn.ws_client, &ws_mutex);
+    try writer.start();
+    defer writer.stop();
+
+    // Start health reporter (threaded, but uses per-heartbeat arena + page allocator).
     var reporter = HealthReporter.init(allocator, &node_ctx, &conn.ws_client);
     reporter.interval_ms = cfg.node.healthReporterIntervalMs;
     reporter.setMutex(&ws_mutex);
+    reporter.setSendQueue(&outbound);
     reporter.start() catch |err| {
         logger.warn("Failed to start health reporter: {s}", .{@errorName(err)});
     };
     defer reporter.stop();
 
+    var exporter: ?MetricsExporter = null;
+    if (cfg.node.metricsPort) |port| {
+        exporter = MetricsExporter.init(&node_ctx, &conn.stats, port);
+        exporter.?.start() catch |err| {
+            logger.warn("Failed to start metrics exporter on port {d}: {s}", .{ port, @errorName(err) });
+            exporter = null;
+        };
+    }
+    defer if (exporter) |*e| e.stop();
+
     // Main event loop
     while (!node_platform.stopRequested()) {
         conn.step();
@@ -491,20 +529,25 @@ pub fn runNodeMode(allocator: std.mem.Allocator, opts: NodeCliOptions) !void {
             continue;
         }
 
-        ws_mutex.lock();
+        if (writer.send_failed.swap(false, .acq_rel)) {
+            conn.disconnect();
+            continue;
+        }
+
+        // No ws_mutex here: only this thread connects or disconnects, and the
+        // writer thread's sends may overlap a (long) blocking read.
         const payload = conn.ws_client.receive() catch |err| {
-            ws_mutex.unlock();
             logger.err("WebSocket receive failed: {s}", .{@errorName(err)});
             conn.disconnect();
             continue;
         };
-        ws_mutex.unlock();
 
         var got_payload = false;
         if (payload) |text| {
             got_payload = true;
             defer allocator.free(text);
-            handleNodeMessage(allocator, &conn.ws_client, &conn, &pairing, &node_ctx, &router, config_path, &cfg, text) catch |err| {
+            const received_ns = std.time.nanoTimestamp();
+            handleNodeMessage(allocator, outbox, &conn, &pairing, &node_ctx, &router, config_path, &cfg, text, received_ns) catch |err| {
                 logger.err("Node message handling failed: {s}", .{@errorName(err)});
             };
         }
@@ -521,13 +564,13 @@ pub fn runNodeMode(allocator: std.mem.Allocator, opts: NodeCliOptions) !void {
             if (pairing.prompt.popDecision()) |approve| {
                 const request_id = pairing.request_id.?;
                 if (approve) {
-                    sendPairingDecision(allocator, &conn.ws_client, pairing.approve_method, request_id) catch |err| {
+                    sendPairingDecision(allocator, outbox.at(.control), pairing.approve_method, request_id) catch |err| {
                         logger.err("Failed to send pairing approval: {s}", .{@errorName(err)});
                     };
                     pairing.last_decision = .approved;
                     logger.info("Approved pairing request {s}.", .{request_id});
                 } else {
-                    sendPairingDecision(allocator, &conn.ws_client, pairing.reject_method, request_id) catch |err| {
+                    sendPairingDecision(allocator, outbox.at(.control), pairing.reject_method, request_id) catch |err| {
                         logger.err("Failed to send pairing rejection: {s}", .{@errorName(err)});
                     };
                     pairing.last_decision = .rejected;
@@ -611,6 +654,7 @@ fn handleNodeMessage(
     cfg_path: []const u8,
     cfg: *UnifiedConfig,
     text: []const u8,
+    received_ns: i128,
 ) !void {
     var parsed = try std.json.parseFromSlice(std.json.Value, allocator, text, .{});
     defer parsed.deinit();
@@ -639,13 +683,13 @@ fn handleNodeMessage(
         } else if (std.mem.eql(u8, event.string, "device.pair.requested") or
             std.mem.eql(u8, event.string, "node.pair.requested"))
         {
-            try handlePairingRequested(allocator, ws_client, pairing, value);
+            try handlePairingRequested(allocator, ws_client.at(.control), pairing, value);
         } else if (std.mem.eql(u8, event.string, "device.pair.resolved") or
             std.mem.eql(u8, event.string, "node.pair.resolved"))
         {
             try handlePairingResolved(allocator, conn, pairing, value);
         } else if (std.mem.eql(u8, event.string, "node.invoke.request")) {
-            try handleNodeInvokeRequestEvent(allocator, ws_client, node_ctx, router, value);
+            try handleNodeInvokeRequestEvent(allocator, ws_client, node_ctx, router, value, received_ns);
         }
     } else if (std.mem.eql(u8, frame_type, "res")) {
         _ = value.object.get("id") orelse return;
@@ -759,7 +803,7 @@ fn handleNodeMessage(
         if (method != .string) return;
 
         if (std.mem.eql(u8, method.string, "node.invoke")) {
-            try handleNodeInvoke(allocator, ws_client, node_ctx, router, value);
+            try handleNodeInvoke(allocator, ws_client, node_ctx, router, value, received_ns);
         }
     }
 }
@@ -919,6 +963,7 @@ fn handleNodeInvoke(
     node_ctx: *NodeContext,
     router: *CommandRouter,
     request: std.json.Value,
+    received_ns: i128,
 ) !void {
     // Legacy request form ("req" method="node.invoke"). Keep for compatibility.
     const request_id = request.object.get("id") orelse return;
@@ -936,12 +981,16 @@ fn handleNodeInvoke(
     node_ctx.state = .executing;
     defer node_ctx.state = .idle;
 
-    // Use a per-invocation arena for handler allocations (screenshots, stdout/stderr, etc.)
-    // to avoid unbounded leaks.
-    var arena = std.heap.ArenaAllocator.init(allocator);
-    defer arena.deinit();
+    // Per-invocation arena for handler allocations (screenshots, stdout/stderr, etc.).
+    // Pooled arenas keep their capacity between invokes, up to a cap.
+    const arena = try node_ctx.invoke_arenas.acquire();
+    defer node_ctx.invoke_arenas.release(arena);
     const aa = arena.allocator();
 
+    const metrics_cmd = node_context.Command.fromString(command.string);
+    if (metrics_cmd) |c| node_ctx.command_metrics.recordPhase(c, .queue, std.time.nanoTimestamp() - received_ns);
+
+    defer node_ctx.clearInvokeAttachments();
     const result = router.route(aa, node_ctx, command.string, command_params) catch |err| {
         logger.err("Command execution failed: {s}", .{@errorName(err)});
         const error_response = try buildErrorResponse(allocator, request_id.string, err);
@@ -950,12 +999,26 @@ fn handleNodeInvoke(
         return;
     };
 
+    const serialize_start_ns = std.time.nanoTimestamp();
     const response = try buildSuccessResponse(allocator, request_id.string, result);
     defer {
         allocator.free(response.payload);
         allocator.free(response.id);
     }
+    const send_start_ns = std.time.nanoTimestamp();
+    try sendInvokeAttachments(allocator, ws_client, node_ctx, request_id.string);
     try ws_client.send(response.payload);
+    if (metrics_cmd) |c| recordSendMetrics(node_ctx, c, response.payload.len, serialize_start_ns, send_start_ns);
+}
+
+/// Serialize/send timings and payload size (result JSON plus attachments).
+fn recordSendMetrics(node_ctx: *NodeContext, cmd: node_context.Command, json_len: usize, serialize_start_ns: i128, send_start_ns: i128) void {
+    const done_ns = std.time.nanoTimestamp();
+    var payload_bytes = json_len;
+    for (node_ctx.invoke_attachments.items) |att| payload_bytes += att.bytes.len;
+    node_ctx.command_metrics.recordPhase(cmd, .serialize, send_start_ns - serialize_start_ns);
+    node_ctx.command_metrics.recordPhase(cmd, .send, done_ns - send_start_ns);
+    node_ctx.command_metrics.recordPayload(cmd, payload_bytes);
 }
 
 fn handleNodeInvokeRequestEvent(
@@ -964,6 +1027,7 @@ fn handleNodeInvokeRequestEvent(
     node_ctx: *NodeContext,
     router: *CommandRouter,
     frame: std.json.Value,
+    received_ns: i128,
 ) !void {
     // Gateway sends node.invoke.request as an event, expects node.invoke.result as a request.
     const payload = frame.object.get("payload") orelse return;
@@ -978,10 +1042,26 @@ fn handleNodeInvokeRequestEvent(
     const command = payload.object.get("command") orelse return;
     if (command != .string) return;
 
-    // Use a per-invocation arena for handler allocations (screenshots, stdout/stderr, etc.)
-    // to avoid unbounded leaks.
-    var arena = std.heap.ArenaAllocator.init(allocator);
-    defer arena.deinit();
+    // Gateway retries reuse the idempotency key; older gateways only reuse the invoke id.
+    const cache_key = blk: {
+        if (payload.object.get("idempotencyKey")) |key| {
+            if (key == .string and key.string.len > 0) break :blk key.string;
+        }
+        break :blk invoke_id.string;
+    };
+    if (try node_ctx.invoke_cache.lookup(allocator, cache_key)) |cached| {
+        defer allocator.free(cached);
+        logger.info("Replaying cached result for {s} ({s})", .{ command.string, invoke_id.string });
+        const json = try serializeNodeInvokeResultOk(allocator, invoke_id.string, node_id.string, cached);
+        defer allocator.free(json);
+        try ws_client.send(json);
+        return;
+    }
+
+    // Per-invocation arena for handler allocations (screenshots, stdout/stderr, etc.).
+    // Pooled arenas keep their capacity between invokes, up to a cap.
+    const arena = try node_ctx.invoke_arenas.acquire();
+    defer node_ctx.invoke_arenas.release(arena);
     const aa = arena.allocator();
 
     var command_params: std.json.Value = std.json.Value{ .object = std.json.ObjectMap.init(aa) };
@@ -999,22 +1079,266 @@ fn handleNodeInvokeRequestEvent(
     node_ctx.state = .executing;
     defer node_ctx.state = .idle;
 
+    // Per-phase timings; the router records `exec` itself.
+    const metrics_cmd = node_context.Command.fromString(command.string);
+    if (metrics_cmd) |c| node_ctx.command_metrics.recordPhase(c, .queue, std.time.nanoTimestamp() - received_ns);
+
+    defer node_ctx.clearInvokeAttachments();
     const result = router.route(aa, node_ctx, command.string, command_params) catch |err| {
         logger.err("Command execution failed: {s}", .{@errorName(err)});
+        // Failures are not cached: a retry gets a fresh attempt.
         try sendNodeInvokeResultError(allocator, ws_client, invoke_id.string, node_id.string, err);
         return;
     };
 
-    try sendNodeInvokeResultOk(allocator, ws_client, invoke_id.string, node_id.string, result);
+    const serialize_start_ns = std.time.nanoTimestamp();
+    // Chunked results are opt-in: gateways that do not ask for them get the payload inline.
+    const accept_chunked = if (payload.object.get("acceptChunked")) |v| v == .bool and v.bool else false;
+    var stream = try ResultStream(@TypeOf(ws_client)).init(aa, ws_client, invoke_id.string, accept_chunked);
+    try stream.write(result);
+    const send_start_ns = std.time.nanoTimestamp();
+
+    // Cache before sending, so a retry after a connection lost mid-send is
+    // replayed. Chunked results and results with attachments are not cached
+    // (the bytes are not kept).
+    if (stream.inlinePayload()) |inline_json| {
+        if (node_ctx.invoke_attachments.items.len == 0) {
+            node_ctx.invoke_cache.store(cache_key, inline_json) catch |err| {
+                logger.warn("Failed to cache invoke result: {s}", .{@errorName(err)});
+            };
+        }
+    }
+
+    const sent_bytes = try stream.complete(node_ctx, node_id.string);
+    if (metrics_cmd) |c| recordSendMetrics(node_ctx, c, sent_bytes, serialize_start_ns, send_start_ns);
 }
 
-fn sendNodeInvokeResultOk(
+const attachment_chunk_size: usize = 256 * 1024;
+const result_chunk_size: usize = 256 * 1024;
+
+/// Header of a `node.invoke.result.chunk` binary frame; `size` and `sha256`
+/// are only set on the final chunk.
+const ResultChunkHeader = struct {
+    type: []const u8 = "node.invoke.result.chunk",
+    invokeId: []const u8,
+    seq: usize,
+    offset: usize,
+    final: bool,
+    size: ?usize = null,
+    sha256: ?[]const u8 = null,
+};
+
+/// Serializes an invoke result through a chunk-sized buffer. A payload that
+/// fits in one chunk goes out inline in `node.invoke.result`. When the gateway
+/// set `acceptChunked` on the invoke, anything larger is streamed as
+/// `node.invoke.result.chunk` binary frames while it is being serialized, so at
+/// most one chunk of JSON is held at a time. Otherwise the buffer grows and
+/// the whole payload goes inline.
+fn ResultStream(comptime Client: type) type {
+    return struct {
+        const Self = @This();
+
+        interface: std.Io.Writer,
+        allocator: std.mem.Allocator,
+        ws_client: Client,
+        invoke_id: []const u8,
+        chunked: bool,
+        /// Scratch for [u32 header length][header][chunk]; masked in place on send.
+        frame: std.ArrayList(u8) = .empty,
+        sha: std.crypto.hash.sha2.Sha256 = .init(.{}),
+        offset: usize = 0,
+        chunks: usize = 0,
+        sent_bytes: usize = 0,
+        send_error: ?anyerror = null,
+
+        fn init(allocator: std.mem.Allocator, ws_client: Client, invoke_id: []const u8, chunked: bool) !Self {
+            return .{
+                .interface = .{ .vtable = &.{ .drain = drain }, .buffer = try allocator.alloc(u8, result_chunk_size) },
+                .allocator = allocator,
+                .ws_client = ws_client,
+                .invoke_id = invoke_id,
+                .chunked = chunked,
+            };
+        }
+
+        fn write(self: *Self, result: std.json.Value) !void {
+            std.json.Stringify.value(result, .{}, &self.interface) catch return self.send_error orelse error.WriteFailed;
+        }
+
+        /// The whole payload, when it never spilled into chunks.
+        fn inlinePayload(self: *Self) ?[]const u8 {
+            return if (self.chunks == 0) self.interface.buffered() else null;
+        }
+
+        /// Send the last chunk (if streaming), then attachments, then the result
+        /// frame that completes the invoke. Returns the result bytes sent,
+        /// attachments excluded.
+        fn complete(self: *Self, node_ctx: *NodeContext, node_id: []const u8) !usize {
+            const json = if (self.inlinePayload()) |payload|
+                try serializeNodeInvokeResultOk(self.allocator, self.invoke_id, node_id, payload)
+            else blk: {
+                const digest = try self.emitChunk(self.interface.buffered(), true);
+                self.interface.end = 0;
+                break :blk try serializeNodeInvokeResultChunked(self.allocator, self.invoke_id, node_id, self.offset, self.chunks, &digest);
+            };
+
+            // Attachments go first so the gateway holds the bytes by the time the
+            // result that references them arrives.
+            try sendInvokeAttachments(self.allocator, self.ws_client, node_ctx, self.invoke_id);
+            try self.ws_client.send(json);
+            return self.sent_bytes + json.len;
+        }
+
+        fn drain(w: *std.Io.Writer, data: []const []const u8, splat: usize) std.Io.Writer.Error!usize {
+            const self: *Self = @alignCast(@fieldParentPtr("interface", w));
+            if (!self.chunked) {
+                // Make room for the first pending slice; the caller retries into the buffer.
+                const needed = w.end + data[0].len;
+                w.buffer = self.allocator.realloc(w.buffer, @max(needed, w.buffer.len * 2)) catch return error.WriteFailed;
+                return 0;
+            }
+            if (w.end > 0) {
+                _ = self.emitChunk(w.buffered(), false) catch |err| {
+                    self.send_error = err;
+                    return error.WriteFailed;
+                };
+                w.end = 0;
+            }
+            // Refill from the first pending slice; the caller loops for the rest.
+            if (data.len == 1 and splat == 0) return 0;
+            const n = @min(data[0].len, w.buffer.len);
+            @memcpy(w.buffer[0..n], data[0][0..n]);
+            w.end = n;
+            return n;
+        }
+
+        /// Returns the hex SHA-256 of the whole payload when `final`.
+        fn emitChunk(self: *Self, bytes: []const u8, final: bool) ![64]u8 {
+            self.sha.update(bytes);
+            var digest_hex: [64]u8 = undefined;
+            if (final) {
+                var digest: [std.crypto.hash.sha2.Sha256.digest_length]u8 = undefined;
+                self.sha.final(&digest);
+                digest_hex = std.fmt.bytesToHex(digest, .lower);
+            }
+
+            var header_buf: [1024]u8 = undefined;
+            var header_writer = std.Io.Writer.fixed(&header_buf);
+            try std.json.Stringify.value(ResultChunkHeader{
+                .invokeId = self.invoke_id,
+                .seq = self.chunks,
+                .offset = self.offset,
+                .final = final,
+                .size = if (final) self.offset + bytes.len else null,
+                .sha256 = if (final) &digest_hex else null,
+            }, .{ .emit_null_optional_fields = false }, &header_writer);
+            const header = header_writer.buffered();
+
+            self.frame.clearRetainingCapacity();
+            try self.frame.ensureTotalCapacity(self.allocator, 4 + header.len + bytes.len);
+            var len_buf: [4]u8 = undefined;
+            std.mem.writeInt(u32, &len_buf, @intCast(header.len), .big);
+            self.frame.appendSliceAssumeCapacity(&len_buf);
+            self.frame.appendSliceAssumeCapacity(header);
+            self.frame.appendSliceAssumeCapacity(bytes);
+            try self.ws_client.sendBinary(self.frame.items);
+
+            self.sent_bytes += self.frame.items.len;
+            self.offset += bytes.len;
+            self.chunks += 1;
+            return digest_hex;
+        }
+    };
+}
+
+/// Send each queued attachment as one or more binary frames:
+/// [u32 big-endian header length][JSON header][chunk bytes].
+fn sendInvokeAttachments(
     allocator: std.mem.Allocator,
     ws_client: anytype,
+    node_ctx: *NodeContext,
     invoke_id: []const u8,
-    node_id: []const u8,
-    payload: std.json.Value,
 ) !void {
+    if (node_ctx.invoke_attachments.items.len == 0) return;
+
+    // One scratch buffer for every frame; sendBinary masks it in place.
+    var frame = std.ArrayList(u8).empty;
+    defer frame.deinit(allocator);
+
+    for (node_ctx.invoke_attachments.items) |att| {
+        const chunk_count = @max(1, std.math.divCeil(usize, att.bytes.len, attachment_chunk_size) catch unreachable);
+        var seq: usize = 0;
+        while (seq < chunk_count) : (seq += 1) {
+            const start = seq * attachment_chunk_size;
+            const end = @min(start + attachment_chunk_size, att.bytes.len);
+
+            const header = try std.json.Stringify.valueAlloc(allocator, .{
+                .type = "node.invoke.attachment",
+                .invokeId = invoke_id,
+                .attachmentId = att.id,
+                .contentType = att.content_type,
+                .size = att.bytes.len,
+                .offset = start,
+                .seq = seq,
+                .final = seq + 1 == chunk_count,
+            }, .{});
+            defer allocator.free(header);
+
+            frame.clearRetainingCapacity();
+            try frame.ensureTotalCapacity(allocator, 4 + header.len + (end - start));
+            var len_buf: [4]u8 = undefined;
+            std.mem.writeInt(u32, &len_buf, @intCast(header.len), .big);
+            frame.appendSliceAssumeCapacity(&len_buf);
+            frame.appendSliceAssumeCapacity(header);
+            frame.appendSliceAssumeCapacity(att.bytes[start..end]);
+
+            try ws_client.sendBinary(frame.items);
+        }
+        logger.debug("Sent attachment {s} ({d} bytes, {d} frames)", .{ att.id, att.bytes.len, chunk_count });
+    }
+}
+
+/// `payload_json` is the already-serialized result, embedded verbatim so the
+/// same bytes can be cached and replayed.
+fn serializeNodeInvokeResultOk(
+    allocator: std.mem.Allocator,
+    invoke_id: []const u8,
+    node_id: []const u8,
+    payload_json: []const u8,
+) ![]u8 {
+    var out: std.Io.Writer.Allocating = .init(allocator);
+    errdefer out.deinit();
+    var jw: std.json.Stringify = .{ .writer = &out.writer };
+    try jw.beginObject();
+    try jw.objectField("type");
+    try jw.write("req");
+    try jw.objectField("id");
+    try jw.write(invoke_id);
+    try jw.objectField("method");
+    try jw.write("node.invoke.result");
+    try jw.objectField("params");
+    try jw.beginObject();
+    try jw.objectField("id");
+    try jw.write(invoke_id);
+    try jw.objectField("nodeId");
+    try jw.write(node_id);
+    try jw.objectField("ok");
+    try jw.write(true);
+    try jw.objectField("payload");
+    try jw.print("{s}", .{payload_json});
+    try jw.endObject();
+    try jw.endObject();
+    return out.toOwnedSlice();
+}
+
+fn serializeNodeInvokeResultChunked(
+    allocator: std.mem.Allocator,
+    invoke_id: []const u8,
+    node_id: []const u8,
+    size: usize,
+    chunks: usize,
+    sha256: []const u8,
+) ![]u8 {
     const frame = .{
         .type = "req",
         .id = invoke_id,
@@ -1023,12 +1347,15 @@ fn sendNodeInvokeResultOk(
             .id = invoke_id,
             .nodeId = node_id,
             .ok = true,
-            .payload = payload,
+            .payloadChunked = .{
+                .encoding = "json",
+                .size = size,
+                .chunks = chunks,
+                .sha256 = sha256,
+            },
         },
     };
-    const json = try messages.serializeMessage(allocator, frame);
-    defer allocator.free(json);
-    try ws_client.send(json);
+    return messages.serializeMessage(allocator, frame);
 }
 
 fn sendNodeInvokeResultError(
@@ -1174,3 +1501,33 @@ const ErrorDetail = struct {
     code: []const u8,
     message: []const u8,
 };
+
+test "invoke results stay inline unless the gateway accepts chunks" {
+    const FakeClient = struct {
+        binary_frames: usize = 0,
+
+        pub fn sendBinary(self: *@This(), bytes: []const u8) !void {
+            _ = bytes;
+            self.binary_frames += 1;
+        }
+    };
+    var arena = std.heap.ArenaAllocator.init(std.testing.allocator);
+    defer arena.deinit();
+    const aa = arena.allocator();
+
+    const big = try aa.alloc(u8, result_chunk_size + result_chunk_size / 2);
+    @memset(big, 'x');
+    const result: std.json.Value = .{ .string = big };
+
+    var inline_client: FakeClient = .{};
+    var inline_stream = try ResultStream(*FakeClient).init(aa, &inline_client, "inv-1", false);
+    try inline_stream.write(result);
+    try std.testing.expectEqual(@as(usize, 0), inline_client.binary_frames);
+    try std.testing.expectEqual(big.len + 2, inline_stream.inlinePayload().?.len);
+
+    var chunked_client: FakeClient = .{};
+    var chunked_stream = try ResultStream(*FakeClient).init(aa, &chunked_client, "inv-2", true);
+    try chunked_stream.write(result);
+    try std.testing.expect(chunked_client.binary_frames > 0);
+    try std.testing.expect(chunked_stream.inlinePayload() == null);
+}
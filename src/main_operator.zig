@@ -30,6 +30,13 @@ fn consumedGlobalArgArity(arg: []const u8) ?usize {
     if (std.mem.eql(u8, arg, "--config") or
         std.mem.eql(u8, arg, "--update-url") or
         std.mem.eql(u8, arg, "--read-timeout-ms") or
+        std.mem.eql(u8, arg, "--batch") or
+        std.mem.eql(u8, arg, "--fanout") or
+        std.mem.eql(u8, arg, "--parallel") or
+        std.mem.eql(u8, arg, "--bench-connections") or
+        std.mem.eql(u8, arg, "--bench-rate") or
+        std.mem.eql(u8, arg, "--bench-duration-s") or
+        std.mem.eql(u8, arg, "--bench-mix") or
         std.mem.eql(u8, arg, "--session") or
         std.mem.eql(u8, arg, "--node") or
         std.mem.eql(u8, arg, "--node-service-mode") or
@@ -49,6 +56,8 @@ fn consumedGlobalArgArity(arg: []const u8) ?usize {
         std.mem.eql(u8, arg, "--insecure") or
         std.mem.eql(u8, arg, "--check-update-only") or
         std.mem.eql(u8, arg, "--interactive") or
+        std.mem.eql(u8, arg, "--daemon") or
+        std.mem.eql(u8, arg, "--no-daemon") or
         std.mem.eql(u8, arg, "--windows-service") or
         std.mem.eql(u8, arg, "--node-mode") or
         std.mem.eql(u8, arg, "--save-config"))
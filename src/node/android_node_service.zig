@@ -304,10 +304,12 @@ fn handleNodeInvokeLegacy(
     node_ctx.state = .executing;
     defer node_ctx.state = .idle;
 
-    var arena = std.heap.ArenaAllocator.init(allocator);
-    defer arena.deinit();
+    const arena = try node_ctx.invoke_arenas.acquire();
+    defer node_ctx.invoke_arenas.release(arena);
     const aa = arena.allocator();
 
+    // Binary attachments are not forwarded by the node-host service yet.
+    defer node_ctx.clearInvokeAttachments();
     const result = router.route(aa, node_ctx, command.string, command_params) catch |err| {
         logger.err("node-host: command failed: {s}", .{@errorName(err)});
         const resp = try buildErrorResponse(allocator, request_id.string, err);
@@ -344,8 +346,8 @@ fn handleNodeInvokeRequestEvent(
     const command = payload.object.get("command") orelse return;
     if (command != .string) return;
 
-    var arena = std.heap.ArenaAllocator.init(allocator);
-    defer arena.deinit();
+    const arena = try node_ctx.invoke_arenas.acquire();
+    defer node_ctx.invoke_arenas.release(arena);
     const aa = arena.allocator();
 
     var command_params: std.json.Value = std.json.Value{ .object = std.json.ObjectMap.init(aa) };
@@ -363,6 +365,8 @@ fn handleNodeInvokeRequestEvent(
     node_ctx.state = .executing;
     defer node_ctx.state = .idle;
 
+    // Binary attachments are not forwarded by the node-host service yet.
+    defer node_ctx.clearInvokeAttachments();
     const result = router.route(aa, node_ctx, command.string, command_params) catch |err| {
         logger.err("node-host: command failed: {s}", .{@errorName(err)});
         try sendNodeInvokeResultError(allocator, ws_client, ws_mutex, invoke_id.string, node_id.string, err);
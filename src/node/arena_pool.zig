@@ -0,0 +1,85 @@
+const std = @import("std");
+
+/// Per-invocation arenas that are reset and reused instead of being rebuilt
+/// for every invoke, so steady-state commands allocate from memory the arena
+/// already holds.
+///
+/// `release` keeps at most `retain_limit` bytes per arena, so one huge result
+/// (a screenshot, a large stdout) does not pin that much memory for good.
+pub const ArenaPool = struct {
+    backing: std.mem.Allocator,
+    mutex: std.Thread.Mutex = .{},
+    idle: [max_idle]*std.heap.ArenaAllocator = undefined,
+    idle_len: usize = 0,
+    retain_limit: usize = default_retain_limit,
+
+    pub const max_idle = 4;
+    pub const default_retain_limit: usize = 4 * 1024 * 1024;
+
+    pub fn init(backing: std.mem.Allocator) ArenaPool {
+        return .{ .backing = backing };
+    }
+
+    pub fn deinit(self: *ArenaPool) void {
+        for (self.idle[0..self.idle_len]) |arena| self.destroy(arena);
+        self.idle_len = 0;
+    }
+
+    pub fn acquire(self: *ArenaPool) !*std.heap.ArenaAllocator {
+        {
+            self.mutex.lock();
+            defer self.mutex.unlock();
+            if (self.idle_len > 0) {
+                self.idle_len -= 1;
+                return self.idle[self.idle_len];
+            }
+        }
+        const arena = try self.backing.create(std.heap.ArenaAllocator);
+        arena.* = std.heap.ArenaAllocator.init(self.backing);
+        return arena;
+    }
+
+    pub fn release(self: *ArenaPool, arena: *std.heap.ArenaAllocator) void {
+        _ = arena.reset(.{ .retain_with_limit = self.retain_limit });
+
+        self.mutex.lock();
+        defer self.mutex.unlock();
+        if (self.idle_len < max_idle) {
+            self.idle[self.idle_len] = arena;
+            self.idle_len += 1;
+            return;
+        }
+        self.destroy(arena);
+    }
+
+    fn destroy(self: *ArenaPool, arena: *std.heap.ArenaAllocator) void {
+        arena.deinit();
+        self.backing.destroy(arena);
+    }
+};
+
+test "arena pool reuses released arenas and caps retained memory" {
+    var pool = ArenaPool.init(std.testing.allocator);
+    defer pool.deinit();
+    pool.retain_limit = 64 * 1024;
+
+    const first = try pool.acquire();
+    _ = try first.allocator().alloc(u8, 1024);
+    pool.release(first);
+
+    const again = try pool.acquire();
+    try std.testing.expectEqual(first, again);
+    try std.testing.expect(again.queryCapacity() >= 1024);
+
+    _ = try again.allocator().alloc(u8, 1024 * 1024);
+    pool.release(again);
+    try std.testing.expect(again.queryCapacity() <= 64 * 1024);
+
+    // Concurrent acquires get distinct arenas.
+    const a = try pool.acquire();
+    const b = try pool.acquire();
+    try std.testing.expect(a != b);
+    pool.release(a);
+    pool.release(b);
+    try std.testing.expectEqual(@as(usize, 2), pool.idle_len);
+}
@@ -22,6 +22,36 @@ pub const CanvasConfig = struct {
     chrome_debug_port: u16 = 9222,
 };
 
+/// How the Chrome DevTools port was discovered during startup.
+pub const PortDiscovery = enum {
+    configured,
+    inotify,
+    polling,
+};
+
+/// Wall-clock breakdown of canvas cold start (milliseconds per phase).
+pub const StartupTimings = struct {
+    resolve_executable_ms: i64 = 0,
+    user_data_dir_ms: i64 = 0,
+    spawn_ms: i64 = 0,
+    devtools_port_ms: i64 = 0,
+    devtools_ready_ms: i64 = 0,
+    total_ms: i64 = 0,
+    port_discovery: PortDiscovery = .configured,
+};
+
+/// Outcome of one expression in a `Canvas.evalBatch` call. Strings are owned
+/// by the canvas allocator; release with `Canvas.freeEvalOutcomes`.
+pub const EvalOutcome = union(enum) {
+    ok: []u8,
+    /// Exception text reported by the page.
+    exception: []u8,
+    /// A transport/protocol failure; the batch stops here.
+    failed: anyerror,
+    /// Not run because an earlier expression failed and `stop_on_error` was set.
+    skipped,
+};
+
 /// Canvas state
 pub const CanvasState = enum {
     hidden,
@@ -42,6 +72,7 @@ pub const Canvas = struct {
     chrome_process: ?std.process.Child = null,
     chrome_runtime_debug_port: ?u16 = null,
     chrome_user_data_dir: ?[]const u8 = null,
+    startup_timings: StartupTimings = .{},
 
     const WebKitContext = opaque {};
 
@@ -160,6 +191,28 @@ pub const Canvas = struct {
         }
     }
 
+    /// Evaluate several expressions in order over a single DevTools connection.
+    /// Page exceptions are reported per expression rather than failing the batch.
+    pub fn evalBatch(self: *Canvas, expressions: []const []const u8, stop_on_error: bool) ![]EvalOutcome {
+        if (self.config.backend == .none) {
+            return error.CanvasDisabled;
+        }
+
+        switch (self.config.backend) {
+            .webkitgtk => return error.NotImplemented,
+            .chrome => return try self.evalBatchChrome(expressions, stop_on_error),
+            .none => unreachable,
+        }
+    }
+
+    pub fn freeEvalOutcomes(self: *Canvas, outcomes: []EvalOutcome) void {
+        for (outcomes) |outcome| switch (outcome) {
+            .ok, .exception => |text| self.allocator.free(text),
+            .failed, .skipped => {},
+        };
+        self.allocator.free(outcomes);
+    }
+
     /// Capture screenshot
     pub fn snapshot(self: *Canvas, output_path: []const u8) !void {
         if (self.config.backend == .none) {
@@ -230,9 +283,14 @@ pub const Canvas = struct {
     // =========================================================================
 
     fn initChrome(self: *Canvas) !void {
+        const init_start_ms = node_platform.nowMs();
+        var phase_start_ms = init_start_ms;
+
         const chrome_path = try self.resolveChromeExecutableAlloc();
         defer self.allocator.free(chrome_path);
+        self.startup_timings.resolve_executable_ms = node_platform.nowMs() - phase_start_ms;
 
+        phase_start_ms = node_platform.nowMs();
         const user_data_dir = try self.makeChromeUserDataDirAlloc();
         self.chrome_user_data_dir = user_data_dir;
         errdefer {
@@ -240,6 +298,7 @@ pub const Canvas = struct {
             self.allocator.free(user_data_dir);
             self.chrome_user_data_dir = null;
         }
+        self.startup_timings.user_data_dir_ms = node_platform.nowMs() - phase_start_ms;
 
         // Start Chrome in headless mode with remote debugging.
         const debug_port_arg = try std.fmt.allocPrint(self.allocator, "--remote-debugging-port={d}", .{self.config.chrome_debug_port});
@@ -268,6 +327,15 @@ pub const Canvas = struct {
         child.stdout_behavior = .Ignore;
         child.stderr_behavior = .Ignore;
 
+        // Arm the DevToolsActivePort watch before Chrome starts so we cannot
+        // miss the write that announces the port.
+        var port_watch: ?DevToolsPortWatch = if (self.config.chrome_debug_port == 0)
+            DevToolsPortWatch.init(user_data_dir)
+        else
+            null;
+        defer if (port_watch) |*w| w.deinit();
+
+        phase_start_ms = node_platform.nowMs();
         try child.spawn();
         self.chrome_process = child;
         errdefer {
@@ -277,23 +345,40 @@ pub const Canvas = struct {
             }
             self.chrome_process = null;
         }
+        self.startup_timings.spawn_ms = node_platform.nowMs() - phase_start_ms;
 
         // Port 0 means Chrome picks an available debugging port.
+        phase_start_ms = node_platform.nowMs();
         const debug_port = if (self.config.chrome_debug_port == 0)
-            try self.waitForDevToolsPortAlloc(user_data_dir)
-        else
-            self.config.chrome_debug_port;
+            try self.waitForDevToolsPortAlloc(user_data_dir, if (port_watch) |*w| w else null)
+        else blk: {
+            self.startup_timings.port_discovery = .configured;
+            break :blk self.config.chrome_debug_port;
+        };
         self.chrome_runtime_debug_port = debug_port;
-
-        // Wait for DevTools endpoint to become ready.
-        const start_ms = node_platform.nowMs();
-        while (node_platform.nowMs() - start_ms < 10_000) {
+        self.startup_timings.devtools_port_ms = node_platform.nowMs() - phase_start_ms;
+
+        // Wait for DevTools endpoint to become ready. Chrome writes
+        // DevToolsActivePort only after it is listening, so this usually
+        // succeeds on the first attempt; back off gently otherwise.
+        phase_start_ms = node_platform.nowMs();
+        var retry_delay_ms: u64 = 10;
+        while (node_platform.nowMs() - phase_start_ms < 10_000) {
             const body = self.chromeHttpGetAlloc("/json/version") catch {
-                node_platform.sleepMs(100);
+                node_platform.sleepMs(retry_delay_ms);
+                retry_delay_ms = @min(retry_delay_ms * 2, 100);
                 continue;
             };
             self.allocator.free(body);
-            logger.info("Chrome started on debug port {d}", .{debug_port});
+
+            const now_ms = node_platform.nowMs();
+            self.startup_timings.devtools_ready_ms = now_ms - phase_start_ms;
+            self.startup_timings.total_ms = now_ms - init_start_ms;
+            const t = self.startup_timings;
+            logger.info(
+                "Chrome started on debug port {d} in {d}ms (resolve={d}ms dir={d}ms spawn={d}ms port={d}ms via {s} ready={d}ms)",
+                .{ debug_port, t.total_ms, t.resolve_executable_ms, t.user_data_dir_ms, t.spawn_ms, t.devtools_port_ms, @tagName(t.port_discovery), t.devtools_ready_ms },
+            );
             return;
         }
 
@@ -347,52 +432,108 @@ pub const Canvas = struct {
         return self.allocator.dupe(u8, if (builtin.os.tag == .windows) "." else "/tmp");
     }
 
-    fn waitForDevToolsPortAlloc(self: *Canvas, user_data_dir: []const u8) !u16 {
+    fn waitForDevToolsPortAlloc(self: *Canvas, user_data_dir: []const u8, watch: ?*DevToolsPortWatch) !u16 {
         const devtools_port_file = try std.fs.path.join(self.allocator, &.{ user_data_dir, "DevToolsActivePort" });
         defer self.allocator.free(devtools_port_file);
 
         const start_ms = node_platform.nowMs();
-        while (node_platform.nowMs() - start_ms < 10_000) {
-            const file = std.fs.cwd().openFile(devtools_port_file, .{}) catch {
-                node_platform.sleepMs(50);
-                continue;
-            };
-            defer file.close();
+        const timeout_ms: i64 = 10_000;
 
-            const contents = file.readToEndAlloc(self.allocator, 4 * 1024) catch {
-                node_platform.sleepMs(50);
-                continue;
-            };
-            defer self.allocator.free(contents);
+        if (watch) |w| {
+            self.startup_timings.port_discovery = .inotify;
+            while (true) {
+                // Check before blocking: the file may have landed between the
+                // watch being armed and now.
+                if (readDevToolsActivePort(devtools_port_file)) |port| return port;
 
-            var line_it = std.mem.splitScalar(u8, contents, '\n');
-            const line = line_it.next() orelse {
-                node_platform.sleepMs(50);
-                continue;
-            };
+                const remaining_ms = timeout_ms - (node_platform.nowMs() - start_ms);
+                if (remaining_ms <= 0) return error.Timeout;
 
-            const trimmed = std.mem.trim(u8, line, " \t\r\n");
-            if (trimmed.len == 0) {
-                node_platform.sleepMs(50);
-                continue;
-            }
-
-            const port = std.fmt.parseInt(u16, trimmed, 10) catch {
-                node_platform.sleepMs(50);
-                continue;
-            };
-
-            if (port == 0) {
-                node_platform.sleepMs(50);
-                continue;
+                w.waitForChange(remaining_ms) catch |err| {
+                    logger.warn("DevToolsActivePort watch failed ({s}); falling back to polling", .{@errorName(err)});
+                    break;
+                };
             }
+        }
 
-            return port;
+        self.startup_timings.port_discovery = .polling;
+        while (node_platform.nowMs() - start_ms < timeout_ms) {
+            if (readDevToolsActivePort(devtools_port_file)) |port| return port;
+            node_platform.sleepMs(50);
         }
 
         return error.Timeout;
     }
 
+    /// Parse the port from Chrome's DevToolsActivePort file. Returns null while the
+    /// file is missing, partially written, or does not yet hold a usable port.
+    fn readDevToolsActivePort(path: []const u8) ?u16 {
+        const file = std.fs.cwd().openFile(path, .{}) catch return null;
+        defer file.close();
+
+        var buf: [256]u8 = undefined;
+        const n = file.readAll(&buf) catch return null;
+        return parseDevToolsActivePort(buf[0..n]);
+    }
+
+    fn parseDevToolsActivePort(contents: []const u8) ?u16 {
+        var line_it = std.mem.splitScalar(u8, contents, '\n');
+        const line = line_it.next() orelse return null;
+
+        const trimmed = std.mem.trim(u8, line, " \t\r\n");
+        if (trimmed.len == 0) return null;
+
+        const port = std.fmt.parseInt(u16, trimmed, 10) catch return null;
+        if (port == 0) return null;
+        return port;
+    }
+
+    /// inotify watch on the Chrome user-data dir (Linux only).
+    ///
+    /// Chrome publishes DevToolsActivePort via write-to-temp + rename, so we wake on
+    /// CLOSE_WRITE and MOVED_TO and re-read the file. Any failure to set the watch up
+    /// yields null and the caller keeps the polling path.
+    const DevToolsPortWatch = struct {
+        fd: std.posix.fd_t,
+
+        fn init(dir: []const u8) ?DevToolsPortWatch {
+            if (comptime builtin.os.tag != .linux) return null;
+
+            const linux = std.os.linux;
+            const fd = std.posix.inotify_init1(linux.IN.NONBLOCK | linux.IN.CLOEXEC) catch |err| {
+                logger.debug("inotify_init1 failed: {s}", .{@errorName(err)});
+                return null;
+            };
+            _ = std.posix.inotify_add_watch(fd, dir, linux.IN.CLOSE_WRITE | linux.IN.MOVED_TO | linux.IN.CREATE) catch |err| {
+                logger.debug("inotify_add_watch({s}) failed: {s}", .{ dir, @errorName(err) });
+                std.posix.close(fd);
+                return null;
+            };
+            return .{ .fd = fd };
+        }
+
+        fn deinit(self: *DevToolsPortWatch) void {
+            std.posix.close(self.fd);
+        }
+
+        /// Block until the directory changes or `timeout_ms` passes, then drain
+        /// queued events. Event contents are not inspected; the caller re-reads.
+        fn waitForChange(self: *DevToolsPortWatch, timeout_ms: i64) !void {
+            var fds = [_]std.posix.pollfd{.{ .fd = self.fd, .events = std.posix.POLL.IN, .revents = 0 }};
+            const wait_ms: i32 = @intCast(@min(timeout_ms, std.math.maxInt(i32)));
+            if (try std.posix.poll(&fds, wait_ms) == 0) return;
+
+            var buf: [4096]u8 = undefined;
+            while (true) {
+                const n = std.posix.read(self.fd, &buf) catch |err| switch (err) {
+                    error.WouldBlock => return,
+                    else => return err,
+                };
+                if (n == 0) return;
+            }
+        }
+    };
+
     fn resolveChromeExecutableAlloc(self: *Canvas) ![]u8 {
         if (self.config.chrome_path) |configured| {
             if (std.fs.path.isAbsolute(configured)) {
@@ -506,20 +647,80 @@ pub const Canvas = struct {
         return try extractRuntimeEvaluateResultAlloc(self.allocator, resp);
     }
 
+    fn evalBatchChrome(self: *Canvas, expressions: []const []const u8, stop_on_error: bool) ![]EvalOutcome {
+        const outcomes = try self.allocator.alloc(EvalOutcome, expressions.len);
+        @memset(outcomes, .skipped);
+        errdefer self.freeEvalOutcomes(outcomes);
+
+        var session = try self.openChromeCdpSession();
+        defer session.client.deinit();
+
+        // Sequential rather than pipelined: with awaitPromise a later expression
+        // must not start before an earlier one has settled.
+        for (expressions, outcomes, 0..) |js, *outcome, i| {
+            const resp = self.cdpSendCommandAlloc(&session, "Runtime.evaluate", .{
+                .expression = js,
+                .returnByValue = true,
+                .awaitPromise = true,
+            }) catch |err| {
+                // The session is no longer trustworthy after a transport error:
+                // this and every later expression fail with it, whatever `stop_on_error` says.
+                @memset(outcomes[i..], .{ .failed = err });
+                break;
+            };
+            defer self.allocator.free(resp);
+
+            outcome.* = evalOutcomeFromResponseAlloc(self.allocator, resp) catch |err| .{ .failed = err };
+            if (stop_on_error and outcome.* != .ok) break;
+        }
+
+        return outcomes;
+    }
+
     fn snapshotChrome(self: *Canvas, output_path: []const u8) !void {
         const encoded = try self.snapshotChromeBase64("png", null, null);
         defer self.allocator.free(encoded);
 
-        const decoded_len = try std.base64.standard.Decoder.calcSizeForSlice(encoded);
-        const decoded = try self.allocator.alloc(u8, decoded_len);
-        defer self.allocator.free(decoded);
-        try std.base64.standard.Decoder.decode(decoded, encoded);
+        const decoded = try decodeBase64InPlace(encoded);
 
         const file = try std.fs.cwd().createFile(output_path, .{ .truncate = true });
         defer file.close();
         try file.writeAll(decoded);
     }
 
+    /// Capture a screenshot and return the raw image bytes (caller owns, free with
+    /// `self.allocator`). Decodes in place, so the only copy is the CDP response itself.
+    pub fn snapshotBytes(self: *Canvas, format: []const u8, quality: ?u8, max_width: ?u32) ![]u8 {
+        const encoded = try self.snapshotBase64(format, quality, max_width);
+        errdefer self.allocator.free(encoded);
+
+        const decoded = try decodeBase64InPlace(encoded);
+        return try self.allocator.realloc(encoded, decoded.len);
+    }
+
+    const base64_chunk_len = 4096;
+
+    /// Decode standard base64 over the top of its own buffer and return the decoded
+    /// prefix. Works in fixed-size chunks so no allocation proportional to the image
+    /// is needed; output never overtakes input because 4 chars always become <= 3 bytes.
+    fn decodeBase64InPlace(buf: []u8) ![]u8 {
+        const decoder = std.base64.standard.Decoder;
+        var scratch: [base64_chunk_len / 4 * 3]u8 = undefined;
+
+        var src: usize = 0;
+        var dst: usize = 0;
+        while (src < buf.len) {
+            const end = @min(src + base64_chunk_len, buf.len);
+            const chunk = buf[src..end];
+            const n = try decoder.calcSizeForSlice(chunk);
+            try decoder.decode(scratch[0..n], chunk);
+            std.mem.copyForwards(u8, buf[dst .. dst + n], scratch[0..n]);
+            src = end;
+            dst += n;
+        }
+        return buf[0..dst];
+    }
+
     pub fn snapshotBase64(self: *Canvas, format: []const u8, quality: ?u8, max_width: ?u32) ![]u8 {
         if (self.config.backend == .none) return error.CanvasDisabled;
 
@@ -792,6 +993,17 @@ pub const Canvas = struct {
     }
 
     fn extractRuntimeEvaluateResultAlloc(allocator: std.mem.Allocator, raw: []const u8) ![]u8 {
+        return switch (try evalOutcomeFromResponseAlloc(allocator, raw)) {
+            .ok => |text| text,
+            .exception => |text| {
+                allocator.free(text);
+                return error.ExecutionFailed;
+            },
+            .failed, .skipped => unreachable,
+        };
+    }
+
+    fn evalOutcomeFromResponseAlloc(allocator: std.mem.Allocator, raw: []const u8) !EvalOutcome {
         var parsed = try std.json.parseFromSlice(std.json.Value, allocator, raw, .{
             .ignore_unknown_fields = true,
             .allocate = .alloc_always,
@@ -802,43 +1014,59 @@ pub const Canvas = struct {
         const root_result = parsed.value.object.get("result") orelse return error.Unexpected;
         if (root_result != .object) return error.Unexpected;
 
-        if (root_result.object.get("exceptionDetails") != null) {
-            return error.ExecutionFailed;
+        if (root_result.object.get("exceptionDetails")) |details| {
+            return .{ .exception = try exceptionTextAlloc(allocator, details) };
         }
 
         const runtime_result = root_result.object.get("result") orelse return error.Unexpected;
         if (runtime_result != .object) return error.Unexpected;
 
         if (runtime_result.object.get("value")) |value| {
-            return jsonValueToStringAlloc(allocator, value);
+            return .{ .ok = try jsonValueToStringAlloc(allocator, value) };
         }
 
         if (runtime_result.object.get("unserializableValue")) |uv| {
-            if (uv == .string) return allocator.dupe(u8, uv.string);
+            if (uv == .string) return .{ .ok = try allocator.dupe(u8, uv.string) };
         }
 
         if (runtime_result.object.get("description")) |desc| {
-            if (desc == .string) return allocator.dupe(u8, desc.string);
+            if (desc == .string) return .{ .ok = try allocator.dupe(u8, desc.string) };
         }
 
-        return allocator.dupe(u8, "undefined");
+        return .{ .ok = try allocator.dupe(u8, "undefined") };
+    }
+
+    /// Prefer the thrown value's description (e.g. "Error: boom\n    at ..."),
+    /// falling back to the summary text CDP always provides.
+    fn exceptionTextAlloc(allocator: std.mem.Allocator, details: std.json.Value) ![]u8 {
+        if (details == .object) {
+            if (details.object.get("exception")) |exception| {
+                if (exception == .object) {
+                    if (exception.object.get("description")) |desc| {
+                        if (desc == .string) return allocator.dupe(u8, desc.string);
+                    }
+                }
+            }
+            if (details.object.get("text")) |text| {
+                if (text == .string) return allocator.dupe(u8, text.string);
+            }
+        }
+        return allocator.dupe(u8, "exception");
     }
 
     fn extractScreenshotBase64Alloc(allocator: std.mem.Allocator, raw: []const u8) ![]u8 {
-        var parsed = try std.json.parseFromSlice(std.json.Value, allocator, raw, .{
+        // Typed parse with alloc_if_needed: `data` borrows from `raw` unless it had
+        // escapes, so the multi-megabyte string is copied once (the dupe below).
+        const Response = struct {
+            result: struct { data: []const u8 },
+        };
+        var parsed = std.json.parseFromSlice(Response, allocator, raw, .{
             .ignore_unknown_fields = true,
-            .allocate = .alloc_always,
-        });
+            .allocate = .alloc_if_needed,
+        }) catch return error.Unexpected;
         defer parsed.deinit();
 
-        if (parsed.value != .object) return error.Unexpected;
-        const root_result = parsed.value.object.get("result") orelse return error.Unexpected;
-        if (root_result != .object) return error.Unexpected;
-
-        const data = root_result.object.get("data") orelse return error.Unexpected;
-        if (data != .string) return error.Unexpected;
-
-        return allocator.dupe(u8, data.string);
+        return allocator.dupe(u8, parsed.value.result.data);
     }
 
     fn parseWebSocketUrlFromTargetListAlloc(allocator: std.mem.Allocator, raw: []const u8) !?[]u8 {
@@ -924,7 +1152,22 @@ pub const CanvasManager = struct {
     // Logical state used by the node command handlers.
     visible: bool = false,
     last_url: ?[]const u8 = null,
-    last_a2ui_jsonl: ?[]const u8 = null,
+
+    // A2UI document, kept as newline-terminated JSONL that pushes append to.
+    a2ui_jsonl: std.ArrayList(u8) = .empty,
+    a2ui_line_count: usize = 0,
+    /// Sequence number of the last applied incremental push; null until the
+    /// sender starts numbering (or after a legacy full replace).
+    a2ui_seq: ?u64 = null,
+
+    pub const A2uiPushResult = union(enum) {
+        /// New lines were appended; `first_line` indexes the first of them.
+        applied: struct { seq: u64, first_line: usize, new_lines: usize },
+        /// Already applied (a retried push); nothing changed.
+        duplicate: u64,
+        /// Pushes were missed; the sender must resync from a full document.
+        gap: struct { expected: u64 },
+    };
 
     pub fn init(allocator: std.mem.Allocator) CanvasManager {
         return .{ .allocator = allocator };
@@ -933,7 +1176,7 @@ pub const CanvasManager = struct {
     pub fn deinit(self: *CanvasManager) void {
         if (self.canvas) |*c| c.deinit();
         if (self.last_url) |u| self.allocator.free(u);
-        if (self.last_a2ui_jsonl) |j| self.allocator.free(j);
+        self.a2ui_jsonl.deinit(self.allocator);
     }
 
     pub fn setVisible(self: *CanvasManager, v: bool) void {
@@ -950,10 +1193,68 @@ pub const CanvasManager = struct {
         return self.last_url;
     }
 
+    /// Replace the whole A2UI document (legacy push / reset). Drops sequence tracking.
     pub fn setA2uiJsonl(self: *CanvasManager, jsonl: []const u8) !void {
-        const copy = try self.allocator.dupe(u8, jsonl);
-        if (self.last_a2ui_jsonl) |old| self.allocator.free(old);
-        self.last_a2ui_jsonl = copy;
+        const lines = try countA2uiLines(jsonl);
+        self.a2ui_jsonl.clearRetainingCapacity();
+        try self.appendA2uiLines(jsonl);
+        self.a2ui_line_count = lines;
+        self.a2ui_seq = null;
+    }
+
+    /// Apply a numbered push. With `replace` the document is rebuilt from `jsonl`
+    /// (a resync) and numbering restarts at `seq`; otherwise `seq` must follow
+    /// the last applied push and only the new lines are validated and appended.
+    pub fn pushA2uiJsonl(self: *CanvasManager, jsonl: []const u8, seq: u64, replace: bool) !A2uiPushResult {
+        if (!replace) {
+            const expected = if (self.a2ui_seq) |last| last + 1 else 1;
+            if (seq < expected) return .{ .duplicate = seq };
+            if (seq > expected) return .{ .gap = .{ .expected = expected } };
+        }
+
+        const lines = try countA2uiLines(jsonl);
+        if (replace) {
+            self.a2ui_jsonl.clearRetainingCapacity();
+            self.a2ui_line_count = 0;
+        }
+        const first_line = self.a2ui_line_count;
+        try self.appendA2uiLines(jsonl);
+        self.a2ui_line_count += lines;
+        self.a2ui_seq = seq;
+        return .{ .applied = .{ .seq = seq, .first_line = first_line, .new_lines = lines } };
+    }
+
+    pub fn getA2uiJsonl(self: *CanvasManager) ?[]const u8 {
+        if (self.a2ui_jsonl.items.len == 0) return null;
+        return self.a2ui_jsonl.items;
+    }
+
+    fn appendA2uiLines(self: *CanvasManager, jsonl: []const u8) !void {
+        const trimmed = std.mem.trim(u8, jsonl, "\r\n");
+        if (trimmed.len == 0) return;
+        try self.a2ui_jsonl.ensureUnusedCapacity(self.allocator, trimmed.len + 1);
+        self.a2ui_jsonl.appendSliceAssumeCapacity(trimmed);
+        self.a2ui_jsonl.appendAssumeCapacity('\n');
+    }
+
+    /// Validate that every non-blank line is a JSON object and count them.
+    fn countA2uiLines(jsonl: []const u8) !usize {
+        var buf: [4096]u8 = undefined;
+        var fba = std.heap.FixedBufferAllocator.init(&buf);
+        var count: usize = 0;
+        var it = std.mem.splitScalar(u8, jsonl, '\n');
+        while (it.next()) |raw_line| {
+            const line = std.mem.trim(u8, raw_line, " \t\r");
+            if (line.len == 0) continue;
+            // Only structure matters here, so scan tokens instead of building a tree.
+            fba.reset();
+            var scanner = std.json.Scanner.initCompleteInput(fba.allocator(), line);
+            if ((scanner.next() catch return error.InvalidA2uiLine) != .object_begin) return error.InvalidA2uiLine;
+            scanner.skipUntilStackHeight(0) catch return error.InvalidA2uiLine;
+            if ((scanner.next() catch return error.InvalidA2uiLine) != .end_of_document) return error.InvalidA2uiLine;
+            count += 1;
+        }
+        return count;
     }
 
     /// Initialize a real canvas with config (optional, future).
@@ -990,6 +1291,46 @@ test "canvas: extract runtime evaluate result prefers value" {
     try std.testing.expectEqualStrings("hello", value);
 }
 
+test "canvas: runtime evaluate exception becomes per-expression outcome" {
+    const allocator = std.testing.allocator;
+    const raw =
+        \\{"id":2,"result":{"result":{"type":"object","subtype":"error"},"exceptionDetails":{"text":"Uncaught","exception":{"description":"ReferenceError: nope is not defined"}}}}
+    ;
+
+    const outcome = try Canvas.evalOutcomeFromResponseAlloc(allocator, raw);
+    try std.testing.expect(outcome == .exception);
+    defer allocator.free(outcome.exception);
+    try std.testing.expectEqualStrings("ReferenceError: nope is not defined", outcome.exception);
+
+    try std.testing.expectError(error.ExecutionFailed, Canvas.extractRuntimeEvaluateResultAlloc(allocator, raw));
+}
+
+test "canvas: parse DevToolsActivePort first line" {
+    try std.testing.expectEqual(@as(?u16, 40231), Canvas.parseDevToolsActivePort("40231\n/devtools/browser/abc\n"));
+    try std.testing.expectEqual(@as(?u16, null), Canvas.parseDevToolsActivePort(""));
+    try std.testing.expectEqual(@as(?u16, null), Canvas.parseDevToolsActivePort("0\n"));
+    try std.testing.expectEqual(@as(?u16, null), Canvas.parseDevToolsActivePort("not-a-port\n"));
+}
+
+test "canvas: decode base64 in place across chunk boundaries" {
+    const allocator = std.testing.allocator;
+
+    const plain = try allocator.alloc(u8, 10_000);
+    defer allocator.free(plain);
+    for (plain, 0..) |*b, i| b.* = @truncate(i *% 31);
+
+    const encoder = std.base64.standard.Encoder;
+    const buf = try allocator.alloc(u8, encoder.calcSize(plain.len));
+    defer allocator.free(buf);
+    _ = encoder.encode(buf, plain);
+
+    const decoded = try Canvas.decodeBase64InPlace(buf);
+    try std.testing.expectEqualSlices(u8, plain, decoded);
+
+    var short = "aGVsbG8=".*;
+    try std.testing.expectEqualStrings("hello", try Canvas.decodeBase64InPlace(&short));
+}
+
 test "canvas: extract screenshot base64 payload" {
     const allocator = std.testing.allocator;
     const raw = "{\"id\":3,\"result\":{\"data\":\"aGVsbG8=\"}}";
@@ -999,3 +1340,28 @@ test "canvas: extract screenshot base64 payload" {
 
     try std.testing.expectEqualStrings("aGVsbG8=", b64);
 }
+
+test "canvas: numbered A2UI pushes append and detect gaps" {
+    var manager = CanvasManager.init(std.testing.allocator);
+    defer manager.deinit();
+
+    const first = try manager.pushA2uiJsonl("{\"surfaceUpdate\":{}}\n{\"beginRendering\":{}}\n", 1, false);
+    try std.testing.expectEqual(@as(usize, 2), first.applied.new_lines);
+
+    const second = try manager.pushA2uiJsonl("{\"dataModelUpdate\":{}}", 2, false);
+    try std.testing.expectEqual(@as(usize, 2), second.applied.first_line);
+    try std.testing.expectEqual(@as(usize, 3), manager.a2ui_line_count);
+
+    try std.testing.expectEqual(@as(u64, 2), (try manager.pushA2uiJsonl("{}", 2, false)).duplicate);
+    try std.testing.expectEqual(@as(u64, 3), (try manager.pushA2uiJsonl("{}", 5, false)).gap.expected);
+    try std.testing.expectError(error.InvalidA2uiLine, manager.pushA2uiJsonl("{}\n[1]", 3, false));
+    try std.testing.expectEqual(@as(?u64, 2), manager.a2ui_seq);
+
+    _ = try manager.pushA2uiJsonl("{\"surfaceUpdate\":{}}", 9, true);
+    try std.testing.expectEqualStrings("{\"surfaceUpdate\":{}}\n", manager.getA2uiJsonl().?);
+    try std.testing.expectEqual(@as(?u64, 9), manager.a2ui_seq);
+
+    try manager.setA2uiJsonl("");
+    try std.testing.expect(manager.getA2uiJsonl() == null);
+    try std.testing.expectEqual(@as(?u64, null), manager.a2ui_seq);
+}
@@ -0,0 +1,221 @@
+const std = @import("std");
+const Command = @import("node_context.zig").Command;
+
+/// Log-linear histogram in the HDR style: values below 4 are exact, above that
+/// each power of two is split into 4 sub-buckets (<= 25% relative error).
+/// Fixed size, no allocation; values are clamped at 2^36.
+pub const Histogram = struct {
+    const sub_bits = 2;
+    const sub_count = 1 << sub_bits;
+    const max_exponent = 36;
+    pub const bucket_count = (max_exponent - 1) * sub_count + sub_count;
+
+    counts: [bucket_count]u32 = [_]u32{0} ** bucket_count,
+    count: u64 = 0,
+    sum: u64 = 0,
+    min: u64 = std.math.maxInt(u64),
+    max: u64 = 0,
+
+    pub fn record(self: *Histogram, raw: u64) void {
+        const v = @min(raw, (@as(u64, 1) << max_exponent) - 1);
+        self.counts[bucketIndex(v)] +|= 1;
+        self.count += 1;
+        self.sum +|= v;
+        self.min = @min(self.min, v);
+        self.max = @max(self.max, v);
+    }
+
+    /// Upper bound of the bucket holding the q-quantile (0 < q <= 1), capped at max.
+    pub fn percentile(self: *const Histogram, q: f64) u64 {
+        if (self.count == 0) return 0;
+        const target: u64 = @max(1, @as(u64, @intFromFloat(@ceil(q * @as(f64, @floatFromInt(self.count))))));
+        var seen: u64 = 0;
+        for (self.counts, 0..) |c, i| {
+            seen += c;
+            if (seen >= target) return @min(bucketUpper(i), self.max);
+        }
+        return self.max;
+    }
+
+    pub fn mean(self: *const Histogram) u64 {
+        if (self.count == 0) return 0;
+        return self.sum / self.count;
+    }
+
+    fn bucketIndex(v: u64) usize {
+        if (v < sub_count) return @intCast(v);
+        const e: u6 = @intCast(63 - @clz(v));
+        const sub: usize = @intCast((v >> (e - sub_bits)) & (sub_count - 1));
+        return (@as(usize, e) - 1) * sub_count + sub;
+    }
+
+    fn bucketUpper(index: usize) u64 {
+        if (index < sub_count) return index;
+        const e: u6 = @intCast(index / sub_count + 1);
+        const sub: u64 = index % sub_count;
+        const width = @as(u64, 1) << (e - sub_bits);
+        return (sub_count + sub) * width + width - 1;
+    }
+};
+
+/// Where an invoke spends its time, from frame receipt to result sent.
+pub const Phase = enum {
+    queue,
+    exec,
+    serialize,
+    send,
+};
+
+pub const CommandStats = struct {
+    /// Microseconds per phase.
+    phases: [std.meta.fields(Phase).len]Histogram = [_]Histogram{.{}} ** std.meta.fields(Phase).len,
+    /// Serialized result size in bytes (JSON plus any binary attachments).
+    payload_bytes: Histogram = .{},
+    errors: u64 = 0,
+};
+
+const command_count = std.meta.fields(Command).len;
+
+/// Per-command latency and payload histograms. Recorded on the main thread,
+/// read by the health reporter, so every access takes the mutex.
+pub const CommandMetrics = struct {
+    allocator: std.mem.Allocator,
+    mutex: std.Thread.Mutex = .{},
+    stats: []CommandStats,
+
+    pub fn init(allocator: std.mem.Allocator) !CommandMetrics {
+        const stats = try allocator.alloc(CommandStats, command_count);
+        @memset(stats, .{});
+        return .{ .allocator = allocator, .stats = stats };
+    }
+
+    pub fn deinit(self: *CommandMetrics) void {
+        self.allocator.free(self.stats);
+    }
+
+    pub fn recordPhase(self: *CommandMetrics, cmd: Command, phase: Phase, elapsed_ns: i128) void {
+        const us: u64 = if (elapsed_ns <= 0) 0 else @intCast(@min(@divTrunc(elapsed_ns, std.time.ns_per_us), std.math.maxInt(u64)));
+        self.mutex.lock();
+        defer self.mutex.unlock();
+        self.stats[@intFromEnum(cmd)].phases[@intFromEnum(phase)].record(us);
+    }
+
+    pub fn recordPayload(self: *CommandMetrics, cmd: Command, bytes: usize) void {
+        self.mutex.lock();
+        defer self.mutex.unlock();
+        self.stats[@intFromEnum(cmd)].payload_bytes.record(bytes);
+    }
+
+    pub fn recordError(self: *CommandMetrics, cmd: Command) void {
+        self.mutex.lock();
+        defer self.mutex.unlock();
+        self.stats[@intFromEnum(cmd)].errors += 1;
+    }
+
+    /// Copy one command's stats out under the lock.
+    pub fn snapshot(self: *CommandMetrics, cmd: Command) CommandStats {
+        self.mutex.lock();
+        defer self.mutex.unlock();
+        return self.stats[@intFromEnum(cmd)];
+    }
+
+    /// Executions recorded for one command (0 when it never ran).
+    pub fn executions(self: *CommandMetrics, cmd: Command) u64 {
+        self.mutex.lock();
+        defer self.mutex.unlock();
+        return self.stats[@intFromEnum(cmd)].phases[@intFromEnum(Phase.exec)].count;
+    }
+
+    /// Compact per-command summary for the health frame:
+    /// `{"system.run":{"n":12,"errors":0,"execMs":[p50,p99,max],...,"payloadBytes":[p50,max]}}`.
+    /// Commands that never ran are omitted.
+    pub fn writeSummary(self: *CommandMetrics, jw: *std.json.Stringify) !void {
+        try jw.beginObject();
+        for (std.enums.values(Command)) |cmd| {
+            if (self.executions(cmd) > 0) {
+                const stats = self.snapshot(cmd);
+                try jw.objectField(cmd.toString());
+                try jw.beginObject();
+                try jw.objectField("n");
+                try jw.write(stats.phases[@intFromEnum(Phase.exec)].count);
+                try jw.objectField("errors");
+                try jw.write(stats.errors);
+                inline for (@typeInfo(Phase).@"enum".fields) |phase_field| {
+                    const h = &stats.phases[phase_field.value];
+                    try jw.objectField(phase_field.name ++ "Ms");
+                    try jw.write([_]f64{ usToMs(h.percentile(0.5)), usToMs(h.percentile(0.99)), usToMs(h.max) });
+                }
+                try jw.objectField("payloadBytes");
+                try jw.write([_]u64{ stats.payload_bytes.percentile(0.5), stats.payload_bytes.max });
+                try jw.endObject();
+            }
+        }
+        try jw.endObject();
+    }
+
+    /// Total executions across all commands; cheap change detection for reporters.
+    pub fn totalExecutions(self: *CommandMetrics) u64 {
+        self.mutex.lock();
+        defer self.mutex.unlock();
+        var total: u64 = 0;
+        for (self.stats) |s| total += s.phases[@intFromEnum(Phase.exec)].count;
+        return total;
+    }
+};
+
+/// Milliseconds with microsecond precision.
+fn usToMs(us: u64) f64 {
+    return @as(f64, @floatFromInt(us)) / 1000.0;
+}
+
+test "histogram buckets are contiguous and bounded" {
+    var prev: usize = 0;
+    var v: u64 = 0;
+    while (v < 5000) : (v += 1) {
+        const idx = Histogram.bucketIndex(v);
+        try std.testing.expect(idx == prev or idx == prev + 1);
+        try std.testing.expect(v <= Histogram.bucketUpper(idx));
+        if (idx > 0) try std.testing.expect(v > Histogram.bucketUpper(idx - 1));
+        prev = idx;
+    }
+    try std.testing.expect(Histogram.bucketIndex((1 << 36) - 1) < Histogram.bucket_count);
+}
+
+test "histogram percentiles stay within bucket precision" {
+    var h: Histogram = .{};
+    var v: u64 = 1;
+    while (v <= 1000) : (v += 1) h.record(v * 1000);
+
+    try std.testing.expectEqual(@as(u64, 1000), h.count);
+    try std.testing.expectEqual(@as(u64, 1000), h.min);
+    try std.testing.expectEqual(@as(u64, 1_000_000), h.max);
+
+    const p50 = h.percentile(0.5);
+    try std.testing.expect(p50 >= 500_000 and p50 <= 625_000);
+    try std.testing.expectEqual(@as(u64, 1_000_000), h.percentile(1.0));
+}
+
+test "command metrics summary lists only commands that ran" {
+    var metrics = try CommandMetrics.init(std.testing.allocator);
+    defer metrics.deinit();
+
+    metrics.recordPhase(.system_which, .exec, 2 * std.time.ns_per_ms);
+    metrics.recordPhase(.system_which, .send, 500 * std.time.ns_per_us);
+    metrics.recordPayload(.system_which, 120);
+    metrics.recordError(.system_which);
+
+    var out: std.Io.Writer.Allocating = .init(std.testing.allocator);
+    defer out.deinit();
+    var jw: std.json.Stringify = .{ .writer = &out.writer };
+    try metrics.writeSummary(&jw);
+
+    const parsed = try std.json.parseFromSlice(std.json.Value, std.testing.allocator, out.written(), .{});
+    defer parsed.deinit();
+    try std.testing.expectEqual(@as(usize, 1), parsed.value.object.count());
+    const which = parsed.value.object.get("system.which").?.object;
+    try std.testing.expectEqual(@as(i64, 1), which.get("n").?.integer);
+    try std.testing.expectEqual(@as(i64, 1), which.get("errors").?.integer);
+    try std.testing.expectEqual(@as(usize, 3), which.get("execMs").?.array.items.len);
+    try std.testing.expectEqual(@as(i64, 120), which.get("payloadBytes").?.array.items[1].integer);
+    try std.testing.expectEqual(@as(u64, 1), metrics.totalExecutions());
+}
@@ -11,6 +11,8 @@ const logger = ziggy.utils.logger;
 const node_platform = @import("node_platform.zig");
 const node_location = @import("location.zig");
 const node_canvas = @import("canvas.zig");
+const metrics_store = @import("metrics_store.zig");
+const command_metrics = @import("command_metrics.zig");
 
 const windows_camera = if (builtin.target.os.tag == .windows)
     @import("../windows/camera.zig")
@@ -86,7 +88,14 @@ pub const CommandRouter = struct {
         // IMPORTANT: handlers may allocate large payloads (e.g. screenshots).
         // We accept an allocator per invocation so callers can use a per-message
         // arena and avoid unbounded leaks.
-        return handler(allocator, ctx, params);
+        const cmd = Command.fromString(command);
+        const started_ns = std.time.nanoTimestamp();
+        const result = handler(allocator, ctx, params);
+        if (cmd) |c| {
+            ctx.command_metrics.recordPhase(c, .exec, std.time.nanoTimestamp() - started_ns);
+            if (result) |_| {} else |_| ctx.command_metrics.recordError(c);
+        }
+        return result;
     }
 
     /// Check if command is registered
@@ -112,6 +121,10 @@ pub fn initStandardRouter(allocator: std.mem.Allocator) !CommandRouter {
     try router.register(.process_stop, processStopHandler);
     try router.register(.process_list, processListHandler);
 
+    // Node introspection
+    try router.register(.node_metrics_query, nodeMetricsQueryHandler);
+    try router.register(.node_metrics_commands, nodeMetricsCommandsHandler);
+
     // Canvas commands
     try router.register(.canvas_present, canvasPresentHandler);
     try router.register(.canvas_hide, canvasHideHandler);
@@ -192,6 +205,10 @@ pub fn initRouterWithCommands(allocator: std.mem.Allocator, cmds: []const Comman
             .process_stop => try router.register(.process_stop, processStopHandler),
             .process_list => try router.register(.process_list, processListHandler),
 
+            // Node introspection
+            .node_metrics_query => try router.register(.node_metrics_query, nodeMetricsQueryHandler),
+            .node_metrics_commands => try router.register(.node_metrics_commands, nodeMetricsCommandsHandler),
+
             // Canvas commands
             .canvas_present => try router.register(.canvas_present, canvasPresentHandler),
             .canvas_hide => try router.register(.canvas_hide, canvasHideHandler),
@@ -675,9 +692,26 @@ fn canvasPresentHandler(allocator: std.mem.Allocator, ctx: *NodeContext, params:
     if (ctx.canvas_manager.getUrl()) |u| {
         try result.put("url", std.json.Value{ .string = try allocator.dupe(u8, u) });
     }
+    if (ctx.canvas_manager.getCanvas()) |canvas| {
+        if (canvas.config.backend == .chrome) {
+            try result.put("startup", try canvasStartupTimingsToJson(allocator, canvas.startup_timings));
+        }
+    }
     return std.json.Value{ .object = result };
 }
 
+fn canvasStartupTimingsToJson(allocator: std.mem.Allocator, t: node_canvas.StartupTimings) !std.json.Value {
+    var obj = std.json.ObjectMap.init(allocator);
+    try obj.put("resolveExecutableMs", std.json.Value{ .integer = t.resolve_executable_ms });
+    try obj.put("userDataDirMs", std.json.Value{ .integer = t.user_data_dir_ms });
+    try obj.put("spawnMs", std.json.Value{ .integer = t.spawn_ms });
+    try obj.put("devtoolsPortMs", std.json.Value{ .integer = t.devtools_port_ms });
+    try obj.put("devtoolsReadyMs", std.json.Value{ .integer = t.devtools_ready_ms });
+    try obj.put("totalMs", std.json.Value{ .integer = t.total_ms });
+    try obj.put("portDiscovery", std.json.Value{ .string = @tagName(t.port_discovery) });
+    return std.json.Value{ .object = obj };
+}
+
 fn canvasHideHandler(allocator: std.mem.Allocator, ctx: *NodeContext, _: std.json.Value) CommandError!std.json.Value {
     ctx.canvas_manager.setVisible(false);
 
@@ -717,6 +751,10 @@ fn canvasNavigateHandler(allocator: std.mem.Allocator, ctx: *NodeContext, params
 fn canvasEvalHandler(allocator: std.mem.Allocator, ctx: *NodeContext, params: std.json.Value) CommandError!std.json.Value {
     if (params != .object) return CommandError.InvalidParams;
 
+    if (params.object.get("expressions")) |expressions| {
+        return canvasEvalBatch(allocator, ctx, params, expressions);
+    }
+
     const js_param = if (params.object.get("javaScript")) |js|
         js
     else if (params.object.get("js")) |js|
@@ -738,6 +776,61 @@ fn canvasEvalHandler(allocator: std.mem.Allocator, ctx: *NodeContext, params: st
     return std.json.Value{ .object = result };
 }
 
+/// `canvas.eval` with `expressions: [string]` runs them in order over one
+/// DevTools connection and reports each one separately.
+fn canvasEvalBatch(allocator: std.mem.Allocator, ctx: *NodeContext, params: std.json.Value, expressions: std.json.Value) CommandError!std.json.Value {
+    if (expressions != .array or expressions.array.items.len == 0) return CommandError.InvalidParams;
+
+    const stop_on_error = blk: {
+        if (params.object.get("stopOnError")) |raw| {
+            if (raw != .bool) return CommandError.InvalidParams;
+            break :blk raw.bool;
+        }
+        break :blk false;
+    };
+
+    const sources = try allocator.alloc([]const u8, expressions.array.items.len);
+    for (expressions.array.items, sources) |item, *src| {
+        if (item != .string or item.string.len == 0) return CommandError.InvalidParams;
+        src.* = item.string;
+    }
+
+    const canvas = ensureRealCanvas(ctx) orelse return CommandError.ExecutionFailed;
+    const outcomes = canvas.evalBatch(sources, stop_on_error) catch |err| {
+        logger.err("canvas.eval batch failed: {s}", .{@errorName(err)});
+        return CommandError.ExecutionFailed;
+    };
+    defer canvas.freeEvalOutcomes(outcomes);
+
+    var results = std.json.Array.init(allocator);
+    for (outcomes) |outcome| {
+        var entry = std.json.ObjectMap.init(allocator);
+        switch (outcome) {
+            .ok => |text| {
+                try entry.put("ok", std.json.Value{ .bool = true });
+                try entry.put("result", std.json.Value{ .string = try allocator.dupe(u8, text) });
+            },
+            .exception => |text| {
+                try entry.put("ok", std.json.Value{ .bool = false });
+                try entry.put("error", std.json.Value{ .string = try allocator.dupe(u8, text) });
+            },
+            .failed => |err| {
+                try entry.put("ok", std.json.Value{ .bool = false });
+                try entry.put("error", std.json.Value{ .string = @errorName(err) });
+            },
+            .skipped => {
+                try entry.put("ok", std.json.Value{ .bool = false });
+                try entry.put("skipped", std.json.Value{ .bool = true });
+            },
+        }
+        try results.append(std.json.Value{ .object = entry });
+    }
+
+    var result = std.json.ObjectMap.init(allocator);
+    try result.put("results", std.json.Value{ .array = results });
+    return std.json.Value{ .object = result };
+}
+
 fn canvasSnapshotHandler(allocator: std.mem.Allocator, ctx: *NodeContext, params: std.json.Value) CommandError!std.json.Value {
     if (params != .object) return CommandError.InvalidParams;
 
@@ -767,7 +860,41 @@ fn canvasSnapshotHandler(allocator: std.mem.Allocator, ctx: *NodeContext, params
         break :blk null;
     };
 
+    // transfer: "binary" ships the image as binary WebSocket frames referenced
+    // from the result instead of inlining base64 into the JSON.
+    const binary = blk: {
+        if (params.object.get("transfer")) |raw| {
+            if (raw != .string) return CommandError.InvalidParams;
+            if (std.mem.eql(u8, raw.string, "binary")) break :blk true;
+            if (std.mem.eql(u8, raw.string, "base64")) break :blk false;
+            return CommandError.InvalidParams;
+        }
+        break :blk false;
+    };
+
     const canvas = ensureRealCanvas(ctx) orelse return CommandError.ExecutionFailed;
+
+    if (binary) {
+        const bytes = canvas.snapshotBytes(format, quality, max_width) catch |err| {
+            logger.err("canvas.snapshot failed: {s}", .{@errorName(err)});
+            return CommandError.ExecutionFailed;
+        };
+        const size = bytes.len;
+        const content_type = if (format[0] == 'j') "image/jpeg" else "image/png";
+        const attachment_id = try ctx.addInvokeAttachment(canvas.allocator, content_type, bytes);
+
+        var attachment = std.json.ObjectMap.init(allocator);
+        try attachment.put("id", std.json.Value{ .string = try allocator.dupe(u8, attachment_id) });
+        try attachment.put("encoding", std.json.Value{ .string = "binary" });
+        try attachment.put("contentType", std.json.Value{ .string = content_type });
+        try attachment.put("size", std.json.Value{ .integer = @intCast(size) });
+
+        var out = std.json.ObjectMap.init(allocator);
+        try out.put("format", std.json.Value{ .string = try allocator.dupe(u8, format) });
+        try out.put("attachment", std.json.Value{ .object = attachment });
+        return std.json.Value{ .object = out };
+    }
+
     const base64 = canvas.snapshotBase64(format, quality, max_width) catch |err| {
         logger.err("canvas.snapshot failed: {s}", .{@errorName(err)});
         return CommandError.ExecutionFailed;
@@ -781,17 +908,67 @@ fn canvasSnapshotHandler(allocator: std.mem.Allocator, ctx: *NodeContext, params
 }
 
 fn canvasA2uiPushJsonlHandler(allocator: std.mem.Allocator, ctx: *NodeContext, params: std.json.Value) CommandError!std.json.Value {
+    if (params != .object) return CommandError.InvalidParams;
     const jsonl = params.object.get("jsonl") orelse return CommandError.InvalidParams;
     if (jsonl != .string) return CommandError.InvalidParams;
 
-    ctx.canvas_manager.setA2uiJsonl(jsonl.string) catch return CommandError.ExecutionFailed;
-    ctx.canvas_manager.setVisible(true);
+    // Without `seq` this is the legacy full-document replace.
+    const seq_raw = params.object.get("seq") orelse {
+        ctx.canvas_manager.setA2uiJsonl(jsonl.string) catch |err| return a2uiPushError(err);
+        ctx.canvas_manager.setVisible(true);
+
+        var result = std.json.ObjectMap.init(allocator);
+        try result.put("ok", std.json.Value{ .bool = true });
+        return std.json.Value{ .object = result };
+    };
+    if (seq_raw != .integer or seq_raw.integer < 1) return CommandError.InvalidParams;
+    const seq: u64 = @intCast(seq_raw.integer);
+
+    const replace = blk: {
+        if (params.object.get("replace")) |raw| {
+            if (raw != .bool) return CommandError.InvalidParams;
+            break :blk raw.bool;
+        }
+        break :blk false;
+    };
+
+    const outcome = ctx.canvas_manager.pushA2uiJsonl(jsonl.string, seq, replace) catch |err| return a2uiPushError(err);
 
     var result = std.json.ObjectMap.init(allocator);
-    try result.put("ok", std.json.Value{ .bool = true });
+    switch (outcome) {
+        .applied => |applied| {
+            ctx.canvas_manager.setVisible(true);
+            try result.put("ok", std.json.Value{ .bool = true });
+            try result.put("seq", std.json.Value{ .integer = @intCast(applied.seq) });
+            try result.put("firstLine", std.json.Value{ .integer = @intCast(applied.first_line) });
+            try result.put("appliedLines", std.json.Value{ .integer = @intCast(applied.new_lines) });
+            try result.put("totalLines", std.json.Value{ .integer = @intCast(ctx.canvas_manager.a2ui_line_count) });
+        },
+        .duplicate => |dup_seq| {
+            try result.put("ok", std.json.Value{ .bool = true });
+            try result.put("seq", std.json.Value{ .integer = @intCast(dup_seq) });
+            try result.put("duplicate", std.json.Value{ .bool = true });
+        },
+        .gap => |gap| {
+            // Not an invoke error: the sender is expected to react by resending
+            // the whole document with replace=true.
+            logger.warn("canvas.a2ui.pushJSONL gap: got seq {d}, expected {d}", .{ seq, gap.expected });
+            try result.put("ok", std.json.Value{ .bool = false });
+            try result.put("resync", std.json.Value{ .bool = true });
+            try result.put("expectedSeq", std.json.Value{ .integer = @intCast(gap.expected) });
+        },
+    }
     return std.json.Value{ .object = result };
 }
 
+fn a2uiPushError(err: anyerror) CommandError {
+    return switch (err) {
+        error.InvalidA2uiLine => CommandError.InvalidParams,
+        error.OutOfMemory => CommandError.OutOfMemory,
+        else => CommandError.ExecutionFailed,
+    };
+}
+
 fn canvasA2uiResetHandler(allocator: std.mem.Allocator, ctx: *NodeContext, _: std.json.Value) CommandError!std.json.Value {
     ctx.canvas_manager.setA2uiJsonl("") catch {};
 
@@ -1509,6 +1686,183 @@ fn processListHandler(allocator: std.mem.Allocator, ctx: *NodeContext, _: std.js
     };
 }
 
+// ============================================================================
+// Node Introspection Command Handlers
+// ============================================================================
+
+const metrics_default_window_ms: u32 = 60 * 60 * 1000;
+const metrics_default_points: u32 = 120;
+const metrics_max_points: u32 = 1000;
+
+/// `node.metrics.query`: downsample the local metrics ring into one columnar reply.
+/// Params: { windowMs?: number|"15m" (default 1h), endTs?: epoch ms (default now), points?: 1..1000 }
+fn nodeMetricsQueryHandler(allocator: std.mem.Allocator, ctx: *NodeContext, params: std.json.Value) CommandError!std.json.Value {
+    const window_ms: u32 = blk: {
+        if (params == .object) {
+            if (params.object.get("windowMs")) |raw| break :blk try parseDurationMsParam(raw);
+        }
+        break :blk metrics_default_window_ms;
+    };
+    const end_ms: i64 = blk: {
+        if (params == .object) {
+            if (params.object.get("endTs")) |raw| {
+                if (raw != .integer or raw.integer <= 0) return CommandError.InvalidParams;
+                break :blk raw.integer;
+            }
+        }
+        break :blk node_platform.nowMs();
+    };
+    const points: u32 = blk: {
+        if (params == .object) {
+            if (params.object.get("points")) |raw| {
+                const n = try parsePositiveU32Param(raw);
+                break :blk @min(n, metrics_max_points);
+            }
+        }
+        break :blk metrics_default_points;
+    };
+
+    const start_ms = end_ms - @as(i64, window_ms) + 1;
+    const buckets = try ctx.metrics.query(allocator, .{ .start_ms = start_ms, .end_ms = end_ms, .max_points = points });
+
+    var ts = std.json.Array.init(allocator);
+    var counts = std.json.Array.init(allocator);
+    var series = std.json.ObjectMap.init(allocator);
+    inline for (metrics_store.columns) |column| {
+        try series.put(column.name, std.json.Value{ .array = std.json.Array.init(allocator) });
+    }
+
+    for (buckets) |bucket| {
+        try ts.append(std.json.Value{ .integer = bucket.ts_ms });
+        try counts.append(std.json.Value{ .integer = bucket.count });
+        inline for (metrics_store.columns, 0..) |column, c| {
+            const values = &series.getPtr(column.name).?.array;
+            try values.append(if (bucket.values[c]) |v| metricJsonValue(v) else std.json.Value{ .null = {} });
+        }
+    }
+
+    var result = std.json.ObjectMap.init(allocator);
+    try result.put("startTs", std.json.Value{ .integer = start_ms });
+    try result.put("endTs", std.json.Value{ .integer = end_ms });
+    try result.put("stepMs", std.json.Value{ .integer = if (buckets.len > 1) buckets[1].ts_ms - buckets[0].ts_ms else @as(i64, window_ms) });
+    try result.put("oldestTs", if (ctx.metrics.oldestTimestamp()) |oldest| std.json.Value{ .integer = oldest } else std.json.Value{ .null = {} });
+    try result.put("ts", std.json.Value{ .array = ts });
+    try result.put("samples", std.json.Value{ .array = counts });
+    try result.put("series", std.json.Value{ .object = series });
+    return std.json.Value{ .object = result };
+}
+
+/// Whole numbers go out as integers; averaged gauges keep two decimals.
+fn metricJsonValue(v: f64) std.json.Value {
+    if (@trunc(v) == v and @abs(v) < 9.0e15) return .{ .integer = @intFromFloat(v) };
+    return .{ .float = @round(v * 100.0) / 100.0 };
+}
+
+/// `node.metrics.commands`: per-command latency histograms since the node started.
+/// Params: { command?: string } to report a single command.
+/// Phase timings are in microseconds: queue (frame received -> handler start),
+/// exec (handler), serialize (result JSON) and send (attachments + result frame).
+fn nodeMetricsCommandsHandler(allocator: std.mem.Allocator, ctx: *NodeContext, params: std.json.Value) CommandError!std.json.Value {
+    var only: ?Command = null;
+    if (params == .object) {
+        if (params.object.get("command")) |raw| {
+            if (raw != .string) return CommandError.InvalidParams;
+            only = Command.fromString(raw.string) orelse return CommandError.InvalidParams;
+        }
+    }
+
+    var commands = std.json.ObjectMap.init(allocator);
+    for (std.enums.values(Command)) |cmd| {
+        const wanted = if (only) |o| o == cmd else ctx.command_metrics.executions(cmd) > 0;
+        if (wanted) {
+            const stats = ctx.command_metrics.snapshot(cmd);
+            var entry = std.json.ObjectMap.init(allocator);
+            try entry.put("count", std.json.Value{ .integer = @intCast(stats.phases[@intFromEnum(command_metrics.Phase.exec)].count) });
+            try entry.put("errors", std.json.Value{ .integer = @intCast(stats.errors) });
+            inline for (@typeInfo(command_metrics.Phase).@"enum".fields) |phase| {
+                try entry.put(phase.name ++ "Us", try histogramJsonValue(allocator, &stats.phases[phase.value]));
+            }
+            try entry.put("payloadBytes", try histogramJsonValue(allocator, &stats.payload_bytes));
+            try commands.put(cmd.toString(), std.json.Value{ .object = entry });
+        }
+    }
+
+    var result = std.json.ObjectMap.init(allocator);
+    try result.put("commands", std.json.Value{ .object = commands });
+    return std.json.Value{ .object = result };
+}
+
+fn histogramJsonValue(allocator: std.mem.Allocator, h: *const command_metrics.Histogram) CommandError!std.json.Value {
+    var obj = std.json.ObjectMap.init(allocator);
+    try obj.put("count", std.json.Value{ .integer = @intCast(h.count) });
+    if (h.count > 0) {
+        try obj.put("mean", std.json.Value{ .integer = @intCast(h.mean()) });
+        try obj.put("min", std.json.Value{ .integer = @intCast(h.min) });
+        try obj.put("max", std.json.Value{ .integer = @intCast(h.max) });
+        try obj.put("p50", std.json.Value{ .integer = @intCast(h.percentile(0.5)) });
+        try obj.put("p90", std.json.Value{ .integer = @intCast(h.percentile(0.9)) });
+        try obj.put("p99", std.json.Value{ .integer = @intCast(h.percentile(0.99)) });
+        try obj.put("p999", std.json.Value{ .integer = @intCast(h.percentile(0.999)) });
+    }
+    return std.json.Value{ .object = obj };
+}
+
+test "node.metrics.query returns downsampled columns" {
+    var arena = std.heap.ArenaAllocator.init(std.testing.allocator);
+    defer arena.deinit();
+    const allocator = arena.allocator();
+
+    var ctx = try NodeContext.init(std.testing.allocator, "node-id", "Node");
+    defer ctx.deinit();
+
+    ctx.metrics.record(.{ .ts_ms = 10_000, .commands_executed = 3, .cpu_percent = 12.5 });
+    ctx.metrics.record(.{ .ts_ms = 20_000, .commands_executed = 4, .cpu_percent = 7.5 });
+
+    const params = try std.json.parseFromSliceLeaky(std.json.Value, allocator, "{\"windowMs\":60000,\"endTs\":59999,\"points\":2}", .{});
+    const result = try nodeMetricsQueryHandler(allocator, &ctx, params);
+
+    try std.testing.expectEqual(@as(i64, 0), result.object.get("startTs").?.integer);
+    try std.testing.expectEqual(@as(i64, 30_000), result.object.get("stepMs").?.integer);
+    try std.testing.expectEqual(@as(usize, 2), result.object.get("ts").?.array.items.len);
+
+    const series = result.object.get("series").?.object;
+    try std.testing.expectEqual(@as(i64, 4), series.get("commandsExecuted").?.array.items[0].integer);
+    try std.testing.expectEqual(@as(i64, 10), series.get("cpuPercent").?.array.items[0].integer);
+    try std.testing.expect(series.get("cpuPercent").?.array.items[1] == .null);
+}
+
+test "node.metrics.commands reports histograms for commands that ran" {
+    var arena = std.heap.ArenaAllocator.init(std.testing.allocator);
+    defer arena.deinit();
+    const allocator = arena.allocator();
+
+    var ctx = try NodeContext.init(std.testing.allocator, "node-id", "Node");
+    defer ctx.deinit();
+
+    var router = CommandRouter.init(std.testing.allocator);
+    defer router.deinit();
+    try router.register(.node_metrics_query, nodeMetricsQueryHandler);
+
+    // Routed calls record exec time and errors themselves.
+    _ = try router.route(allocator, &ctx, "node.metrics.query", .{ .null = {} });
+    try std.testing.expectError(CommandError.InvalidParams, router.route(allocator, &ctx, "node.metrics.query", try std.json.parseFromSliceLeaky(std.json.Value, allocator, "{\"points\":0}", .{})));
+    ctx.command_metrics.recordPayload(.node_metrics_query, 4096);
+
+    const result = try nodeMetricsCommandsHandler(allocator, &ctx, .{ .null = {} });
+    const commands = result.object.get("commands").?.object;
+    try std.testing.expectEqual(@as(usize, 1), commands.count());
+
+    const entry = commands.get("node.metrics.query").?.object;
+    try std.testing.expectEqual(@as(i64, 2), entry.get("count").?.integer);
+    try std.testing.expectEqual(@as(i64, 1), entry.get("errors").?.integer);
+    try std.testing.expectEqual(@as(i64, 2), entry.get("execUs").?.object.get("count").?.integer);
+    try std.testing.expect(entry.get("queueUs").?.object.get("p50") == null);
+    try std.testing.expectEqual(@as(i64, 4096), entry.get("payloadBytes").?.object.get("max").?.integer);
+
+    const unknown = try std.json.parseFromSliceLeaky(std.json.Value, allocator, "{\"command\":\"nope\"}", .{});
+    try std.testing.expectError(CommandError.InvalidParams, nodeMetricsCommandsHandler(allocator, &ctx, unknown));
+}
+
 test "initStandardRouter media/location wiring matches backend support" {
     var router = try initStandardRouter(std.testing.allocator);
     defer router.deinit();
@@ -1602,3 +1956,46 @@ test "parseDurationMsParam numeric values must be integral milliseconds" {
     try std.testing.expectEqual(@as(u32, 1500), try parseDurationMsParam(.{ .float = 1500.0 }));
     try std.testing.expectError(CommandError.InvalidParams, parseDurationMsParam(.{ .float = 1500.25 }));
 }
+
+test "canvas.eval batch rejects malformed expression lists before touching the canvas" {
+    var arena = std.heap.ArenaAllocator.init(std.testing.allocator);
+    defer arena.deinit();
+    const allocator = arena.allocator();
+
+    var ctx = try NodeContext.init(std.testing.allocator, "node-id", "Node");
+    defer ctx.deinit();
+
+    const cases = [_][]const u8{
+        "{\"expressions\":[]}",
+        "{\"expressions\":\"document.title\"}",
+        "{\"expressions\":[\"1+1\",2]}",
+        "{\"expressions\":[\"1+1\"],\"stopOnError\":\"yes\"}",
+    };
+    for (cases) |raw| {
+        const params = try std.json.parseFromSliceLeaky(std.json.Value, allocator, raw, .{});
+        try std.testing.expectError(CommandError.InvalidParams, canvasEvalHandler(allocator, &ctx, params));
+    }
+    try std.testing.expect(ctx.canvas_manager.getCanvas() == null);
+}
+
+test "canvas.a2ui.pushJSONL asks for a resync when a numbered push is missing" {
+    var arena = std.heap.ArenaAllocator.init(std.testing.allocator);
+    defer arena.deinit();
+    const allocator = arena.allocator();
+
+    var ctx = try NodeContext.init(std.testing.allocator, "node-id", "Node");
+    defer ctx.deinit();
+
+    const push1 = try std.json.parseFromSliceLeaky(std.json.Value, allocator, "{\"jsonl\":\"{\\\"surfaceUpdate\\\":{}}\",\"seq\":1}", .{});
+    const applied = try canvasA2uiPushJsonlHandler(allocator, &ctx, push1);
+    try std.testing.expect(applied.object.get("ok").?.bool);
+    try std.testing.expectEqual(@as(i64, 1), applied.object.get("totalLines").?.integer);
+
+    const push3 = try std.json.parseFromSliceLeaky(std.json.Value, allocator, "{\"jsonl\":\"{}\",\"seq\":3}", .{});
+    const gap = try canvasA2uiPushJsonlHandler(allocator, &ctx, push3);
+    try std.testing.expect(gap.object.get("resync").?.bool);
+    try std.testing.expectEqual(@as(i64, 2), gap.object.get("expectedSeq").?.integer);
+
+    const bad = try std.json.parseFromSliceLeaky(std.json.Value, allocator, "{\"jsonl\":\"not json\",\"seq\":2}", .{});
+    try std.testing.expectError(CommandError.InvalidParams, canvasA2uiPushJsonlHandler(allocator, &ctx, bad));
+}
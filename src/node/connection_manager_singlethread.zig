@@ -3,6 +3,20 @@ const websocket_client = @import("../client/websocket_client.zig");
 const ziggy = @import("ziggy-core");
 const logger = ziggy.utils.logger;
 const node_platform = @import("node_platform.zig");
+const QueueStats = @import("send_queue.zig").QueueStats;
+
+/// Connection counters, readable from other threads (e.g. the metrics exporter).
+pub const ConnectionStats = struct {
+    connected: std.atomic.Value(bool) = .init(false),
+    connect_attempts: std.atomic.Value(u64) = .init(0),
+    connect_failures: std.atomic.Value(u64) = .init(0),
+    disconnects: std.atomic.Value(u64) = .init(0),
+    /// Consecutive failed attempts since the last successful connect.
+    reconnect_attempt: std.atomic.Value(u32) = .init(0),
+    link: websocket_client.LinkStats = .{},
+    /// Outbound send queue depth (node mode).
+    queue: QueueStats = .{},
+};
 
 /// Single-threaded connection manager for node-mode.
 ///
@@ -34,6 +48,7 @@ pub const SingleThreadConnectionManager = struct {
 
     reconnect_attempt: u32 = 0,
     next_attempt_at_ms: i64 = 0,
+    stats: ConnectionStats = .{},
 
     // Tunables
     base_delay_ms: u64 = 1000,
@@ -137,6 +152,8 @@ pub const SingleThreadConnectionManager = struct {
     pub fn disconnect(self: *SingleThreadConnectionManager) void {
         if (self.is_connected) {
             self.is_connected = false;
+            self.stats.connected.store(false, .monotonic);
+            _ = self.stats.disconnects.fetchAdd(1, .monotonic);
             if (self.onDisconnected) |cb| cb(self);
         }
 
@@ -160,16 +177,23 @@ pub const SingleThreadConnectionManager = struct {
             defer if (self.ws_mutex) |m| m.unlock();
 
             if (self.onConfigureClient) |cb| cb(self, &self.ws_client);
+            // The client is re-created on disconnect; point it at our counters each time.
+            self.ws_client.stats = &self.stats.link;
 
+            _ = self.stats.connect_attempts.fetchAdd(1, .monotonic);
             self.ws_client.connect() catch |err| {
                 logger.err("Connection failed: {s}", .{@errorName(err)});
                 self.reconnect_attempt += 1;
+                _ = self.stats.connect_failures.fetchAdd(1, .monotonic);
+                self.stats.reconnect_attempt.store(self.reconnect_attempt, .monotonic);
                 self.next_attempt_at_ms = now + @as(i64, @intCast(self.computeDelayMs()));
                 return;
             };
 
             self.is_connected = true;
             self.reconnect_attempt = 0;
+            self.stats.connected.store(true, .monotonic);
+            self.stats.reconnect_attempt.store(0, .monotonic);
             if (self.onConnected) |cb| cb(self);
             return;
         }
@@ -3,9 +3,12 @@ const node_context = @import("node_context.zig");
 const NodeContext = node_context.NodeContext;
 const websocket_client = @import("../client/websocket_client.zig");
 const ziggy = @import("ziggy-core");
-const messages = ziggy.protocol.messages;
 const logger = ziggy.utils.logger;
 const node_platform = @import("node_platform.zig");
+const health_sampler = @import("health_sampler.zig");
+const HealthSampler = health_sampler.HealthSampler;
+const MetricsSample = @import("metrics_store.zig").MetricsSample;
+const SendQueue = @import("send_queue.zig").SendQueue;
 
 /// Health reporter for node status updates
 pub const HealthReporter = struct {
@@ -14,9 +17,25 @@ pub const HealthReporter = struct {
     node_ctx: *NodeContext,
     ws_client: *websocket_client.WebSocketClient,
     ws_mutex: ?*std.Thread.Mutex = null,
+    /// When set, frames go through the outbound queue instead of `ws_client`.
+    send_queue: ?*SendQueue = null,
     running: bool = false,
     thread: ?std.Thread = null,
     interval_ms: i64 = 10000, // 10 seconds (gateway liveness is fairly aggressive)
+    /// Fastest cadence while the node is busy; the interval doubles back up to
+    /// `interval_ms` once activity stops.
+    min_interval_ms: i64 = 1000,
+    /// Full frames are re-sent at least this often so late joiners converge.
+    keyframe_interval_ms: i64 = 60000,
+
+    // Delta state (reporter thread only).
+    last_sent: ?HealthData = null,
+    last_sent_ms: i64 = 0,
+    last_keyframe_ms: i64 = 0,
+    seq: u64 = 0,
+    current_interval_ms: ?i64 = null,
+    /// `command_metrics.totalExecutions()` at the last frame carrying `commands`.
+    last_command_total: ?u64 = null,
 
     pub fn init(
         allocator: std.mem.Allocator,
@@ -35,6 +54,10 @@ pub const HealthReporter = struct {
         self.ws_mutex = m;
     }
 
+    pub fn setSendQueue(self: *HealthReporter, queue: ?*SendQueue) void {
+        self.send_queue = queue;
+    }
+
     pub fn start(self: *HealthReporter) !void {
         if (self.running) return;
         self.running = true;
@@ -50,9 +73,13 @@ pub const HealthReporter = struct {
     }
 
     fn healthReporterThread(self: *HealthReporter) void {
+        // /proc handles stay open for the life of the thread.
+        var sampler = HealthSampler.init();
+        defer sampler.deinit();
+
         while (self.running and !node_platform.stopRequested()) {
             // Send heartbeat
-            self.sendHeartbeat() catch |err| {
+            self.sendHeartbeat(&sampler) catch |err| {
                 logger.err("Failed to send heartbeat: {s}", .{@errorName(err)});
             };
 
@@ -60,19 +87,52 @@ pub const HealthReporter = struct {
             self.node_ctx.process_manager.cleanup(3600000); // 1 hour
 
             // Sleep
-            node_platform.sleepMs(@intCast(self.interval_ms));
+            node_platform.sleepMs(@intCast(self.current_interval_ms orelse self.interval_ms));
         }
     }
 
-    fn sendHeartbeat(self: *HealthReporter) !void {
+    fn sendHeartbeat(self: *HealthReporter, sampler: *HealthSampler) !void {
+        const now = node_platform.nowMs();
+        const data = collectHealthData(self.node_ctx, sampler);
+
+        // Local history is kept even while the gateway is unreachable.
+        self.node_ctx.metrics.record(toMetricsSample(now, data));
+
         // IMPORTANT: The gateway requires the *first* request on a fresh WS connection
         // to be `connect`. Do not emit node events until the node is fully
         // registered (hello-ok received).
         switch (self.node_ctx.state) {
             .idle, .executing, .error_state => {},
-            else => return,
+            else => {
+                // A new connection starts with a keyframe.
+                self.last_sent = null;
+                self.last_command_total = null;
+                return;
+            },
         }
 
+        // A frame still queued will be replaced by this one, so this one must not
+        // be a delta against it.
+        const superseding = if (self.send_queue) |q| q.pending(.health) > 0 else false;
+        const keyframe = self.last_sent == null or superseding or now - self.last_keyframe_ms >= self.keyframe_interval_ms;
+        const changed = if (self.last_sent) |prev| countChangedFields(prev, data) else fieldCount(HealthData);
+        // Latency summaries only change when something ran.
+        const command_total = self.node_ctx.command_metrics.totalExecutions();
+        const send_commands = keyframe or self.last_command_total != command_total;
+        const active = if (self.last_sent) |prev| isActivity(prev, data) else false;
+
+        const next_interval = nextInterval(
+            self.current_interval_ms orelse self.interval_ms,
+            active,
+            self.min_interval_ms,
+            self.interval_ms,
+        );
+        self.current_interval_ms = next_interval;
+
+        // Skip when nothing changed, unless waiting another tick would leave the
+        // gateway without a frame for longer than `interval_ms`.
+        if (!keyframe and changed == 0 and now + next_interval - self.last_sent_ms <= self.interval_ms) return;
+
         // Avoid sharing the main thread allocator: use a per-heartbeat arena backed by
         // the global page allocator (thread-safe).
         var arena = std.heap.ArenaAllocator.init(std.heap.page_allocator);
@@ -81,111 +141,236 @@ pub const HealthReporter = struct {
 
         const request_id = try makeRequestId(a);
 
-        // Build health payload
-        var health_data = std.json.ObjectMap.init(a);
-
-        // Node state
-        try health_data.put("state", std.json.Value{ .string = @tagName(self.node_ctx.state) });
-
-        // Stats
-        try health_data.put("commandsExecuted", std.json.Value{ .integer = @intCast(self.node_ctx.commands_executed) });
-        try health_data.put("commandsFailed", std.json.Value{ .integer = @intCast(self.node_ctx.commands_failed) });
-
-        // System metrics
-        const mem_info = try getMemoryInfo(a);
-        try health_data.put("memoryTotal", std.json.Value{ .string = mem_info.total });
-        try health_data.put("memoryAvailable", std.json.Value{ .string = mem_info.available });
-
-        const load = try getLoadAverage(a);
-        try health_data.put("loadAverage", std.json.Value{ .string = load });
-
-        // Active processes count
-        const process_list = try self.node_ctx.process_manager.listProcesses(a);
-        try health_data.put("activeProcesses", std.json.Value{ .integer = @intCast(process_list.array.items.len) });
-
         // Build node health frame (sent as node.event).
         // OpenClaw gateway accepts node-role methods: node.event / node.invoke.result.
         // Health updates are carried via event="node.health.frame".
-        const frame = .{
-            .type = "req",
-            .id = request_id,
-            .method = "node.event",
-            .params = .{
-                .event = "node.health.frame",
-                .payload = .{
-                    .ts = node_platform.nowMs(),
-                    .v = 1,
-                    .kind = "zsc.health",
-                    .data = std.json.Value{ .object = health_data },
-                },
-            },
+        var out: std.Io.Writer.Allocating = .init(a);
+        var jw: std.json.Stringify = .{ .writer = &out.writer };
+        try jw.beginObject();
+        try jw.objectField("type");
+        try jw.write("req");
+        try jw.objectField("id");
+        try jw.write(request_id);
+        try jw.objectField("method");
+        try jw.write("node.event");
+        try jw.objectField("params");
+        try jw.beginObject();
+        try jw.objectField("event");
+        try jw.write("node.health.frame");
+        try jw.objectField("payload");
+        try jw.beginObject();
+        try jw.objectField("ts");
+        try jw.write(now);
+        try jw.objectField("v");
+        try jw.write(2);
+        try jw.objectField("kind");
+        try jw.write("zsc.health");
+        try jw.objectField("seq");
+        try jw.write(self.seq);
+        try jw.objectField("keyframe");
+        try jw.write(keyframe);
+        try jw.objectField("maxIntervalMs");
+        try jw.write(self.interval_ms);
+        try jw.objectField("data");
+        try writeHealthData(&jw, if (keyframe) null else self.last_sent, data);
+        if (send_commands) {
+            try jw.objectField("commands");
+            try self.node_ctx.command_metrics.writeSummary(&jw);
+        }
+        try jw.endObject();
+        try jw.endObject();
+        try jw.endObject();
+
+        self.send(out.written()) catch |err| {
+            // The gateway may have missed the frame; resynchronise with a keyframe.
+            self.last_sent = null;
+            self.last_command_total = null;
+            return err;
         };
 
-        const payload = try messages.serializeMessage(a, frame);
+        self.seq += 1;
+        self.last_sent = data;
+        self.last_sent_ms = now;
+        if (send_commands) self.last_command_total = command_total;
+        if (keyframe) self.last_keyframe_ms = now;
+        logger.debug("Health frame sent (seq={d} keyframe={} fields={d} next={d}ms)", .{ self.seq - 1, keyframe, changed, next_interval });
+    }
+
+    fn send(self: *HealthReporter, frame: []const u8) !void {
+        if (self.send_queue) |queue| return queue.push(.health, .text, frame);
 
         if (self.ws_mutex) |m| m.lock();
         defer if (self.ws_mutex) |m| m.unlock();
-
-        try self.ws_client.send(payload);
-        logger.debug("Health frame sent", .{});
+        try self.ws_client.send(frame);
     }
 };
 
-fn makeRequestId(allocator: std.mem.Allocator) ![]const u8 {
-    const timestamp = node_platform.nowMs();
-    const random = std.crypto.random.int(u32);
-    return try std.fmt.allocPrint(allocator, "req_{d}_{x}", .{ timestamp, random });
+/// Health metrics as sent on the wire (field names are the JSON keys). Noisy
+/// gauges are quantised so that jitter alone does not produce deltas.
+pub const HealthData = struct {
+    state: []const u8,
+    commandsExecuted: u64,
+    commandsFailed: u64,
+    memoryTotalKb: ?u64 = null,
+    memoryAvailableKb: ?u64 = null,
+    load1: ?f64 = null,
+    load5: ?f64 = null,
+    load15: ?f64 = null,
+    cpuPercent: ?f64 = null,
+    nodeCpuPercent: ?f64 = null,
+    nodeRssKb: ?u64 = null,
+    nodeThreads: ?u32 = null,
+    nodeOpenFds: ?u32 = null,
+    activeProcesses: usize,
+    runningProcesses: usize,
+};
+
+fn collectHealthData(node_ctx: *NodeContext, sampler: *HealthSampler) HealthData {
+    const sample = sampler.sample();
+    const processes = node_ctx.process_manager.countProcesses();
+    return .{
+        .state = @tagName(node_ctx.state),
+        .commandsExecuted = node_ctx.commands_executed,
+        .commandsFailed = node_ctx.commands_failed,
+        .memoryTotalKb = sample.mem_total_kb,
+        .memoryAvailableKb = quantizeKb(sample.mem_available_kb),
+        .load1 = sample.load_1,
+        .load5 = sample.load_5,
+        .load15 = sample.load_15,
+        .cpuPercent = quantizePercent(sample.cpu_percent),
+        .nodeCpuPercent = quantizePercent(sample.node_cpu_percent),
+        .nodeRssKb = quantizeKb(sample.node_rss_kb),
+        .nodeThreads = sample.node_threads,
+        .nodeOpenFds = sample.node_open_fds,
+        .activeProcesses = processes.total,
+        .runningProcesses = processes.running,
+    };
 }
 
-const MemoryInfo = struct {
-    total: []const u8,
-    available: []const u8,
-};
+fn toMetricsSample(ts_ms: i64, data: HealthData) MetricsSample {
+    const nan = std.math.nan(f32);
+    return .{
+        .ts_ms = ts_ms,
+        .commands_executed = data.commandsExecuted,
+        .commands_failed = data.commandsFailed,
+        .mem_available_kb = data.memoryAvailableKb orelse MetricsSample.unknown,
+        .node_rss_kb = data.nodeRssKb orelse MetricsSample.unknown,
+        .load_1 = if (data.load1) |v| @floatCast(v) else nan,
+        .cpu_percent = if (data.cpuPercent) |v| @floatCast(v) else nan,
+        .node_cpu_percent = if (data.nodeCpuPercent) |v| @floatCast(v) else nan,
+        .node_threads = data.nodeThreads orelse MetricsSample.unknown32,
+        .node_open_fds = data.nodeOpenFds orelse MetricsSample.unknown32,
+        .active_processes = @intCast(@min(data.activeProcesses, std.math.maxInt(u32))),
+        .running_processes = @intCast(@min(data.runningProcesses, std.math.maxInt(u32))),
+    };
+}
+
+/// Round down to whole MiB.
+fn quantizeKb(v: ?u64) ?u64 {
+    const kb = v orelse return null;
+    return kb / 1024 * 1024;
+}
+
+/// Whole percent.
+fn quantizePercent(v: ?f64) ?f64 {
+    const pct = v orelse return null;
+    return @round(pct);
+}
+
+/// Changes that mean the node is doing something, as opposed to gauge drift.
+fn isActivity(prev: HealthData, next: HealthData) bool {
+    return !std.mem.eql(u8, prev.state, next.state) or
+        prev.commandsExecuted != next.commandsExecuted or
+        prev.commandsFailed != next.commandsFailed or
+        prev.activeProcesses != next.activeProcesses or
+        prev.runningProcesses != next.runningProcesses;
+}
+
+fn nextInterval(current: i64, active: bool, min_ms: i64, max_ms: i64) i64 {
+    const floor = @min(min_ms, max_ms);
+    if (active) return @max(floor, @divTrunc(current, 2));
+    return @min(max_ms, @max(floor, current * 2));
+}
+
+fn fieldCount(comptime T: type) usize {
+    return std.meta.fields(T).len;
+}
 
-fn getMemoryInfo(allocator: std.mem.Allocator) !MemoryInfo {
-    var total: []const u8 = try allocator.dupe(u8, "unknown");
-    var available: []const u8 = try allocator.dupe(u8, "unknown");
-    errdefer {
-        allocator.free(total);
-        allocator.free(available);
+fn fieldEql(a: anytype, b: @TypeOf(a)) bool {
+    if (@TypeOf(a) == []const u8) return std.mem.eql(u8, a, b);
+    return std.meta.eql(a, b);
+}
+
+fn isNull(v: anytype) bool {
+    if (@typeInfo(@TypeOf(v)) == .optional) return v == null;
+    return false;
+}
+
+fn countChangedFields(prev: HealthData, next: HealthData) usize {
+    var changed: usize = 0;
+    inline for (std.meta.fields(HealthData)) |field| {
+        if (!fieldEql(@field(prev, field.name), @field(next, field.name))) changed += 1;
     }
+    return changed;
+}
 
-    const file = std.fs.cwd().openFile("/proc/meminfo", .{}) catch return MemoryInfo{
-        .total = total,
-        .available = available,
-    };
-    defer file.close();
-
-    var buf: [1024]u8 = undefined;
-    const n = try file.readAll(&buf);
-    const content = buf[0..n];
-
-    var lines = std.mem.splitScalar(u8, content, '\n');
-    while (lines.next()) |line| {
-        if (std.mem.startsWith(u8, line, "MemTotal:")) {
-            allocator.free(total);
-            total = try allocator.dupe(u8, std.mem.trim(u8, line["MemTotal:".len..], " \t"));
-        } else if (std.mem.startsWith(u8, line, "MemAvailable:")) {
-            allocator.free(available);
-            available = try allocator.dupe(u8, std.mem.trim(u8, line["MemAvailable:".len..], " \t"));
+/// Keyframes (`prev == null`) carry every known field; deltas carry only fields
+/// that differ from `prev`, with an explicit null for metrics that went away.
+fn writeHealthData(jw: *std.json.Stringify, prev: ?HealthData, data: HealthData) !void {
+    try jw.beginObject();
+    inline for (std.meta.fields(HealthData)) |field| {
+        const value = @field(data, field.name);
+        const include = if (prev) |p| !fieldEql(@field(p, field.name), value) else !isNull(value);
+        if (include) {
+            try jw.objectField(field.name);
+            try jw.write(value);
         }
     }
+    try jw.endObject();
+}
 
-    return MemoryInfo{
-        .total = total,
-        .available = available,
-    };
+fn makeRequestId(allocator: std.mem.Allocator) ![]const u8 {
+    const timestamp = node_platform.nowMs();
+    const random = std.crypto.random.int(u32);
+    return try std.fmt.allocPrint(allocator, "req_{d}_{x}", .{ timestamp, random });
 }
 
-fn getLoadAverage(allocator: std.mem.Allocator) ![]const u8 {
-    const file = std.fs.cwd().openFile("/proc/loadavg", .{}) catch {
-        return try allocator.dupe(u8, "0.00 0.00 0.00");
+test "health delta carries only changed fields" {
+    const allocator = std.testing.allocator;
+    const base: HealthData = .{
+        .state = "idle",
+        .commandsExecuted = 4,
+        .commandsFailed = 0,
+        .memoryTotalKb = 16 * 1024 * 1024,
+        .cpuPercent = 3,
+        .activeProcesses = 0,
+        .runningProcesses = 0,
     };
-    defer file.close();
+    var next = base;
+    next.commandsExecuted = 5;
+    next.cpuPercent = null;
+
+    var out: std.Io.Writer.Allocating = .init(allocator);
+    defer out.deinit();
+    var jw: std.json.Stringify = .{ .writer = &out.writer };
+    try writeHealthData(&jw, base, next);
+    try std.testing.expectEqualStrings("{\"commandsExecuted\":5,\"cpuPercent\":null}", out.written());
+    try std.testing.expectEqual(@as(usize, 2), countChangedFields(base, next));
+    try std.testing.expect(isActivity(base, next));
 
-    var buf: [64]u8 = undefined;
-    const n = try file.readAll(&buf);
-    const content = std.mem.trim(u8, buf[0..n], " \t\n");
+    var key: std.Io.Writer.Allocating = .init(allocator);
+    defer key.deinit();
+    var key_jw: std.json.Stringify = .{ .writer = &key.writer };
+    try writeHealthData(&key_jw, null, base);
+    try std.testing.expect(std.mem.indexOf(u8, key.written(), "\"memoryTotalKb\":16777216") != null);
+    try std.testing.expect(std.mem.indexOf(u8, key.written(), "load1") == null);
+}
 
-    return try allocator.dupe(u8, content);
+test "health interval speeds up on activity and backs off to the liveness ceiling" {
+    try std.testing.expectEqual(@as(i64, 5000), nextInterval(10000, true, 1000, 10000));
+    try std.testing.expectEqual(@as(i64, 1000), nextInterval(1500, true, 1000, 10000));
+    try std.testing.expectEqual(@as(i64, 4000), nextInterval(2000, false, 1000, 10000));
+    try std.testing.expectEqual(@as(i64, 10000), nextInterval(8000, false, 1000, 10000));
+    // A ceiling below the floor wins: never exceed the liveness interval.
+    try std.testing.expectEqual(@as(i64, 500), nextInterval(500, false, 1000, 500));
 }
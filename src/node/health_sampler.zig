@@ -0,0 +1,244 @@
+const std = @import("std");
+const builtin = @import("builtin");
+const node_platform = @import("node_platform.zig");
+
+/// One round of node/system metrics. Fields are null when the platform (or a
+/// particular /proc file) cannot provide them.
+pub const HealthSample = struct {
+    mem_total_kb: ?u64 = null,
+    mem_available_kb: ?u64 = null,
+    load_1: ?f64 = null,
+    load_5: ?f64 = null,
+    load_15: ?f64 = null,
+    /// System-wide busy CPU since the previous sample (0-100).
+    cpu_percent: ?f64 = null,
+    /// This process's CPU since the previous sample, in percent of one core.
+    node_cpu_percent: ?f64 = null,
+    node_rss_kb: ?u64 = null,
+    node_threads: ?u32 = null,
+    node_open_fds: ?u32 = null,
+};
+
+const CpuTimes = struct {
+    busy: u64,
+    total: u64,
+};
+
+const SelfStat = struct {
+    cpu_ticks: u64,
+    threads: u32,
+    rss_pages: u64,
+};
+
+/// /proc reports CPU time in USER_HZ, which is 100 on every Linux ABI we ship for.
+const user_hz: u64 = 100;
+
+/// Keeps the /proc files it needs open and re-reads them with pread, so a
+/// heartbeat costs a few syscalls and no allocation.
+///
+/// Not thread-safe; owned by the health reporter thread.
+pub const HealthSampler = struct {
+    meminfo: ?std.fs.File = null,
+    loadavg: ?std.fs.File = null,
+    stat: ?std.fs.File = null,
+    self_stat: ?std.fs.File = null,
+    fd_dir: ?std.fs.Dir = null,
+
+    prev_cpu: ?CpuTimes = null,
+    prev_self_ticks: ?u64 = null,
+    prev_sample_ms: i64 = 0,
+
+    pub fn init() HealthSampler {
+        var self: HealthSampler = .{};
+        if (comptime builtin.os.tag != .linux) return self;
+
+        self.meminfo = std.fs.openFileAbsolute("/proc/meminfo", .{}) catch null;
+        self.loadavg = std.fs.openFileAbsolute("/proc/loadavg", .{}) catch null;
+        self.stat = std.fs.openFileAbsolute("/proc/stat", .{}) catch null;
+        self.self_stat = std.fs.openFileAbsolute("/proc/self/stat", .{}) catch null;
+        self.fd_dir = std.fs.openDirAbsolute("/proc/self/fd", .{ .iterate = true }) catch null;
+        return self;
+    }
+
+    pub fn deinit(self: *HealthSampler) void {
+        if (self.meminfo) |f| f.close();
+        if (self.loadavg) |f| f.close();
+        if (self.stat) |f| f.close();
+        if (self.self_stat) |f| f.close();
+        if (self.fd_dir) |*d| d.close();
+        self.* = .{};
+    }
+
+    pub fn sample(self: *HealthSampler) HealthSample {
+        var out: HealthSample = .{};
+        if (comptime builtin.os.tag != .linux) return out;
+
+        const now_ms = node_platform.nowMs();
+        const elapsed_ms = now_ms - self.prev_sample_ms;
+        self.prev_sample_ms = now_ms;
+
+        // MemTotal/MemFree/MemAvailable are the first three lines.
+        var mem_buf: [512]u8 = undefined;
+        if (preadAll(self.meminfo, &mem_buf)) |content| {
+            out.mem_total_kb = parseMeminfoKb(content, "MemTotal:");
+            out.mem_available_kb = parseMeminfoKb(content, "MemAvailable:");
+        }
+
+        var load_buf: [128]u8 = undefined;
+        if (preadAll(self.loadavg, &load_buf)) |content| {
+            if (parseLoadAverage(content)) |load| {
+                out.load_1 = load[0];
+                out.load_5 = load[1];
+                out.load_15 = load[2];
+            }
+        }
+
+        var stat_buf: [256]u8 = undefined;
+        if (preadAll(self.stat, &stat_buf)) |content| {
+            if (parseCpuTimes(content)) |cpu| {
+                if (self.prev_cpu) |prev| {
+                    if (cpu.total > prev.total and cpu.busy >= prev.busy) {
+                        const busy: f64 = @floatFromInt(cpu.busy - prev.busy);
+                        const total: f64 = @floatFromInt(cpu.total - prev.total);
+                        out.cpu_percent = busy / total * 100.0;
+                    }
+                }
+                self.prev_cpu = cpu;
+            }
+        }
+
+        var self_buf: [1024]u8 = undefined;
+        if (preadAll(self.self_stat, &self_buf)) |content| {
+            if (parseSelfStat(content)) |st| {
+                out.node_threads = st.threads;
+                out.node_rss_kb = st.rss_pages * (std.heap.pageSize() / 1024);
+                if (self.prev_self_ticks) |prev| {
+                    if (elapsed_ms > 0 and st.cpu_ticks >= prev) {
+                        const cpu_ms: f64 = @floatFromInt((st.cpu_ticks - prev) * (1000 / user_hz));
+                        out.node_cpu_percent = cpu_ms / @as(f64, @floatFromInt(elapsed_ms)) * 100.0;
+                    }
+                }
+                self.prev_self_ticks = st.cpu_ticks;
+            }
+        }
+
+        if (self.fd_dir) |dir| {
+            var count: u32 = 0;
+            var it = dir.iterate();
+            const complete = while (true) {
+                const entry = it.next() catch break false;
+                if (entry == null) break true;
+                count += 1;
+            };
+            // The listing includes the descriptor we are iterating with.
+            if (complete) out.node_open_fds = count -| 1;
+        }
+
+        return out;
+    }
+
+    fn preadAll(file: ?std.fs.File, buf: []u8) ?[]const u8 {
+        const f = file orelse return null;
+        const n = std.posix.pread(f.handle, buf, 0) catch return null;
+        if (n == 0) return null;
+        return buf[0..n];
+    }
+};
+
+fn parseMeminfoKb(content: []const u8, key: []const u8) ?u64 {
+    var lines = std.mem.splitScalar(u8, content, '\n');
+    while (lines.next()) |line| {
+        if (!std.mem.startsWith(u8, line, key)) continue;
+        var fields = std.mem.tokenizeAny(u8, line[key.len..], " \t");
+        const value = fields.next() orelse return null;
+        return std.fmt.parseInt(u64, value, 10) catch null;
+    }
+    return null;
+}
+
+fn parseLoadAverage(content: []const u8) ?[3]f64 {
+    var fields = std.mem.tokenizeAny(u8, content, " \t\n");
+    var out: [3]f64 = undefined;
+    for (&out) |*slot| {
+        const field = fields.next() orelse return null;
+        slot.* = std.fmt.parseFloat(f64, field) catch return null;
+    }
+    return out;
+}
+
+/// Aggregate "cpu" line of /proc/stat: user nice system idle iowait irq softirq steal ...
+fn parseCpuTimes(content: []const u8) ?CpuTimes {
+    const line_end = std.mem.indexOfScalar(u8, content, '\n') orelse content.len;
+    var fields = std.mem.tokenizeScalar(u8, content[0..line_end], ' ');
+    const label = fields.next() orelse return null;
+    if (!std.mem.eql(u8, label, "cpu")) return null;
+
+    var total: u64 = 0;
+    var idle: u64 = 0;
+    var index: usize = 0;
+    // Only the first eight columns; guest time is already counted in user/nice.
+    while (index < 8) : (index += 1) {
+        const field = fields.next() orelse break;
+        const value = std.fmt.parseInt(u64, field, 10) catch return null;
+        total += value;
+        if (index == 3 or index == 4) idle += value;
+    }
+    if (index < 4) return null;
+    return .{ .busy = total - idle, .total = total };
+}
+
+/// /proc/self/stat; the command name may contain spaces, so fields are counted
+/// from the closing parenthesis (field 3, state, is index 0 there).
+fn parseSelfStat(content: []const u8) ?SelfStat {
+    const close = std.mem.lastIndexOfScalar(u8, content, ')') orelse return null;
+    var fields = std.mem.tokenizeAny(u8, content[close + 1 ..], " \n");
+
+    var utime: ?u64 = null;
+    var stime: ?u64 = null;
+    var threads: ?u32 = null;
+    var rss: ?u64 = null;
+    var index: usize = 0;
+    while (fields.next()) |field| : (index += 1) {
+        switch (index) {
+            11 => utime = std.fmt.parseInt(u64, field, 10) catch return null,
+            12 => stime = std.fmt.parseInt(u64, field, 10) catch return null,
+            17 => threads = std.fmt.parseInt(u32, field, 10) catch return null,
+            21 => {
+                rss = std.fmt.parseInt(u64, field, 10) catch return null;
+                break;
+            },
+            else => {},
+        }
+    }
+
+    return .{
+        .cpu_ticks = (utime orelse return null) + (stime orelse return null),
+        .threads = threads orelse return null,
+        .rss_pages = rss orelse return null,
+    };
+}
+
+test "health sampler parses meminfo and loadavg as numbers" {
+    const meminfo = "MemTotal:       16303156 kB\nMemFree:         1234567 kB\nMemAvailable:    8123456 kB\n";
+    try std.testing.expectEqual(@as(?u64, 16303156), parseMeminfoKb(meminfo, "MemTotal:"));
+    try std.testing.expectEqual(@as(?u64, 8123456), parseMeminfoKb(meminfo, "MemAvailable:"));
+    try std.testing.expectEqual(@as(?u64, null), parseMeminfoKb(meminfo, "SwapTotal:"));
+
+    const load = parseLoadAverage("0.52 0.58 0.59 2/1261 123456\n").?;
+    try std.testing.expectApproxEqAbs(@as(f64, 0.52), load[0], 1e-9);
+    try std.testing.expectApproxEqAbs(@as(f64, 0.59), load[2], 1e-9);
+}
+
+test "health sampler parses cpu and self stat lines" {
+    const cpu = parseCpuTimes("cpu  100 5 50 800 20 1 2 3 0 0\ncpu0 50 2 25 400 10 0 1 1 0 0\n").?;
+    try std.testing.expectEqual(@as(u64, 981), cpu.total);
+    try std.testing.expectEqual(@as(u64, 161), cpu.busy);
+
+    const raw = "4242 (ziggy star) S 1 4242 4242 0 -1 4194560 1000 0 0 0 37 13 0 0 20 0 7 0 123456 987654321 2048 18446744073709551615\n";
+    const st = parseSelfStat(raw).?;
+    try std.testing.expectEqual(@as(u64, 50), st.cpu_ticks);
+    try std.testing.expectEqual(@as(u32, 7), st.threads);
+    try std.testing.expectEqual(@as(u64, 2048), st.rss_pages);
+
+    try std.testing.expect(parseSelfStat("4242 (truncated") == null);
+}
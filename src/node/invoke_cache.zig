@@ -0,0 +1,142 @@
+const std = @import("std");
+const node_platform = @import("node_platform.zig");
+
+/// Recent successful invoke results keyed by idempotency key (or invoke id),
+/// so a gateway retry after a dropped connection is answered without running
+/// the command again.
+///
+/// Only ok results are kept: a failure may be transient (a timeout, a busy
+/// device), and a retry should get a fresh attempt. Invokes run one at a time
+/// on the node loop, so a duplicate never arrives while the first is still
+/// running. Entries are LRU-bounded by count and total payload bytes, and
+/// expire after `ttl_ms`.
+pub const InvokeCache = struct {
+    allocator: std.mem.Allocator,
+    mutex: std.Thread.Mutex = .{},
+    entries: std.StringHashMapUnmanaged(*Entry) = .empty,
+    tick: u64 = 0,
+    /// Payload bytes held by all entries.
+    bytes: usize = 0,
+
+    capacity: usize = 128,
+    max_bytes: usize = 8 * 1024 * 1024,
+    /// Larger results are answered normally but not kept.
+    max_entry_bytes: usize = 1024 * 1024,
+    ttl_ms: i64 = 5 * 60 * 1000,
+
+    const Entry = struct {
+        key: []u8,
+        /// Serialized result payload.
+        payload: []u8,
+        stored_ms: i64,
+        last_used: u64,
+    };
+
+    pub fn init(allocator: std.mem.Allocator) InvokeCache {
+        return .{ .allocator = allocator };
+    }
+
+    pub fn deinit(self: *InvokeCache) void {
+        var it = self.entries.valueIterator();
+        while (it.next()) |entry| self.destroyEntry(entry.*);
+        self.entries.deinit(self.allocator);
+    }
+
+    /// The cached payload for `key`, copied into `allocator`, or null when the
+    /// command should run.
+    pub fn lookup(self: *InvokeCache, allocator: std.mem.Allocator, key: []const u8) !?[]u8 {
+        self.mutex.lock();
+        defer self.mutex.unlock();
+
+        self.tick += 1;
+        const entry = self.entries.get(key) orelse return null;
+        if (node_platform.nowMs() - entry.stored_ms > self.ttl_ms) {
+            self.removeEntry(entry);
+            return null;
+        }
+        entry.last_used = self.tick;
+        return try allocator.dupe(u8, entry.payload);
+    }
+
+    /// Keeps a copy of a successful result payload. Oversized payloads are skipped.
+    pub fn store(self: *InvokeCache, key: []const u8, payload: []const u8) !void {
+        if (payload.len > self.max_entry_bytes) return;
+        self.mutex.lock();
+        defer self.mutex.unlock();
+
+        self.tick += 1;
+        if (self.entries.get(key)) |old| self.removeEntry(old);
+
+        const entry = try self.allocator.create(Entry);
+        errdefer self.allocator.destroy(entry);
+        const key_copy = try self.allocator.dupe(u8, key);
+        errdefer self.allocator.free(key_copy);
+        const payload_copy = try self.allocator.dupe(u8, payload);
+        errdefer self.allocator.free(payload_copy);
+        entry.* = .{ .key = key_copy, .payload = payload_copy, .stored_ms = node_platform.nowMs(), .last_used = self.tick };
+        try self.entries.put(self.allocator, key_copy, entry);
+        self.bytes += payload.len;
+        self.evict();
+    }
+
+    /// Drop least-recently-used entries until within both limits.
+    fn evict(self: *InvokeCache) void {
+        while (self.entries.count() > self.capacity or self.bytes > self.max_bytes) {
+            var oldest: ?*Entry = null;
+            var it = self.entries.valueIterator();
+            while (it.next()) |entry| {
+                if (oldest == null or entry.*.last_used < oldest.?.last_used) oldest = entry.*;
+            }
+            self.removeEntry(oldest orelse return);
+        }
+    }
+
+    fn removeEntry(self: *InvokeCache, entry: *Entry) void {
+        _ = self.entries.remove(entry.key);
+        self.bytes -= entry.payload.len;
+        self.destroyEntry(entry);
+    }
+
+    fn destroyEntry(self: *InvokeCache, entry: *Entry) void {
+        self.allocator.free(entry.payload);
+        self.allocator.free(entry.key);
+        self.allocator.destroy(entry);
+    }
+};
+
+test "invoke cache replays stored results until they expire" {
+    const allocator = std.testing.allocator;
+    var cache = InvokeCache.init(allocator);
+    defer cache.deinit();
+
+    try std.testing.expect(try cache.lookup(allocator, "k1") == null);
+    try cache.store("k1", "{\"ok\":true}");
+    const again = (try cache.lookup(allocator, "k1")).?;
+    defer allocator.free(again);
+    try std.testing.expectEqualStrings("{\"ok\":true}", again);
+
+    cache.ttl_ms = -1;
+    try std.testing.expect(try cache.lookup(allocator, "k1") == null);
+    try std.testing.expectEqual(@as(usize, 0), cache.bytes);
+}
+
+test "invoke cache evicts least recently used entries and skips oversized results" {
+    const allocator = std.testing.allocator;
+    var cache = InvokeCache.init(allocator);
+    defer cache.deinit();
+    cache.capacity = 2;
+    cache.max_entry_bytes = 4;
+
+    try cache.store("a", "{}");
+    try cache.store("b", "{}");
+    // Touch "a" so "b" is the eviction candidate.
+    allocator.free((try cache.lookup(allocator, "a")).?);
+
+    try cache.store("c", "{}");
+    try std.testing.expect(cache.entries.get("b") == null);
+    try std.testing.expect(cache.entries.get("a") != null);
+
+    try cache.store("d", "{\"big\":1}");
+    try std.testing.expect(cache.entries.get("d") == null);
+    try std.testing.expectEqual(@as(usize, 4), cache.bytes);
+}
@@ -0,0 +1,250 @@
+const std = @import("std");
+const builtin = @import("builtin");
+const node_context = @import("node_context.zig");
+const NodeContext = node_context.NodeContext;
+const Command = node_context.Command;
+const command_metrics = @import("command_metrics.zig");
+const ConnectionStats = @import("connection_manager_singlethread.zig").ConnectionStats;
+const send_queue = @import("send_queue.zig");
+const ziggy = @import("ziggy-core");
+const logger = ziggy.utils.logger;
+
+const content_type = "application/openmetrics-text; version=1.0.0; charset=utf-8";
+
+/// Opt-in OpenMetrics endpoint for node mode (`GET /metrics` on 127.0.0.1).
+///
+/// Runs its own thread and only reads state that is already shared across
+/// threads (atomics, or structures guarded by their own mutex), so scraping
+/// never touches the gateway connection.
+pub const MetricsExporter = struct {
+    node_ctx: *NodeContext,
+    conn_stats: *ConnectionStats,
+    port: u16,
+    server: ?std.net.Server = null,
+    running: std.atomic.Value(bool) = .init(false),
+    thread: ?std.Thread = null,
+
+    pub fn init(node_ctx: *NodeContext, conn_stats: *ConnectionStats, port: u16) MetricsExporter {
+        return .{ .node_ctx = node_ctx, .conn_stats = conn_stats, .port = port };
+    }
+
+    pub fn start(self: *MetricsExporter) !void {
+        if (self.thread != null) return;
+        // Loopback only: the endpoint is unauthenticated.
+        const address = try std.net.Address.parseIp4("127.0.0.1", self.port);
+        self.server = try address.listen(.{ .reuse_address = true });
+        errdefer {
+            self.server.?.deinit();
+            self.server = null;
+        }
+        self.running.store(true, .release);
+        self.thread = try std.Thread.spawn(.{}, serveThread, .{self});
+        logger.info("Metrics exporter listening on http://127.0.0.1:{d}/metrics", .{self.port});
+    }
+
+    pub fn stop(self: *MetricsExporter) void {
+        self.running.store(false, .release);
+        if (self.thread) |t| {
+            t.join();
+            self.thread = null;
+        }
+        if (self.server) |*server| {
+            server.deinit();
+            self.server = null;
+        }
+    }
+
+    fn serveThread(self: *MetricsExporter) void {
+        const server = &self.server.?;
+        while (self.running.load(.acquire)) {
+            // Poll so `stop` is noticed without a wake-up connection.
+            var fds = [_]std.posix.pollfd{.{ .fd = server.stream.handle, .events = std.posix.POLL.IN, .revents = 0 }};
+            const ready = std.posix.poll(&fds, 250) catch |err| {
+                logger.err("Metrics exporter poll failed: {s}", .{@errorName(err)});
+                return;
+            };
+            if (ready == 0) continue;
+
+            const conn = server.accept() catch |err| {
+                logger.warn("Metrics exporter accept failed: {s}", .{@errorName(err)});
+                continue;
+            };
+            defer conn.stream.close();
+            self.handleConnection(conn.stream) catch |err| {
+                logger.debug("Metrics scrape failed: {s}", .{@errorName(err)});
+            };
+        }
+    }
+
+    fn handleConnection(self: *MetricsExporter, stream: std.net.Stream) !void {
+        setReceiveTimeout(stream, 2000);
+
+        var read_buf: [1024]u8 = undefined;
+        var stream_reader = stream.reader(&read_buf);
+        const reader = stream_reader.interface();
+
+        const request_line = std.mem.trimRight(u8, try reader.takeDelimiterInclusive('\n'), "\r\n");
+        var parts = std.mem.tokenizeScalar(u8, request_line, ' ');
+        const method = parts.next() orelse return error.BadRequest;
+        const target = parts.next() orelse return error.BadRequest;
+
+        // Drain headers so closing the socket does not reset the response.
+        while (true) {
+            const line = try reader.takeDelimiterInclusive('\n');
+            if (std.mem.trimRight(u8, line, "\r\n").len == 0) break;
+        }
+
+        var write_buf: [4096]u8 = undefined;
+        var stream_writer = stream.writer(&write_buf);
+        const writer = &stream_writer.interface;
+
+        const path = if (std.mem.indexOfScalar(u8, target, '?')) |q| target[0..q] else target;
+        if (!std.mem.eql(u8, method, "GET") or !std.mem.eql(u8, path, "/metrics")) {
+            try writer.writeAll("HTTP/1.1 404 Not Found\r\nContent-Type: text/plain\r\nContent-Length: 10\r\nConnection: close\r\n\r\nnot found\n");
+            try writer.flush();
+            return;
+        }
+
+        // Render first so Content-Length is known; scrapes are a few KiB.
+        var arena = std.heap.ArenaAllocator.init(std.heap.page_allocator);
+        defer arena.deinit();
+        var body: std.Io.Writer.Allocating = .init(arena.allocator());
+        try writeMetrics(&body.writer, self.node_ctx, self.conn_stats);
+
+        try writer.print("HTTP/1.1 200 OK\r\nContent-Type: {s}\r\nContent-Length: {d}\r\nConnection: close\r\n\r\n", .{ content_type, body.written().len });
+        try writer.writeAll(body.written());
+        try writer.flush();
+    }
+};
+
+fn setReceiveTimeout(stream: std.net.Stream, ms: u32) void {
+    if (comptime builtin.os.tag == .windows) return;
+    const tv = std.posix.timeval{
+        .sec = @intCast(ms / std.time.ms_per_s),
+        .usec = @intCast((ms % std.time.ms_per_s) * std.time.us_per_ms),
+    };
+    std.posix.setsockopt(stream.handle, std.posix.SOL.SOCKET, std.posix.SO.RCVTIMEO, std.mem.asBytes(&tv)) catch {};
+}
+
+const quantiles = [_]struct { q: f64, label: []const u8 }{
+    .{ .q = 0.5, .label = "0.5" },
+    .{ .q = 0.9, .label = "0.9" },
+    .{ .q = 0.99, .label = "0.99" },
+};
+
+/// Render the OpenMetrics text exposition. Counters follow the `_total`
+/// convention; invoke latency is a summary per command and phase.
+pub fn writeMetrics(w: *std.Io.Writer, node_ctx: *NodeContext, conn: *ConnectionStats) !void {
+    // Connection
+    try w.writeAll("# TYPE ziggystarclaw_gateway_connected gauge\n# HELP ziggystarclaw_gateway_connected Whether the gateway WebSocket is open.\n");
+    try w.print("ziggystarclaw_gateway_connected {d}\n", .{@intFromBool(conn.connected.load(.monotonic))});
+    try w.writeAll("# TYPE ziggystarclaw_node_state stateset\n# HELP ziggystarclaw_node_state Node registration/execution state.\n");
+    const NodeState = node_context.NodeState;
+    const state = node_ctx.state;
+    inline for (@typeInfo(NodeState).@"enum".fields) |field| {
+        const active = state == @field(NodeState, field.name);
+        try w.print("ziggystarclaw_node_state{{ziggystarclaw_node_state=\"{s}\"}} {d}\n", .{ field.name, @intFromBool(active) });
+    }
+    try writeCounter(w, "ziggystarclaw_gateway_connect_attempts", "Gateway connect attempts.", conn.connect_attempts.load(.monotonic));
+    try writeCounter(w, "ziggystarclaw_gateway_connect_failures", "Gateway connect attempts that failed.", conn.connect_failures.load(.monotonic));
+    try writeCounter(w, "ziggystarclaw_gateway_disconnects", "Gateway connections lost after being established.", conn.disconnects.load(.monotonic));
+    try w.writeAll("# TYPE ziggystarclaw_gateway_reconnect_attempt gauge\n# HELP ziggystarclaw_gateway_reconnect_attempt Consecutive failed connect attempts (drives backoff).\n");
+    try w.print("ziggystarclaw_gateway_reconnect_attempt {d}\n", .{conn.reconnect_attempt.load(.monotonic)});
+
+    // WebSocket traffic
+    try w.writeAll("# TYPE ziggystarclaw_ws_bytes counter\n# UNIT ziggystarclaw_ws_bytes bytes\n# HELP ziggystarclaw_ws_bytes WebSocket payload bytes.\n");
+    try w.print("ziggystarclaw_ws_bytes_total{{direction=\"in\"}} {d}\n", .{conn.link.bytes_in.load(.monotonic)});
+    try w.print("ziggystarclaw_ws_bytes_total{{direction=\"out\"}} {d}\n", .{conn.link.bytes_out.load(.monotonic)});
+    try w.writeAll("# TYPE ziggystarclaw_ws_frames counter\n# HELP ziggystarclaw_ws_frames WebSocket data frames.\n");
+    try w.print("ziggystarclaw_ws_frames_total{{direction=\"in\"}} {d}\n", .{conn.link.frames_in.load(.monotonic)});
+    try w.print("ziggystarclaw_ws_frames_total{{direction=\"out\"}} {d}\n", .{conn.link.frames_out.load(.monotonic)});
+
+    // Outbound send queue
+    try w.writeAll("# TYPE ziggystarclaw_send_queue_frames gauge\n# HELP ziggystarclaw_send_queue_frames Frames waiting to be written, by priority.\n");
+    for (std.enums.values(send_queue.Priority), 0..) |priority, i| {
+        try w.print("ziggystarclaw_send_queue_frames{{priority=\"{s}\"}} {d}\n", .{ @tagName(priority), conn.queue.frames[i].load(.monotonic) });
+    }
+    try w.writeAll("# TYPE ziggystarclaw_send_queue_bytes gauge\n# UNIT ziggystarclaw_send_queue_bytes bytes\n# HELP ziggystarclaw_send_queue_bytes Bytes waiting to be written.\n");
+    try w.print("ziggystarclaw_send_queue_bytes {d}\n", .{conn.queue.bytes.load(.monotonic)});
+    try writeCounter(w, "ziggystarclaw_send_queue_dropped", "Health/telemetry frames refused because the send queue was full.", conn.queue.dropped.load(.monotonic));
+    try writeCounter(w, "ziggystarclaw_send_queue_coalesced", "Health frames replaced by a newer one before being sent.", conn.queue.coalesced.load(.monotonic));
+
+    // Invokes, per command that has run.
+    try w.writeAll("# TYPE ziggystarclaw_invokes counter\n# HELP ziggystarclaw_invokes Invokes handled, by command.\n");
+    for (std.enums.values(Command)) |cmd| {
+        const n = node_ctx.command_metrics.executions(cmd);
+        if (n > 0) try w.print("ziggystarclaw_invokes_total{{command=\"{s}\"}} {d}\n", .{ cmd.toString(), n });
+    }
+    try w.writeAll("# TYPE ziggystarclaw_invoke_errors counter\n# HELP ziggystarclaw_invoke_errors Invokes whose handler returned an error, by command.\n");
+    for (std.enums.values(Command)) |cmd| {
+        if (node_ctx.command_metrics.executions(cmd) > 0) {
+            const stats = node_ctx.command_metrics.snapshot(cmd);
+            try w.print("ziggystarclaw_invoke_errors_total{{command=\"{s}\"}} {d}\n", .{ cmd.toString(), stats.errors });
+        }
+    }
+    try w.writeAll("# TYPE ziggystarclaw_invoke_duration_seconds summary\n# UNIT ziggystarclaw_invoke_duration_seconds seconds\n# HELP ziggystarclaw_invoke_duration_seconds Invoke latency by command and phase (queue, exec, serialize, send).\n");
+    for (std.enums.values(Command)) |cmd| {
+        if (node_ctx.command_metrics.executions(cmd) > 0) {
+            const stats = node_ctx.command_metrics.snapshot(cmd);
+            inline for (@typeInfo(command_metrics.Phase).@"enum".fields) |phase| {
+                const h = &stats.phases[phase.value];
+                const name = cmd.toString();
+                for (quantiles) |q| {
+                    try w.print("ziggystarclaw_invoke_duration_seconds{{command=\"{s}\",phase=\"{s}\",quantile=\"{s}\"}} {d}\n", .{ name, phase.name, q.label, usToSeconds(h.percentile(q.q)) });
+                }
+                try w.print("ziggystarclaw_invoke_duration_seconds_sum{{command=\"{s}\",phase=\"{s}\"}} {d}\n", .{ name, phase.name, usToSeconds(h.sum) });
+                try w.print("ziggystarclaw_invoke_duration_seconds_count{{command=\"{s}\",phase=\"{s}\"}} {d}\n", .{ name, phase.name, h.count });
+            }
+        }
+    }
+
+    // Background processes
+    const processes = node_ctx.process_manager.countProcesses();
+    try w.writeAll("# TYPE ziggystarclaw_processes gauge\n# HELP ziggystarclaw_processes Tracked background processes.\n");
+    try w.print("ziggystarclaw_processes{{state=\"running\"}} {d}\n", .{processes.running});
+    try w.print("ziggystarclaw_processes{{state=\"finished\"}} {d}\n", .{processes.total - processes.running});
+    const pm = &node_ctx.process_manager;
+    try writeCounter(w, "ziggystarclaw_processes_spawned", "Background processes started.", pm.spawned_total.load(.monotonic));
+    try w.writeAll("# TYPE ziggystarclaw_process_output_bytes counter\n# UNIT ziggystarclaw_process_output_bytes bytes\n# HELP ziggystarclaw_process_output_bytes Output captured from background processes.\n");
+    try w.print("ziggystarclaw_process_output_bytes_total{{stream=\"stdout\"}} {d}\n", .{pm.stdout_bytes_total.load(.monotonic)});
+    try w.print("ziggystarclaw_process_output_bytes_total{{stream=\"stderr\"}} {d}\n", .{pm.stderr_bytes_total.load(.monotonic)});
+
+    try w.writeAll("# EOF\n");
+}
+
+fn writeCounter(w: *std.Io.Writer, comptime name: []const u8, comptime help: []const u8, value: u64) !void {
+    try w.writeAll("# TYPE " ++ name ++ " counter\n# HELP " ++ name ++ " " ++ help ++ "\n");
+    try w.print(name ++ "_total {d}\n", .{value});
+}
+
+fn usToSeconds(us: u64) f64 {
+    return @as(f64, @floatFromInt(us)) / 1_000_000.0;
+}
+
+test "metrics exposition covers connection, invokes and processes" {
+    var ctx = try NodeContext.init(std.testing.allocator, "node-id", "Node");
+    defer ctx.deinit();
+    var conn: ConnectionStats = .{};
+
+    conn.connected.store(true, .monotonic);
+    _ = conn.connect_attempts.fetchAdd(3, .monotonic);
+    _ = conn.link.bytes_out.fetchAdd(512, .monotonic);
+    conn.queue.frames[@intFromEnum(send_queue.Priority.result)].store(2, .monotonic);
+    ctx.command_metrics.recordPhase(.system_which, .exec, 1500 * std.time.ns_per_us);
+    ctx.command_metrics.recordError(.system_which);
+
+    var out: std.Io.Writer.Allocating = .init(std.testing.allocator);
+    defer out.deinit();
+    try writeMetrics(&out.writer, &ctx, &conn);
+    const text = out.written();
+
+    try std.testing.expect(std.mem.indexOf(u8, text, "ziggystarclaw_gateway_connected 1\n") != null);
+    try std.testing.expect(std.mem.indexOf(u8, text, "ziggystarclaw_gateway_connect_attempts_total 3\n") != null);
+    try std.testing.expect(std.mem.indexOf(u8, text, "ziggystarclaw_ws_bytes_total{direction=\"out\"} 512\n") != null);
+    try std.testing.expect(std.mem.indexOf(u8, text, "ziggystarclaw_send_queue_frames{priority=\"result\"} 2\n") != null);
+    try std.testing.expect(std.mem.indexOf(u8, text, "ziggystarclaw_invokes_total{command=\"system.which\"} 1\n") != null);
+    try std.testing.expect(std.mem.indexOf(u8, text, "ziggystarclaw_invoke_errors_total{command=\"system.which\"} 1\n") != null);
+    try std.testing.expect(std.mem.indexOf(u8, text, "ziggystarclaw_invoke_duration_seconds_count{command=\"system.which\",phase=\"exec\"} 1\n") != null);
+    try std.testing.expect(std.mem.indexOf(u8, text, "command=\"system.run\"") == null);
+    try std.testing.expect(std.mem.endsWith(u8, text, "# EOF\n"));
+}
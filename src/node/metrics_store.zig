@@ -0,0 +1,214 @@
+const std = @import("std");
+
+/// One fixed-width health sample. Gauges the platform could not provide are
+/// NaN (floats) or `unknown` (integers) so every slot has the same layout.
+pub const MetricsSample = struct {
+    ts_ms: i64 = 0,
+    commands_executed: u64 = 0,
+    commands_failed: u64 = 0,
+    mem_available_kb: u64 = unknown,
+    node_rss_kb: u64 = unknown,
+    load_1: f32 = std.math.nan(f32),
+    cpu_percent: f32 = std.math.nan(f32),
+    node_cpu_percent: f32 = std.math.nan(f32),
+    node_threads: u32 = unknown32,
+    node_open_fds: u32 = unknown32,
+    active_processes: u32 = 0,
+    running_processes: u32 = 0,
+
+    pub const unknown = std.math.maxInt(u64);
+    pub const unknown32 = std.math.maxInt(u32);
+};
+
+/// How a column is reduced when several samples fall into one bucket.
+const Reduce = enum { last, mean, max };
+
+const Column = struct {
+    name: []const u8,
+    field: []const u8,
+    reduce: Reduce,
+};
+
+/// Columns reported by `node.metrics.query`, in output order.
+pub const columns = [_]Column{
+    .{ .name = "commandsExecuted", .field = "commands_executed", .reduce = .last },
+    .{ .name = "commandsFailed", .field = "commands_failed", .reduce = .last },
+    .{ .name = "memoryAvailableKb", .field = "mem_available_kb", .reduce = .mean },
+    .{ .name = "nodeRssKb", .field = "node_rss_kb", .reduce = .max },
+    .{ .name = "load1", .field = "load_1", .reduce = .mean },
+    .{ .name = "cpuPercent", .field = "cpu_percent", .reduce = .mean },
+    .{ .name = "nodeCpuPercent", .field = "node_cpu_percent", .reduce = .mean },
+    .{ .name = "nodeThreads", .field = "node_threads", .reduce = .max },
+    .{ .name = "nodeOpenFds", .field = "node_open_fds", .reduce = .max },
+    .{ .name = "activeProcesses", .field = "active_processes", .reduce = .max },
+    .{ .name = "runningProcesses", .field = "running_processes", .reduce = .max },
+};
+
+/// Fixed-size ring of health samples, written by the health reporter thread
+/// and read by `node.metrics.query` on the main thread.
+///
+/// Samples closer together than `min_spacing_ms` overwrite the newest slot, so
+/// a bursty reporter cannot shrink the time window the ring covers.
+pub const MetricsStore = struct {
+    allocator: std.mem.Allocator,
+    mutex: std.Thread.Mutex = .{},
+    samples: []MetricsSample,
+    /// Index of the next slot to write.
+    head: usize = 0,
+    len: usize = 0,
+    min_spacing_ms: i64 = 1000,
+
+    /// One hour at one sample per second.
+    pub const default_capacity: usize = 3600;
+
+    pub fn init(allocator: std.mem.Allocator, capacity: usize) !MetricsStore {
+        std.debug.assert(capacity > 0);
+        return .{
+            .allocator = allocator,
+            .samples = try allocator.alloc(MetricsSample, capacity),
+        };
+    }
+
+    pub fn deinit(self: *MetricsStore) void {
+        self.allocator.free(self.samples);
+    }
+
+    pub fn record(self: *MetricsStore, sample: MetricsSample) void {
+        self.mutex.lock();
+        defer self.mutex.unlock();
+
+        if (self.len > 0) {
+            const newest = (self.head + self.samples.len - 1) % self.samples.len;
+            if (sample.ts_ms - self.samples[newest].ts_ms < self.min_spacing_ms) {
+                self.samples[newest] = sample;
+                return;
+            }
+        }
+
+        self.samples[self.head] = sample;
+        self.head = (self.head + 1) % self.samples.len;
+        if (self.len < self.samples.len) self.len += 1;
+    }
+
+    pub const Query = struct {
+        start_ms: i64,
+        end_ms: i64,
+        max_points: usize,
+    };
+
+    /// One downsampled bucket. `count == 0` buckets are gaps (no samples).
+    pub const Bucket = struct {
+        ts_ms: i64,
+        count: u32 = 0,
+        values: [columns.len]?f64 = [_]?f64{null} ** columns.len,
+    };
+
+    /// Downsample samples in [start_ms, end_ms] into at most `max_points`
+    /// equal-width buckets. Returned slice is owned by the caller.
+    pub fn query(self: *MetricsStore, allocator: std.mem.Allocator, q: Query) ![]Bucket {
+        if (q.max_points == 0 or q.end_ms < q.start_ms) return allocator.alloc(Bucket, 0);
+
+        const span: u64 = @intCast(q.end_ms - q.start_ms + 1);
+        const step: u64 = @max(1, std.math.divCeil(u64, span, q.max_points) catch unreachable);
+        const bucket_count: usize = @intCast(std.math.divCeil(u64, span, step) catch unreachable);
+
+        const buckets = try allocator.alloc(Bucket, bucket_count);
+        errdefer allocator.free(buckets);
+        for (buckets, 0..) |*bucket, i| {
+            bucket.* = .{ .ts_ms = q.start_ms + @as(i64, @intCast(step * i)) };
+        }
+
+        // Running sums for mean columns, per bucket/column.
+        const counts = try allocator.alloc([columns.len]u32, bucket_count);
+        defer allocator.free(counts);
+        @memset(counts, [_]u32{0} ** columns.len);
+
+        self.mutex.lock();
+        defer self.mutex.unlock();
+
+        const oldest = (self.head + self.samples.len - self.len) % self.samples.len;
+        var n: usize = 0;
+        while (n < self.len) : (n += 1) {
+            const sample = self.samples[(oldest + n) % self.samples.len];
+            if (sample.ts_ms < q.start_ms or sample.ts_ms > q.end_ms) continue;
+
+            const index: usize = @intCast(@as(u64, @intCast(sample.ts_ms - q.start_ms)) / step);
+            const bucket = &buckets[index];
+            bucket.count += 1;
+
+            inline for (columns, 0..) |column, c| {
+                if (columnValue(@field(sample, column.field))) |value| {
+                    const slot = &bucket.values[c];
+                    switch (column.reduce) {
+                        .last => slot.* = value,
+                        .max => slot.* = if (slot.*) |prev| @max(prev, value) else value,
+                        .mean => {
+                            // Incremental mean keeps the bucket fixed-size.
+                            counts[index][c] += 1;
+                            const k: f64 = @floatFromInt(counts[index][c]);
+                            slot.* = if (slot.*) |prev| prev + (value - prev) / k else value;
+                        },
+                    }
+                }
+            }
+        }
+
+        return buckets;
+    }
+
+    pub fn oldestTimestamp(self: *MetricsStore) ?i64 {
+        self.mutex.lock();
+        defer self.mutex.unlock();
+        if (self.len == 0) return null;
+        const oldest = (self.head + self.samples.len - self.len) % self.samples.len;
+        return self.samples[oldest].ts_ms;
+    }
+};
+
+fn columnValue(v: anytype) ?f64 {
+    return switch (@TypeOf(v)) {
+        f32 => if (std.math.isNan(v)) null else @floatCast(v),
+        u64 => if (v == MetricsSample.unknown) null else @floatFromInt(v),
+        u32 => if (v == MetricsSample.unknown32) null else @floatFromInt(v),
+        else => @compileError("unsupported metrics column type"),
+    };
+}
+
+test "metrics store wraps and keeps the newest samples" {
+    var store = try MetricsStore.init(std.testing.allocator, 4);
+    defer store.deinit();
+
+    var ts: i64 = 0;
+    while (ts < 6) : (ts += 1) {
+        store.record(.{ .ts_ms = ts * 1000, .commands_executed = @intCast(ts) });
+    }
+    try std.testing.expectEqual(@as(usize, 4), store.len);
+    try std.testing.expectEqual(@as(?i64, 2000), store.oldestTimestamp());
+
+    // Too close to the newest sample: replaces it instead of using a slot.
+    store.record(.{ .ts_ms = 5500, .commands_executed = 9 });
+    try std.testing.expectEqual(@as(?i64, 2000), store.oldestTimestamp());
+
+    const buckets = try store.query(std.testing.allocator, .{ .start_ms = 0, .end_ms = 5999, .max_points = 3 });
+    defer std.testing.allocator.free(buckets);
+    try std.testing.expectEqual(@as(usize, 3), buckets.len);
+    try std.testing.expectEqual(@as(u32, 0), buckets[0].count);
+    try std.testing.expectEqual(@as(u32, 2), buckets[1].count);
+    try std.testing.expectEqual(@as(?f64, 3), buckets[1].values[0]);
+    try std.testing.expectEqual(@as(?f64, 9), buckets[2].values[0]);
+}
+
+test "metrics store averages gauges and skips unknown values" {
+    var store = try MetricsStore.init(std.testing.allocator, 16);
+    defer store.deinit();
+
+    store.record(.{ .ts_ms = 0, .cpu_percent = 10 });
+    store.record(.{ .ts_ms = 1000, .cpu_percent = 30 });
+    store.record(.{ .ts_ms = 2000 });
+
+    const buckets = try store.query(std.testing.allocator, .{ .start_ms = 0, .end_ms = 2999, .max_points = 1 });
+    defer std.testing.allocator.free(buckets);
+    try std.testing.expectEqual(@as(u32, 3), buckets[0].count);
+    try std.testing.expectEqual(@as(?f64, 20), buckets[0].values[5]);
+    try std.testing.expectEqual(@as(?f64, null), buckets[0].values[2]);
+}
@@ -3,6 +3,10 @@ const builtin = @import("builtin");
 const types = @import("../protocol/types.zig");
 const ProcessManager = @import("process_manager.zig").ProcessManager;
 const CanvasManager = @import("canvas.zig").CanvasManager;
+const MetricsStore = @import("metrics_store.zig").MetricsStore;
+const CommandMetrics = @import("command_metrics.zig").CommandMetrics;
+const InvokeCache = @import("invoke_cache.zig").InvokeCache;
+const ArenaPool = @import("arena_pool.zig").ArenaPool;
 
 const windows_camera = if (builtin.target.os.tag == .windows)
     @import("../windows/camera.zig")
@@ -70,6 +74,10 @@ pub const Command = enum {
     process_stop,
     process_list,
 
+    // Node introspection
+    node_metrics_query,
+    node_metrics_commands,
+
     pub fn toString(self: Command) []const u8 {
         return switch (self) {
             .system_run => "system.run",
@@ -93,6 +101,8 @@ pub const Command = enum {
             .process_poll => "process.poll",
             .process_stop => "process.stop",
             .process_list => "process.list",
+            .node_metrics_query => "node.metrics.query",
+            .node_metrics_commands => "node.metrics.commands",
         };
     }
 
@@ -125,6 +135,20 @@ pub const PendingExecution = struct {
     child_process: ?std.process.Child = null,
 };
 
+/// Raw bytes produced by a command that travel beside its JSON result as
+/// binary WebSocket frames instead of being base64-encoded into it.
+pub const InvokeAttachment = struct {
+    allocator: std.mem.Allocator,
+    id: []const u8,
+    content_type: []const u8,
+    bytes: []u8,
+
+    pub fn deinit(self: *InvokeAttachment) void {
+        self.allocator.free(self.id);
+        self.allocator.free(self.bytes);
+    }
+};
+
 /// Node context - holds all node-specific state
 pub const NodeContext = struct {
     allocator: std.mem.Allocator,
@@ -145,8 +169,16 @@ pub const NodeContext = struct {
     exec_approvals_path: []const u8,
     process_manager: ProcessManager,
     canvas_manager: CanvasManager,
+    invoke_attachments: std.ArrayList(InvokeAttachment),
+    next_attachment_id: u64 = 1,
 
     // Stats
+    metrics: MetricsStore,
+    command_metrics: CommandMetrics,
+    /// Recent outcomes by idempotency key, for replaying gateway retries.
+    invoke_cache: InvokeCache,
+    /// Reusable per-invocation arenas handed to `CommandRouter.route`.
+    invoke_arenas: ArenaPool,
     commands_executed: u64 = 0,
     commands_failed: u64 = 0,
 
@@ -163,6 +195,11 @@ pub const NodeContext = struct {
             .exec_approvals_path = try allocator.dupe(u8, "~/.openclaw/exec-approvals.json"),
             .process_manager = ProcessManager.init(allocator),
             .canvas_manager = CanvasManager.init(allocator),
+            .invoke_attachments = std.ArrayList(InvokeAttachment).empty,
+            .metrics = try MetricsStore.init(allocator, MetricsStore.default_capacity),
+            .command_metrics = try CommandMetrics.init(allocator),
+            .invoke_cache = InvokeCache.init(allocator),
+            .invoke_arenas = ArenaPool.init(allocator),
         };
     }
 
@@ -198,6 +235,12 @@ pub const NodeContext = struct {
 
         self.process_manager.deinit();
         self.canvas_manager.deinit();
+        self.clearInvokeAttachments();
+        self.invoke_attachments.deinit(self.allocator);
+        self.metrics.deinit();
+        self.command_metrics.deinit();
+        self.invoke_cache.deinit();
+        self.invoke_arenas.deinit();
 
         for (self.pending_executions.items) |*exec| {
             if (exec.child_process) |*child| {
@@ -208,6 +251,39 @@ pub const NodeContext = struct {
         self.pending_executions.deinit(self.allocator);
     }
 
+    /// Queue bytes to be sent as an attachment of the current invoke. Takes
+    /// ownership of `bytes` (which must come from `bytes_allocator`) and returns
+    /// the attachment id to reference from the JSON result.
+    pub fn addInvokeAttachment(
+        self: *NodeContext,
+        bytes_allocator: std.mem.Allocator,
+        content_type: []const u8,
+        bytes: []u8,
+    ) ![]const u8 {
+        const id = std.fmt.allocPrint(bytes_allocator, "att-{d}", .{self.next_attachment_id}) catch |err| {
+            bytes_allocator.free(bytes);
+            return err;
+        };
+        self.invoke_attachments.append(self.allocator, .{
+            .allocator = bytes_allocator,
+            .id = id,
+            .content_type = content_type,
+            .bytes = bytes,
+        }) catch |err| {
+            bytes_allocator.free(id);
+            bytes_allocator.free(bytes);
+            return err;
+        };
+        self.next_attachment_id += 1;
+        return id;
+    }
+
+    /// Drop attachments queued by the last invoke (sent or not).
+    pub fn clearInvokeAttachments(self: *NodeContext) void {
+        for (self.invoke_attachments.items) |*att| att.deinit();
+        self.invoke_attachments.clearRetainingCapacity();
+    }
+
     /// Add a capability
     pub fn addCapability(self: *NodeContext, cap: Capability) !void {
         // Check if already exists
@@ -273,6 +349,8 @@ pub const NodeContext = struct {
         try self.addCommand(.system_notify);
         try self.addCommand(.system_exec_approvals_get);
         try self.addCommand(.system_exec_approvals_set);
+        try self.addCommand(.node_metrics_query);
+        try self.addCommand(.node_metrics_commands);
         try self.setPermission("system.run", true);
         try self.setPermission("system.notify", true);
     }
@@ -481,3 +559,21 @@ test "registerWindowsScreenCapabilitiesForSupport skips screen capability when u
     try std.testing.expectEqual(@as(usize, 0), ctx.capabilities.items.len);
     try std.testing.expectEqual(@as(usize, 0), ctx.commands.items.len);
 }
+
+test "invoke attachments are numbered and cleared" {
+    const allocator = std.testing.allocator;
+    var ctx = try NodeContext.init(allocator, "node-id", "Node");
+    defer ctx.deinit();
+
+    const first = try ctx.addInvokeAttachment(allocator, "image/png", try allocator.dupe(u8, "abc"));
+    const second = try ctx.addInvokeAttachment(allocator, "image/png", try allocator.dupe(u8, "defg"));
+    try std.testing.expectEqualStrings("att-1", first);
+    try std.testing.expectEqualStrings("att-2", second);
+    try std.testing.expectEqual(@as(usize, 2), ctx.invoke_attachments.items.len);
+
+    ctx.clearInvokeAttachments();
+    try std.testing.expectEqual(@as(usize, 0), ctx.invoke_attachments.items.len);
+
+    // Left queued on purpose: deinit must release it.
+    _ = try ctx.addInvokeAttachment(allocator, "image/png", try allocator.dupe(u8, "x"));
+}
@@ -0,0 +1,622 @@
+const std = @import("std");
+const builtin = @import("builtin");
+const websocket_client = @import("../client/websocket_client.zig");
+const unified_config = @import("../unified_config.zig");
+const node_platform = @import("node_platform.zig");
+const HealthData = @import("health_reporter.zig").HealthData;
+const markdown_help = @import("../cli/markdown_help.zig");
+const ziggy = @import("ziggy-core");
+const logger = ziggy.utils.logger;
+const messages = ziggy.protocol.messages;
+const requests = ziggy.protocol.requests;
+
+pub const usage = @embedFile("../cli/docs/node-swarm.md");
+
+/// Many simulated nodes in one process, for scale-testing a gateway and the
+/// operator UIs behind it.
+///
+/// Each simulated node is a real gateway connection with its own device
+/// identity, connected with the node profile. It answers `node.invoke.request`
+/// with a synthetic payload after a synthetic delay and sends health keyframes.
+/// Nothing is executed. Nodes are split across a few threads, each driving its
+/// share of sockets from one `poll` loop, so a node costs a socket, a small read
+/// buffer and its identity rather than a thread and a full node-mode process.
+pub const SwarmOptions = struct {
+    config_path: ?[]const u8 = null,
+    gateway_url: ?[]const u8 = null,
+    gateway_token: ?[]const u8 = null,
+    nodes: usize = 100,
+    name_prefix: []const u8 = "sim-node",
+    /// Per-node identity files; kept between runs so approved pairings stick.
+    identity_dir: ?[]const u8 = null,
+    /// New connections per second while ramping up.
+    connect_rate: u32 = 200,
+    nodes_per_thread: usize = 500,
+    latency_min_ms: u32 = 5,
+    latency_max_ms: u32 = 50,
+    payload_bytes: usize = 256,
+    health_interval_ms: u32 = 10_000,
+    insecure_tls: bool = false,
+    log_level: logger.Level = .warn,
+};
+
+pub fn parseOptions(args: []const []const u8) !SwarmOptions {
+    var opts = SwarmOptions{};
+
+    var i: usize = 0;
+    while (i < args.len) : (i += 1) {
+        const arg = args[i];
+        if (std.mem.eql(u8, arg, "--config")) {
+            i += 1;
+            if (i >= args.len) return error.InvalidArguments;
+            opts.config_path = args[i];
+        } else if (std.mem.eql(u8, arg, "--url")) {
+            i += 1;
+            if (i >= args.len) return error.InvalidArguments;
+            opts.gateway_url = args[i];
+        } else if (std.mem.eql(u8, arg, "--gateway-token")) {
+            i += 1;
+            if (i >= args.len) return error.InvalidArguments;
+            opts.gateway_token = args[i];
+        } else if (std.mem.eql(u8, arg, "--nodes")) {
+            i += 1;
+            if (i >= args.len) return error.InvalidArguments;
+            opts.nodes = std.fmt.parseInt(usize, args[i], 10) catch return error.InvalidArguments;
+        } else if (std.mem.eql(u8, arg, "--name-prefix")) {
+            i += 1;
+            if (i >= args.len) return error.InvalidArguments;
+            opts.name_prefix = args[i];
+        } else if (std.mem.eql(u8, arg, "--identity-dir")) {
+            i += 1;
+            if (i >= args.len) return error.InvalidArguments;
+            opts.identity_dir = args[i];
+        } else if (std.mem.eql(u8, arg, "--connect-rate")) {
+            i += 1;
+            if (i >= args.len) return error.InvalidArguments;
+            opts.connect_rate = std.fmt.parseInt(u32, args[i], 10) catch return error.InvalidArguments;
+        } else if (std.mem.eql(u8, arg, "--nodes-per-thread")) {
+            i += 1;
+            if (i >= args.len) return error.InvalidArguments;
+            opts.nodes_per_thread = std.fmt.parseInt(usize, args[i], 10) catch return error.InvalidArguments;
+        } else if (std.mem.eql(u8, arg, "--invoke-latency-ms")) {
+            i += 1;
+            if (i >= args.len) return error.InvalidArguments;
+            const range = try parseRange(args[i]);
+            opts.latency_min_ms = range[0];
+            opts.latency_max_ms = range[1];
+        } else if (std.mem.eql(u8, arg, "--payload-bytes")) {
+            i += 1;
+            if (i >= args.len) return error.InvalidArguments;
+            opts.payload_bytes = std.fmt.parseInt(usize, args[i], 10) catch return error.InvalidArguments;
+        } else if (std.mem.eql(u8, arg, "--health-interval-ms")) {
+            i += 1;
+            if (i >= args.len) return error.InvalidArguments;
+            opts.health_interval_ms = std.fmt.parseInt(u32, args[i], 10) catch return error.InvalidArguments;
+        } else if (std.mem.eql(u8, arg, "--insecure-tls")) {
+            opts.insecure_tls = true;
+        } else if (std.mem.eql(u8, arg, "--log-level")) {
+            i += 1;
+            if (i >= args.len) return error.InvalidArguments;
+            opts.log_level = std.meta.stringToEnum(logger.Level, args[i]) orelse
+                if (std.mem.eql(u8, args[i], "error")) .err else return error.InvalidArguments;
+        } else if (std.mem.eql(u8, arg, "--help") or std.mem.eql(u8, arg, "-h")) {
+            const stdout = std.fs.File.stdout().deprecatedWriter();
+            try markdown_help.writeMarkdownForStdout(stdout, std.heap.page_allocator, usage);
+            return error.HelpPrinted;
+        }
+    }
+
+    if (opts.nodes == 0 or opts.nodes_per_thread == 0 or opts.connect_rate == 0) return error.InvalidArguments;
+    return opts;
+}
+
+/// "20" or "5-50" (inclusive, milliseconds).
+fn parseRange(text: []const u8) ![2]u32 {
+    if (std.mem.indexOfScalar(u8, text, '-')) |dash| {
+        const lo = std.fmt.parseInt(u32, text[0..dash], 10) catch return error.InvalidArguments;
+        const hi = std.fmt.parseInt(u32, text[dash + 1 ..], 10) catch return error.InvalidArguments;
+        if (hi < lo) return error.InvalidArguments;
+        return .{ lo, hi };
+    }
+    const v = std.fmt.parseInt(u32, text, 10) catch return error.InvalidArguments;
+    return .{ v, v };
+}
+
+/// What a simulated node advertises. Invokes of anything else are answered the same way.
+const sim_caps: []const []const u8 = &.{"system"};
+const sim_commands: []const []const u8 = &.{ "system.run", "system.which", "system.notify" };
+
+/// Static read buffer per connection (frames above it borrow from the pool).
+const sim_read_buffer_size = 4 * 1024;
+/// Longest a shard sleeps in `poll` before re-checking timers.
+const max_wait_ms: i64 = 100;
+/// Frames read from one node per wake-up, so a chatty node cannot starve the rest.
+const max_frames_per_wake = 64;
+const backoff_max_ms: i64 = 30_000;
+
+/// Counters shared by all shards, read by the status printer.
+const Stats = struct {
+    connected: std.atomic.Value(usize) = .init(0),
+    registered: std.atomic.Value(usize) = .init(0),
+    invokes: std.atomic.Value(u64) = .init(0),
+    health_frames: std.atomic.Value(u64) = .init(0),
+    connect_failures: std.atomic.Value(u64) = .init(0),
+};
+
+const PendingResult = struct {
+    due_ms: i64,
+    invoke_id: []u8,
+    node_id: []u8,
+    command: []u8,
+
+    fn deinit(self: PendingResult, allocator: std.mem.Allocator) void {
+        allocator.free(self.invoke_id);
+        allocator.free(self.node_id);
+        allocator.free(self.command);
+    }
+};
+
+const SimNode = struct {
+    display_name: []u8,
+    identity_path: []u8,
+    /// Always a fresh client while disconnected.
+    client: websocket_client.WebSocketClient,
+    connected: bool = false,
+    registered: bool = false,
+    next_connect_ms: i64,
+    reconnect_attempt: u6 = 0,
+    next_health_ms: i64 = 0,
+    health_seq: u64 = 0,
+    invokes: u64 = 0,
+    /// Invokes answered once their synthetic latency has passed.
+    results: std.ArrayList(PendingResult) = .empty,
+};
+
+/// The subset of a gateway frame the simulator reacts to.
+const Frame = struct {
+    type: []const u8 = "",
+    event: ?[]const u8 = null,
+    ok: ?bool = null,
+    payload: ?std.json.Value = null,
+};
+
+const InvokeRequest = struct {
+    id: []const u8,
+    nodeId: []const u8,
+    command: []const u8,
+};
+
+const Shard = struct {
+    allocator: std.mem.Allocator,
+    url: []const u8,
+    token: []const u8,
+    opts: *const SwarmOptions,
+    nodes: []SimNode,
+    stats: *Stats,
+    /// `payload_bytes` of filler, shared by every result.
+    filler: []const u8,
+    prng: std.Random.DefaultPrng,
+
+    fn run(self: *Shard) void {
+        var fds: std.ArrayList(std.posix.pollfd) = .empty;
+        defer fds.deinit(self.allocator);
+        var owners: std.ArrayList(*SimNode) = .empty;
+        defer owners.deinit(self.allocator);
+
+        while (!node_platform.stopRequested()) {
+            const now = node_platform.nowMs();
+            var next_wake = now + max_wait_ms;
+            for (self.nodes) |*node| next_wake = @min(next_wake, self.service(node, now));
+
+            fds.clearRetainingCapacity();
+            owners.clearRetainingCapacity();
+            for (self.nodes) |*node| {
+                if (!node.connected) continue;
+                const handle = node.client.socketHandle() orelse continue;
+                fds.append(self.allocator, .{ .fd = handle, .events = std.posix.POLL.IN, .revents = 0 }) catch break;
+                owners.append(self.allocator, node) catch {
+                    fds.items.len -= 1;
+                    break;
+                };
+            }
+
+            const wait_ms: i32 = @intCast(std.math.clamp(next_wake - node_platform.nowMs(), 0, max_wait_ms));
+            if (fds.items.len == 0) {
+                node_platform.sleepMs(@intCast(wait_ms));
+                continue;
+            }
+            const ready = std.posix.poll(fds.items, wait_ms) catch |err| {
+                logger.warn("Swarm poll failed: {s}", .{@errorName(err)});
+                node_platform.sleepMs(@intCast(max_wait_ms));
+                continue;
+            };
+            if (ready == 0) continue;
+            for (fds.items, owners.items) |fd, node| {
+                if (fd.revents != 0) self.drain(node);
+            }
+        }
+
+        for (self.nodes) |*node| self.drop(node);
+    }
+
+    /// Connects, sends due health frames and results; returns when the node next needs attention.
+    fn service(self: *Shard, node: *SimNode, now: i64) i64 {
+        if (!node.connected) {
+            if (now < node.next_connect_ms) return node.next_connect_ms;
+            self.connect(node);
+            return node_platform.nowMs();
+        }
+        if (!node.client.is_connected) {
+            self.drop(node);
+            return node.next_connect_ms;
+        }
+
+        // Connects don't wait for connect.challenge (see `connect` below): a
+        // challenge read by `drain` sends `connect`, and this sends it without
+        // a nonce once the window has passed.
+        node.client.poll() catch {
+            self.drop(node);
+            return node.next_connect_ms;
+        };
+        if (!node.registered) return now + max_wait_ms;
+
+        var next = node.next_health_ms;
+        if (now >= node.next_health_ms) {
+            self.sendHealth(node, now) catch {
+                self.drop(node);
+                return node.next_connect_ms;
+            };
+            node.next_health_ms = now + self.opts.health_interval_ms;
+            next = node.next_health_ms;
+        }
+
+        var i: usize = 0;
+        while (i < node.results.items.len) {
+            const result = node.results.items[i];
+            if (result.due_ms > now) {
+                next = @min(next, result.due_ms);
+                i += 1;
+                continue;
+            }
+            _ = node.results.swapRemove(i);
+            defer result.deinit(self.allocator);
+            self.sendResult(node, result) catch {
+                self.drop(node);
+                return node.next_connect_ms;
+            };
+        }
+        return next;
+    }
+
+    fn connect(self: *Shard, node: *SimNode) void {
+        node.client.read_buffer_size = sim_read_buffer_size;
+        node.client.setReadTimeout(1);
+        node.client.setConnectProfile(.{
+            .role = "node",
+            .scopes = &.{},
+            .client_id = "node-host",
+            .client_mode = "node",
+            .display_name = node.display_name,
+        });
+        node.client.setConnectNodeMetadata(.{ .caps = sim_caps, .commands = sim_commands });
+        node.client.setDeviceIdentityPath(node.identity_path);
+        // A blocking wait for the challenge would stall every other node on this
+        // shard for a round trip; the poll loop handles it instead.
+        node.client.wait_for_challenge = false;
+
+        node.client.connect() catch |err| {
+            logger.debug("{s}: connect failed: {s}", .{ node.display_name, @errorName(err) });
+            _ = self.stats.connect_failures.fetchAdd(1, .monotonic);
+            node.client.deinit();
+            node.client = websocket_client.WebSocketClient.init(self.allocator, self.url, self.token, self.opts.insecure_tls, null);
+            self.scheduleReconnect(node);
+            return;
+        };
+        node.connected = true;
+        node.reconnect_attempt = 0;
+        _ = self.stats.connected.fetchAdd(1, .monotonic);
+    }
+
+    fn scheduleReconnect(self: *Shard, node: *SimNode) void {
+        const backoff = @min(@as(i64, 1000) << @min(node.reconnect_attempt, 5), backoff_max_ms);
+        node.reconnect_attempt +|= 1;
+        // Jitter keeps thousands of nodes from reconnecting in lockstep after a gateway restart.
+        node.next_connect_ms = node_platform.nowMs() + backoff + self.prng.random().intRangeAtMost(i64, 0, backoff);
+    }
+
+    fn drop(self: *Shard, node: *SimNode) void {
+        for (node.results.items) |result| result.deinit(self.allocator);
+        node.results.clearAndFree(self.allocator);
+        if (node.registered) _ = self.stats.registered.fetchSub(1, .monotonic);
+        node.registered = false;
+        if (node.connected) {
+            _ = self.stats.connected.fetchSub(1, .monotonic);
+            node.connected = false;
+            node.client.disconnect();
+            self.scheduleReconnect(node);
+        }
+        node.client.deinit();
+        node.client = websocket_client.WebSocketClient.init(self.allocator, self.url, self.token, self.opts.insecure_tls, null);
+    }
+
+    fn drain(self: *Shard, node: *SimNode) void {
+        var frames: usize = 0;
+        while (frames < max_frames_per_wake and node.connected) : (frames += 1) {
+            const frame = (node.client.receiveBorrowed() catch |err| {
+                logger.debug("{s}: receive failed: {s}", .{ node.display_name, @errorName(err) });
+                self.drop(node);
+                return;
+            }) orelse return;
+            defer node.client.release();
+            self.handleFrame(node, frame) catch |err| {
+                logger.debug("{s}: frame handling failed: {s}", .{ node.display_name, @errorName(err) });
+            };
+        }
+    }
+
+    fn handleFrame(self: *Shard, node: *SimNode, frame: []const u8) !void {
+        const parsed = std.json.parseFromSlice(Frame, self.allocator, frame, .{ .ignore_unknown_fields = true }) catch return;
+        defer parsed.deinit();
+        const msg = parsed.value;
+
+        if (std.mem.eql(u8, msg.type, "res")) {
+            if (node.registered) return;
+            if (msg.ok != true) {
+                // Usually pairing: approve the device, or use a token-auth gateway.
+                logger.warn("{s}: gateway refused connect", .{node.display_name});
+                return;
+            }
+            const payload = msg.payload orelse return;
+            if (payload != .object) return;
+            const kind = payload.object.get("type") orelse return;
+            if (kind != .string or !std.mem.eql(u8, kind.string, "hello-ok")) return;
+            node.registered = true;
+            _ = self.stats.registered.fetchAdd(1, .monotonic);
+            // Spread the first health frames over one interval.
+            node.next_health_ms = node_platform.nowMs() + self.prng.random().uintLessThan(u32, @max(self.opts.health_interval_ms, 1));
+            return;
+        }
+
+        if (!std.mem.eql(u8, msg.type, "event")) return;
+        const event = msg.event orelse return;
+        if (!std.mem.eql(u8, event, "node.invoke.request")) return;
+        const payload = msg.payload orelse return;
+        const invoke = std.json.parseFromValue(InvokeRequest, self.allocator, payload, .{ .ignore_unknown_fields = true }) catch return;
+        defer invoke.deinit();
+
+        const delay = self.prng.random().intRangeAtMost(u32, self.opts.latency_min_ms, self.opts.latency_max_ms);
+        const invoke_id = try self.allocator.dupe(u8, invoke.value.id);
+        errdefer self.allocator.free(invoke_id);
+        const node_id = try self.allocator.dupe(u8, invoke.value.nodeId);
+        errdefer self.allocator.free(node_id);
+        const command = try self.allocator.dupe(u8, invoke.value.command);
+        errdefer self.allocator.free(command);
+        try node.results.append(self.allocator, .{
+            .due_ms = node_platform.nowMs() + delay,
+            .invoke_id = invoke_id,
+            .node_id = node_id,
+            .command = command,
+        });
+    }
+
+    fn sendResult(self: *Shard, node: *SimNode, result: PendingResult) !void {
+        const json = try serializeResult(self.allocator, node.display_name, result, self.filler);
+        defer self.allocator.free(json);
+        try node.client.send(json);
+        node.invokes += 1;
+        _ = self.stats.invokes.fetchAdd(1, .monotonic);
+    }
+
+    fn sendHealth(self: *Shard, node: *SimNode, now: i64) !void {
+        const request_id = try requests.makeRequestId(self.allocator);
+        defer self.allocator.free(request_id);
+        // Always a keyframe: cheap to build, and the gateway needs no delta state per node.
+        const frame = .{
+            .type = "req",
+            .id = request_id,
+            .method = "node.event",
+            .params = .{
+                .event = "node.health.frame",
+                .payload = .{
+                    .ts = now,
+                    .v = 2,
+                    .kind = "zsc.health",
+                    .seq = node.health_seq,
+                    .keyframe = true,
+                    .maxIntervalMs = self.opts.health_interval_ms,
+                    .data = HealthData{
+                        .state = if (node.results.items.len > 0) "executing" else "idle",
+                        .commandsExecuted = node.invokes,
+                        .commandsFailed = 0,
+                        .activeProcesses = 0,
+                        .runningProcesses = 0,
+                    },
+                },
+            },
+        };
+        const json = try messages.serializeMessage(self.allocator, frame);
+        defer self.allocator.free(json);
+        try node.client.send(json);
+        node.health_seq += 1;
+        _ = self.stats.health_frames.fetchAdd(1, .monotonic);
+    }
+};
+
+/// `node.invoke.result` in the shape node-mode sends for an inline ok result.
+fn serializeResult(allocator: std.mem.Allocator, node_name: []const u8, result: PendingResult, filler: []const u8) ![]u8 {
+    const frame = .{
+        .type = "req",
+        .id = result.invoke_id,
+        .method = "node.invoke.result",
+        .params = .{
+            .id = result.invoke_id,
+            .nodeId = result.node_id,
+            .ok = true,
+            .payload = .{
+                .simulated = true,
+                .node = node_name,
+                .command = result.command,
+                .data = filler,
+            },
+        },
+    };
+    return messages.serializeMessage(allocator, frame);
+}
+
+/// Runs the swarm until a stop is requested, printing a status line every few seconds.
+pub fn run(allocator: std.mem.Allocator, opts: SwarmOptions) !void {
+    logger.setLevel(opts.log_level);
+
+    var cfg: ?unified_config.UnifiedConfig = null;
+    defer if (cfg) |*c| c.deinit(allocator);
+    if (opts.gateway_url == null or opts.gateway_token == null) {
+        const config_path = opts.config_path orelse try unified_config.defaultConfigPath(allocator);
+        defer if (opts.config_path == null) allocator.free(config_path);
+        cfg = unified_config.load(allocator, config_path) catch |err| {
+            logger.err("Failed to load config {s}: {s} (or pass --url and --gateway-token)", .{ config_path, @errorName(err) });
+            return err;
+        };
+    }
+    const raw_url = opts.gateway_url orelse cfg.?.gateway.wsUrl;
+    const token = opts.gateway_token orelse if (cfg.?.node.nodeToken.len > 0) cfg.?.node.nodeToken else cfg.?.gateway.authToken;
+    if (raw_url.len == 0) {
+        logger.err("No gateway URL: pass --url or set gateway.wsUrl", .{});
+        return error.InvalidArguments;
+    }
+    const url = try unified_config.normalizeGatewayWsUrl(allocator, raw_url);
+    defer allocator.free(url);
+
+    const identity_dir = opts.identity_dir orelse try defaultIdentityDir(allocator);
+    defer if (opts.identity_dir == null) allocator.free(identity_dir);
+    try std.fs.cwd().makePath(identity_dir);
+
+    raiseFileLimit(opts.nodes);
+
+    const filler = try allocator.alloc(u8, opts.payload_bytes);
+    defer allocator.free(filler);
+    @memset(filler, 'x');
+
+    const nodes = try allocator.alloc(SimNode, opts.nodes);
+    defer allocator.free(nodes);
+    var initialized: usize = 0;
+    defer for (nodes[0..initialized]) |*node| {
+        node.client.deinit();
+        allocator.free(node.display_name);
+        allocator.free(node.identity_path);
+    };
+
+    // Ramp up at `connect_rate` so the gateway sees a steady stream of handshakes, not a burst.
+    const start_ms = node_platform.nowMs();
+    for (nodes, 0..) |*node, i| {
+        const display_name = try std.fmt.allocPrint(allocator, "{s}-{d:0>5}", .{ opts.name_prefix, i });
+        errdefer allocator.free(display_name);
+        const file_name = try std.fmt.allocPrint(allocator, "{s}.json", .{display_name});
+        defer allocator.free(file_name);
+        const identity_path = try std.fs.path.join(allocator, &.{ identity_dir, file_name });
+        node.* = .{
+            .display_name = display_name,
+            .identity_path = identity_path,
+            .client = websocket_client.WebSocketClient.init(allocator, url, token, opts.insecure_tls, null),
+            .next_connect_ms = start_ms + @as(i64, @intCast(i * 1000 / opts.connect_rate)),
+        };
+        initialized += 1;
+    }
+
+    var stats = Stats{};
+    const shard_count = std.math.divCeil(usize, opts.nodes, opts.nodes_per_thread) catch unreachable;
+    const shards = try allocator.alloc(Shard, shard_count);
+    defer allocator.free(shards);
+    const threads = try allocator.alloc(std.Thread, shard_count);
+    defer allocator.free(threads);
+
+    var spawned: usize = 0;
+    defer for (threads[0..spawned]) |t| t.join();
+    for (shards, threads, 0..) |*shard, *t, s| {
+        const first = s * opts.nodes_per_thread;
+        shard.* = .{
+            .allocator = allocator,
+            .url = url,
+            .token = token,
+            .opts = &opts,
+            .nodes = nodes[first..@min(first + opts.nodes_per_thread, nodes.len)],
+            .stats = &stats,
+            .filler = filler,
+            .prng = std.Random.DefaultPrng.init(std.crypto.random.int(u64)),
+        };
+        t.* = std.Thread.spawn(.{}, Shard.run, .{shard}) catch |err| {
+            node_platform.requestStop();
+            return err;
+        };
+        spawned += 1;
+    }
+
+    var stdout = std.fs.File.stdout().deprecatedWriter();
+    try stdout.print("Swarm: {d} node(s) on {d} thread(s) against {s}; identities in {s}\n", .{ opts.nodes, shard_count, url, identity_dir });
+    while (!node_platform.stopRequested()) {
+        node_platform.sleepMs(status_interval_ms);
+        stdout.print("swarm: {d}/{d} connected, {d} registered, {d} invokes answered, {d} health frames, {d} connect failures\n", .{
+            stats.connected.load(.monotonic),
+            opts.nodes,
+            stats.registered.load(.monotonic),
+            stats.invokes.load(.monotonic),
+            stats.health_frames.load(.monotonic),
+            stats.connect_failures.load(.monotonic),
+        }) catch {};
+    }
+}
+
+const status_interval_ms = 5_000;
+
+/// `<temp>/ziggystarclaw-swarm`.
+fn defaultIdentityDir(allocator: std.mem.Allocator) ![]u8 {
+    const vars: []const []const u8 = if (builtin.os.tag == .windows) &.{ "TEMP", "TMP" } else &.{ "TMPDIR", "TMP", "TEMP" };
+    for (vars) |name| {
+        const value = std.process.getEnvVarOwned(allocator, name) catch continue;
+        defer allocator.free(value);
+        if (value.len == 0) continue;
+        return std.fs.path.join(allocator, &.{ value, "ziggystarclaw-swarm" });
+    }
+    return allocator.dupe(u8, if (builtin.os.tag == .windows) "ziggystarclaw-swarm" else "/tmp/ziggystarclaw-swarm");
+}
+
+/// Thousands of sockets exceed the usual soft descriptor limit (1024); lift it
+/// to the hard limit.
+fn raiseFileLimit(nodes: usize) void {
+    if (comptime builtin.os.tag == .windows) return;
+    var limit = std.posix.getrlimit(.NOFILE) catch return;
+    // Sockets plus identity files being written, with headroom.
+    const wanted: std.posix.rlim_t = @intCast(nodes + 256);
+    if (limit.cur >= wanted) return;
+    limit.cur = @min(wanted, limit.max);
+    std.posix.setrlimit(.NOFILE, limit) catch return;
+    if (limit.cur < wanted) {
+        logger.warn("Open-file limit is {d}; some of the {d} nodes will fail to connect (raise ulimit -n)", .{ limit.cur, nodes });
+    }
+}
+
+test "swarm options parse counts, latency ranges and sizes" {
+    const opts = try parseOptions(&.{ "--nodes", "5000", "--invoke-latency-ms", "10-200", "--payload-bytes", "1024", "--url", "ws://gw:18789" });
+    try std.testing.expectEqual(@as(usize, 5000), opts.nodes);
+    try std.testing.expectEqual(@as(u32, 10), opts.latency_min_ms);
+    try std.testing.expectEqual(@as(u32, 200), opts.latency_max_ms);
+    try std.testing.expectEqual(@as(usize, 1024), opts.payload_bytes);
+    try std.testing.expectEqualStrings("ws://gw:18789", opts.gateway_url.?);
+
+    try std.testing.expectEqual([2]u32{ 25, 25 }, try parseRange("25"));
+    try std.testing.expectError(error.InvalidArguments, parseRange("50-5"));
+    try std.testing.expectError(error.InvalidArguments, parseOptions(&.{ "--nodes", "0" }));
+}
+
+test "simulated invoke result matches the node-mode result frame" {
+    const allocator = std.testing.allocator;
+    var invoke_id = "inv-1".*;
+    var node_id = "node-1".*;
+    var command = "system.which".*;
+    const json = try serializeResult(allocator, "sim-node-00001", .{ .due_ms = 0, .invoke_id = &invoke_id, .node_id = &node_id, .command = &command }, "xxxx");
+    defer allocator.free(json);
+    try std.testing.expectEqualStrings(
+        "{\"type\":\"req\",\"id\":\"inv-1\",\"method\":\"node.invoke.result\",\"params\":{\"id\":\"inv-1\",\"nodeId\":\"node-1\",\"ok\":true," ++
+            "\"payload\":{\"simulated\":true,\"node\":\"sim-node-00001\",\"command\":\"system.which\",\"data\":\"xxxx\"}}}",
+        json,
+    );
+}
@@ -45,6 +45,11 @@ pub const ProcessManager = struct {
     next_id: u64 = 1,
     mutex: std.Thread.Mutex,
 
+    // Lifetime totals (survive `cleanup`); read without the mutex by exporters.
+    spawned_total: std.atomic.Value(u64) = .init(0),
+    stdout_bytes_total: std.atomic.Value(u64) = .init(0),
+    stderr_bytes_total: std.atomic.Value(u64) = .init(0),
+
     pub fn init(allocator: std.mem.Allocator) ProcessManager {
         return .{
             .allocator = allocator,
@@ -113,6 +118,7 @@ pub const ProcessManager = struct {
         // TODO: Set environment if provided (env_map type changed in Zig 0.15)
 
         try child.spawn();
+        _ = self.spawned_total.fetchAdd(1, .monotonic);
         proc_ptr.pid = child.id;
         proc_ptr.child = child;
 
@@ -121,32 +127,34 @@ pub const ProcessManager = struct {
         const stderr_reader = proc_ptr.child.?.stderr.?;
 
         const stdout_thread = try std.Thread.spawn(.{}, struct {
-            fn readOutput(reader: anytype, buf: *std.ArrayList(u8), alloc: std.mem.Allocator, proc_id: []const u8) void {
+            fn readOutput(reader: anytype, buf: *std.ArrayList(u8), alloc: std.mem.Allocator, proc_id: []const u8, total: *std.atomic.Value(u64)) void {
                 var tmp: [4096]u8 = undefined;
                 while (true) {
                     const n = reader.read(&tmp) catch break;
                     if (n == 0) break;
+                    _ = total.fetchAdd(n, .monotonic);
                     buf.appendSlice(alloc, tmp[0..n]) catch {
                         logger.err("Failed to append stdout for process {s}", .{proc_id});
                         break;
                     };
                 }
             }
-        }.readOutput, .{ stdout_reader, &proc_ptr.stdout, self.allocator, id });
+        }.readOutput, .{ stdout_reader, &proc_ptr.stdout, self.allocator, id, &self.stdout_bytes_total });
 
         const stderr_thread = try std.Thread.spawn(.{}, struct {
-            fn readOutput(reader: anytype, buf: *std.ArrayList(u8), alloc: std.mem.Allocator, proc_id: []const u8) void {
+            fn readOutput(reader: anytype, buf: *std.ArrayList(u8), alloc: std.mem.Allocator, proc_id: []const u8, total: *std.atomic.Value(u64)) void {
                 var tmp: [4096]u8 = undefined;
                 while (true) {
                     const n = reader.read(&tmp) catch break;
                     if (n == 0) break;
+                    _ = total.fetchAdd(n, .monotonic);
                     buf.appendSlice(alloc, tmp[0..n]) catch {
                         logger.err("Failed to append stderr for process {s}", .{proc_id});
                         break;
                     };
                 }
             }
-        }.readOutput, .{ stderr_reader, &proc_ptr.stderr, self.allocator, id });
+        }.readOutput, .{ stderr_reader, &proc_ptr.stderr, self.allocator, id, &self.stderr_bytes_total });
 
         // Store process and detach threads
         try self.processes.put(id_key, proc_ptr);
@@ -278,6 +286,20 @@ pub const ProcessManager = struct {
         return std.json.Value{ .array = list };
     }
 
+    /// Number of tracked processes (any state) and how many are still running,
+    /// without building the JSON that `listProcesses` returns.
+    pub fn countProcesses(self: *ProcessManager) struct { total: usize, running: usize } {
+        self.mutex.lock();
+        defer self.mutex.unlock();
+
+        var running: usize = 0;
+        var iter = self.processes.valueIterator();
+        while (iter.next()) |proc_ptr| {
+            if (proc_ptr.*.state == .running) running += 1;
+        }
+        return .{ .total = self.processes.count(), .running = running };
+    }
+
     /// Kill a process
     pub fn killProcess(self: *ProcessManager, id: []const u8) !bool {
         self.mutex.lock();
@@ -0,0 +1,283 @@
+const std = @import("std");
+const websocket_client = @import("../client/websocket_client.zig");
+const WebSocketClient = websocket_client.WebSocketClient;
+const ziggy = @import("ziggy-core");
+const logger = ziggy.utils.logger;
+
+/// Outbound lanes, drained strictly in this order.
+pub const Priority = enum {
+    /// Pairing decisions and other small control frames. Never dropped or delayed.
+    control,
+    /// Invoke results, result chunks and attachments. Producers wait for room.
+    result,
+    /// `node.health.frame`. A newer frame replaces one that is still queued.
+    health,
+    /// Best-effort bulk telemetry. Dropped when the queue is full.
+    telemetry,
+};
+
+const lane_count = std.meta.fields(Priority).len;
+
+pub const FrameKind = enum { text, binary };
+
+pub const Frame = struct {
+    kind: FrameKind,
+    bytes: []u8,
+};
+
+/// Queue depth counters, readable from other threads (e.g. the metrics exporter).
+pub const QueueStats = struct {
+    frames: [lane_count]std.atomic.Value(u32) = [_]std.atomic.Value(u32){.init(0)} ** lane_count,
+    bytes: std.atomic.Value(u64) = .init(0),
+    /// Health/telemetry frames refused because the queue was full.
+    dropped: std.atomic.Value(u64) = .init(0),
+    /// Health frames replaced by a newer one before being sent.
+    coalesced: std.atomic.Value(u64) = .init(0),
+};
+
+/// Per-connection outbound queue. Any thread pushes; one `OutboundWriter`
+/// drains it, highest priority first, so a heartbeat never waits behind more
+/// than the one bulk frame already on the wire.
+///
+/// Queued bytes are capped at `max_bytes`: result producers block until the
+/// writer catches up (backpressure for chunked uploads), health and telemetry
+/// are refused, control frames always go in.
+pub const SendQueue = struct {
+    allocator: std.mem.Allocator,
+    mutex: std.Thread.Mutex = .{},
+    /// Signalled on every push and pop; waited on by the writer and by blocked producers.
+    cond: std.Thread.Condition = .{},
+    lanes: [lane_count]std.ArrayList(Frame) = [_]std.ArrayList(Frame){.empty} ** lane_count,
+    queued_bytes: usize = 0,
+    max_bytes: usize = default_max_bytes,
+    /// Cleared while there is no registered connection; pushes fail with NotConnected.
+    open: bool = true,
+    stats: ?*QueueStats = null,
+
+    pub const default_max_bytes: usize = 4 * 1024 * 1024;
+
+    pub fn init(allocator: std.mem.Allocator) SendQueue {
+        return .{ .allocator = allocator };
+    }
+
+    pub fn deinit(self: *SendQueue) void {
+        self.dropAllLocked();
+        for (&self.lanes) |*lane| lane.deinit(self.allocator);
+    }
+
+    /// Queue a copy of `bytes`.
+    pub fn push(self: *SendQueue, priority: Priority, kind: FrameKind, bytes: []const u8) !void {
+        const copy = try self.allocator.dupe(u8, bytes);
+        errdefer self.allocator.free(copy);
+
+        self.mutex.lock();
+        defer self.mutex.unlock();
+
+        const lane = &self.lanes[@intFromEnum(priority)];
+        switch (priority) {
+            .control => {},
+            .result => while (self.open and self.queued_bytes > 0 and self.queued_bytes + copy.len > self.max_bytes) {
+                self.cond.wait(&self.mutex);
+            },
+            .health => if (self.open and lane.items.len > 0) {
+                // Only the newest health frame matters; keep the old one's place in line.
+                const stale = &lane.items[lane.items.len - 1];
+                self.queued_bytes = self.queued_bytes - stale.bytes.len + copy.len;
+                self.allocator.free(stale.bytes);
+                stale.* = .{ .kind = kind, .bytes = copy };
+                if (self.stats) |st| _ = st.coalesced.fetchAdd(1, .monotonic);
+                self.publishLocked();
+                return;
+            },
+            .telemetry => {},
+        }
+        if (!self.open) return error.NotConnected;
+        if ((priority == .health or priority == .telemetry) and self.queued_bytes + copy.len > self.max_bytes) {
+            if (self.stats) |st| _ = st.dropped.fetchAdd(1, .monotonic);
+            return error.SendQueueFull;
+        }
+
+        try lane.append(self.allocator, .{ .kind = kind, .bytes = copy });
+        self.queued_bytes += copy.len;
+        self.publishLocked();
+        self.cond.broadcast();
+    }
+
+    /// Next frame by priority, waiting up to `timeout_ns` for one. The caller
+    /// owns `bytes` (free with `allocator`).
+    pub fn pop(self: *SendQueue, timeout_ns: u64) ?Frame {
+        self.mutex.lock();
+        defer self.mutex.unlock();
+
+        if (self.queued() == 0) self.cond.timedWait(&self.mutex, timeout_ns) catch {};
+        for (&self.lanes) |*lane| {
+            if (lane.items.len == 0) continue;
+            const frame = lane.orderedRemove(0);
+            self.queued_bytes -= frame.bytes.len;
+            self.publishLocked();
+            self.cond.broadcast();
+            return frame;
+        }
+        return null;
+    }
+
+    /// Frames waiting in one lane.
+    pub fn pending(self: *SendQueue, priority: Priority) usize {
+        self.mutex.lock();
+        defer self.mutex.unlock();
+        return self.lanes[@intFromEnum(priority)].items.len;
+    }
+
+    /// Drop everything and refuse pushes until `reopen` (the connection is gone;
+    /// a new one must start with `connect`, not with leftovers).
+    pub fn close(self: *SendQueue) void {
+        self.mutex.lock();
+        defer self.mutex.unlock();
+        self.open = false;
+        self.dropAllLocked();
+        self.publishLocked();
+        self.cond.broadcast();
+    }
+
+    pub fn reopen(self: *SendQueue) void {
+        self.mutex.lock();
+        defer self.mutex.unlock();
+        self.open = true;
+    }
+
+    fn queued(self: *SendQueue) usize {
+        var n: usize = 0;
+        for (self.lanes) |lane| n += lane.items.len;
+        return n;
+    }
+
+    fn dropAllLocked(self: *SendQueue) void {
+        for (&self.lanes) |*lane| {
+            for (lane.items) |frame| self.allocator.free(frame.bytes);
+            lane.clearRetainingCapacity();
+        }
+        self.queued_bytes = 0;
+    }
+
+    fn publishLocked(self: *SendQueue) void {
+        const st = self.stats orelse return;
+        for (self.lanes, 0..) |lane, i| st.frames[i].store(@intCast(lane.items.len), .monotonic);
+        st.bytes.store(self.queued_bytes, .monotonic);
+    }
+};
+
+/// What invoke and pairing code sends through: the same `send`/`sendBinary`
+/// shape as `WebSocketClient`, with every frame queued at one priority.
+pub const Outbox = struct {
+    queue: *SendQueue,
+    priority: Priority,
+
+    pub fn send(self: Outbox, payload: []const u8) !void {
+        try self.queue.push(self.priority, .text, payload);
+    }
+
+    pub fn sendBinary(self: Outbox, frame: []u8) !void {
+        try self.queue.push(self.priority, .binary, frame);
+    }
+
+    pub fn at(self: Outbox, priority: Priority) Outbox {
+        return .{ .queue = self.queue, .priority = priority };
+    }
+};
+
+/// The single thread that writes queued frames to the gateway connection.
+///
+/// Holds `ws_mutex` per frame so the connection cannot be torn down mid-write.
+/// A failed write is reported through `send_failed` rather than handled here:
+/// only the main loop connects and disconnects.
+pub const OutboundWriter = struct {
+    queue: *SendQueue,
+    ws_client: *WebSocketClient,
+    ws_mutex: *std.Thread.Mutex,
+    running: std.atomic.Value(bool) = .init(false),
+    send_failed: std.atomic.Value(bool) = .init(false),
+    thread: ?std.Thread = null,
+
+    pub fn init(queue: *SendQueue, ws_client: *WebSocketClient, ws_mutex: *std.Thread.Mutex) OutboundWriter {
+        return .{ .queue = queue, .ws_client = ws_client, .ws_mutex = ws_mutex };
+    }
+
+    pub fn start(self: *OutboundWriter) !void {
+        if (self.thread != null) return;
+        self.running.store(true, .release);
+        self.thread = try std.Thread.spawn(.{}, writerThread, .{self});
+    }
+
+    pub fn stop(self: *OutboundWriter) void {
+        self.running.store(false, .release);
+        if (self.thread) |t| {
+            t.join();
+            self.thread = null;
+        }
+    }
+
+    fn writerThread(self: *OutboundWriter) void {
+        while (self.running.load(.acquire)) {
+            // Short wait so `stop` is noticed promptly.
+            const frame = self.queue.pop(100 * std.time.ns_per_ms) orelse continue;
+            defer self.queue.allocator.free(frame.bytes);
+
+            self.ws_mutex.lock();
+            defer self.ws_mutex.unlock();
+            if (!self.ws_client.is_connected) continue;
+
+            const sent = switch (frame.kind) {
+                .text => self.ws_client.send(frame.bytes),
+                .binary => self.ws_client.sendBinary(frame.bytes),
+            };
+            sent catch |err| {
+                logger.err("Outbound send failed: {s}", .{@errorName(err)});
+                self.send_failed.store(true, .release);
+            };
+        }
+    }
+};
+
+test "send queue drains by priority and coalesces health frames" {
+    var stats: QueueStats = .{};
+    var queue = SendQueue.init(std.testing.allocator);
+    defer queue.deinit();
+    queue.stats = &stats;
+
+    try queue.push(.health, .text, "health-1");
+    try queue.push(.result, .binary, "chunk");
+    try queue.push(.health, .text, "health-2");
+    try queue.push(.control, .text, "approve");
+    try std.testing.expectEqual(@as(u32, 1), stats.frames[@intFromEnum(Priority.health)].load(.monotonic));
+    try std.testing.expectEqual(@as(u64, 1), stats.coalesced.load(.monotonic));
+
+    const expected = [_][]const u8{ "approve", "chunk", "health-2" };
+    for (expected) |want| {
+        const frame = queue.pop(0).?;
+        defer std.testing.allocator.free(frame.bytes);
+        try std.testing.expectEqualStrings(want, frame.bytes);
+    }
+    try std.testing.expect(queue.pop(0) == null);
+    try std.testing.expectEqual(@as(u64, 0), stats.bytes.load(.monotonic));
+}
+
+test "send queue caps bytes for best-effort lanes and refuses pushes once closed" {
+    var stats: QueueStats = .{};
+    var queue = SendQueue.init(std.testing.allocator);
+    defer queue.deinit();
+    queue.stats = &stats;
+    queue.max_bytes = 8;
+
+    try queue.push(.telemetry, .text, "12345678");
+    try std.testing.expectError(error.SendQueueFull, queue.push(.telemetry, .text, "x"));
+    try std.testing.expectEqual(@as(u64, 1), stats.dropped.load(.monotonic));
+    // Control frames are never refused.
+    try queue.push(.control, .text, "ping");
+
+    queue.close();
+    try std.testing.expectEqual(@as(u64, 0), stats.bytes.load(.monotonic));
+    try std.testing.expectError(error.NotConnected, queue.push(.result, .text, "late"));
+    queue.reopen();
+    try queue.push(.result, .text, "fresh");
+    try std.testing.expectEqual(@as(usize, 1), queue.pending(.result));
+}
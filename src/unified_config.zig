@@ -30,6 +30,9 @@ pub const UnifiedConfig = struct {
         /// Keep this reasonably frequent so the gateway doesn't mark the node as stale.
         healthReporterIntervalMs: i64 = 10000,
 
+        /// Serve OpenMetrics at http://127.0.0.1:<port>/metrics. Off when null.
+        metricsPort: ?u16 = null,
+
         /// Where to store the node device identity JSON.
         deviceIdentityPath: []const u8,
         /// Exec approvals JSON path (used by system.run allowlist).
@@ -223,6 +226,7 @@ pub fn load(allocator: std.mem.Allocator, path: []const u8) !UnifiedConfig {
             .nodeId = node_id,
             .displayName = display,
             .healthReporterIntervalMs = parsed.value.node.healthReporterIntervalMs,
+            .metricsPort = parsed.value.node.metricsPort,
             .deviceIdentityPath = node_identity,
             .execApprovalsPath = approvals,
         },
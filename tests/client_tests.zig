@@ -215,3 +215,33 @@ test "exec approval resolve response records audit trail" {
     try std.testing.expect(entry.resolved_by != null);
     try std.testing.expectEqualStrings("local", entry.resolved_by.?);
 }
+
+test "node health delta frames merge into the stored keyframe" {
+    const allocator = std.testing.allocator;
+    var ctx = try state.ClientContext.init(allocator);
+    defer ctx.deinit();
+
+    const keyframe =
+        "{\"type\":\"event\",\"event\":\"node.health.frame\",\"payload\":{" ++
+        "\"nodeId\":\"n1\",\"v\":2,\"seq\":0,\"keyframe\":true," ++
+        "\"data\":{\"state\":\"idle\",\"commandsExecuted\":1,\"cpuPercent\":3}," ++
+        "\"commands\":{\"system.which\":{\"n\":1,\"errors\":0}}}}";
+    _ = try event_handler.handleRawMessage(&ctx, keyframe);
+
+    const delta =
+        "{\"type\":\"event\",\"event\":\"node.health.frame\",\"payload\":{" ++
+        "\"nodeId\":\"n1\",\"v\":2,\"seq\":1,\"keyframe\":false," ++
+        "\"data\":{\"commandsExecuted\":2,\"cpuPercent\":null}}}";
+    _ = try event_handler.handleRawMessage(&ctx, delta);
+
+    const entry = ctx.findNodeHealth("n1") orelse return error.TestExpectedHealth;
+    var parsed = try std.json.parseFromSlice(std.json.Value, allocator, entry.payload_json, .{});
+    defer parsed.deinit();
+
+    const data = parsed.value.object.get("data").?.object;
+    try std.testing.expectEqualStrings("idle", data.get("state").?.string);
+    try std.testing.expectEqual(@as(i64, 2), data.get("commandsExecuted").?.integer);
+    try std.testing.expect(data.get("cpuPercent") == null);
+    try std.testing.expectEqual(@as(i64, 1), parsed.value.object.get("seq").?.integer);
+    try std.testing.expect(parsed.value.object.get("commands").?.object.get("system.which") != null);
+}